@@ -0,0 +1,153 @@
+"""
+Benchmarks ReportService.company_overview with the sequential aggregate against the
+thread and process pools, for a growing number of active companies.
+
+Seeds a separate database (BENCH_DB_NAME, <DB_NAME>_bench by default) on the configured
+server, so the application database is never touched:
+
+    python benchmarks/bench_company_overview.py --companies 10 50 200 --workers 1 2 4 8
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models import db, CompanyModel, UserModel, TimeStampModel
+from classes.repositories.CompanyRepository import CompanyRepository
+from classes.repositories.UserRepository import UserRepository
+from classes.repositories.TimeStampRepository import TimeStampRepository
+from classes.repositories.DailyTotalsRepository import DailyTotalsRepository
+from classes.repositories.CompanyHolidayRepository import CompanyHolidayRepository
+from classes.validators.ModelValidator import ModelValidator
+from classes.factories.DomainClassFactory import DomainClassFactory
+from classes.services.ReportService import ReportService
+from classes.utilities.Permission import E_PERMISSIONS
+from classes.utilities.ReportCache import report_cache
+from config import Config
+from datetime import datetime, timezone, timedelta
+from flask import Flask
+from sqlalchemy import insert, text, update
+from sqlalchemy_utils import database_exists, create_database
+from tabulate import tabulate
+import argparse
+import random
+import time
+import uuid
+
+BENCH_DB_NAME = os.getenv('BENCH_DB_NAME', f'{Config.DB_NAME}_bench')
+YEAR = 2024
+MONTH = 3
+
+
+def create_app() -> Flask:
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'postgresql://{Config.DB_USER}:{Config.DB_PASSWORD}@{Config.DB_HOST}:{Config.DB_PORT}/{BENCH_DB_NAME}'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+
+def seed(companies: int, employees: int) -> list[str]:
+    """
+    Recreates the benchmark data: every company gets the given number of employees
+    with one punch per working day of the benchmark month.
+    """
+    with db.engine.connect() as conn:
+        conn.execute(text('CREATE EXTENSION IF NOT EXISTS "uuid-ossp";'))
+        conn.commit()
+    db.create_all()
+    db.session.execute(text('TRUNCATE time_stamps, user_daily_totals, users, companies CASCADE'))
+
+    rng = random.Random(0)
+    company_ids = [uuid.uuid4() for _ in range(companies)]
+    db.session.execute(insert(CompanyModel), [
+        {'company_id': company_id, 'company_name': f'company {i:04d}', 'is_active': True}
+        for i, company_id in enumerate(company_ids)
+    ])
+
+    users, punches = [], []
+    first_day = datetime(YEAR, MONTH, 1, 8, tzinfo=timezone.utc)
+    for i, company_id in enumerate(company_ids):
+        for j in range(employees):
+            email = f'employee{j}@company{i}.com'
+            users.append({'email': email, 'first_name': 'Employee', 'last_name': str(j), 'company_id': company_id,
+                          'permission': E_PERMISSIONS.employee if j else E_PERMISSIONS.employer, 'is_active': True,
+                          'salary': 50, 'work_capacity': 8, 'weekend_choice': 'Saturday,Sunday'})
+            for day in range(31):
+                punch_in = first_day + timedelta(days=day, minutes=rng.randint(0, 60))
+                if punch_in.weekday() >= 5:
+                    continue
+                punches.append({'uuid': uuid.uuid4(), 'user_email': email, 'punch_in_timestamp': punch_in,
+                                'punch_out_timestamp': punch_in + timedelta(hours=8, minutes=rng.randint(0, 90)),
+                                'reporting_type': 'work', 'entered_by': email})
+
+    db.session.execute(insert(UserModel), users)
+    db.session.execute(insert(TimeStampModel), punches)
+    db.session.commit()
+    db.session.execute(text('ANALYZE'))
+    return [str(company_id) for company_id in company_ids]
+
+
+def activate(company_ids: list[str], count: int) -> None:
+    db.session.execute(update(CompanyModel).values(is_active=CompanyModel.company_id.in_(company_ids[:count])))
+    db.session.commit()
+
+
+def run(report_service: ReportService, workers: int, executor_type: str, repeat: int) -> tuple[float, list]:
+    report_service.overview_workers = workers
+    report_service.overview_executor_type = executor_type
+    report_service._overview_executor = None
+
+    report_service.company_overview('monthly', str(YEAR), str(MONTH), None, None, E_PERMISSIONS.net_admin)  # warm up the pool
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        report = report_service.company_overview('monthly', str(YEAR), str(MONTH), None, None, E_PERMISSIONS.net_admin)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    if report_service._overview_executor is not None:
+        report_service._overview_executor.shutdown()
+    return best, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--companies', type=int, nargs='+', default=[10, 50, 200])
+    parser.add_argument('--employees', type=int, default=25)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--executors', nargs='+', default=['thread', 'process'])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    app = create_app()
+    if not database_exists(app.config['SQLALCHEMY_DATABASE_URI']):
+        create_database(app.config['SQLALCHEMY_DATABASE_URI'])
+
+    report_cache.max_entries = 0
+    report_service = ReportService(UserRepository(db), TimeStampRepository(db), CompanyRepository(db), DailyTotalsRepository(db),
+                                   CompanyHolidayRepository(db), ModelValidator(), DomainClassFactory())
+
+    rows = []
+    with app.app_context():
+        company_ids = seed(max(args.companies), args.employees)
+        for companies in sorted(args.companies):
+            activate(company_ids, companies)
+            baseline, expected = run(report_service, 1, 'thread', args.repeat)
+            rows.append([companies, 'sequential', 1, f'{baseline * 1000:.1f}', '1.00x'])
+
+            for executor_type in args.executors:
+                for workers in args.workers:
+                    if workers <= 1:
+                        continue
+                    elapsed, report = run(report_service, workers, executor_type, args.repeat)
+                    if report != expected:
+                        sys.exit(f'{executor_type} x{workers} report differs from the sequential one for {companies} companies')
+                    rows.append([companies, executor_type, workers, f'{elapsed * 1000:.1f}', f'{baseline / elapsed:.2f}x'])
+
+    print(f'{os.cpu_count()} cpus, {args.employees} employees per company, best of {args.repeat}')
+    print(tabulate(rows, headers=['companies', 'executor', 'workers', 'ms', 'speedup'], tablefmt='simple'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+Measures the memory held by the TimeStamp domain objects of a large report query:
+dict-backed dataclasses with a User and Company copy per punch (the former layout)
+against the slotted classes, with and without per-query interning of User and Company.
+
+Builds the objects from transient models, so no database is needed:
+
+    python benchmarks/bench_domain_memory.py --punches 100000 --users 50
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models import CompanyModel, UserModel, TimeStampModel
+from classes.dataclass.Company import Company
+from classes.dataclass.User import User
+from classes.dataclass.TimeStamp import TimeStamp
+from classes.utilities.Permission import E_PERMISSIONS
+from dataclasses import MISSING, dataclass, fields
+from datetime import datetime, timezone, timedelta
+from tabulate import tabulate
+import argparse
+import gc
+import tracemalloc
+import uuid
+
+
+def dict_backed(cls):
+    """
+    Rebuilds a domain dataclass without slots, as the classes were declared before.
+    """
+    namespace = {'__annotations__': {field.name: field.type for field in fields(cls)}}
+    namespace.update({field.name: field.default for field in fields(cls) if field.default is not MISSING})
+    return dataclass(type(cls.__name__, (), namespace))
+
+
+DictCompany = dict_backed(Company)
+DictUser = dict_backed(User)
+DictTimeStamp = dict_backed(TimeStamp)
+
+
+def to_dict_backed(timestamp: TimeStamp):
+    values = {field.name: getattr(timestamp, field.name) for field in fields(TimeStamp)}
+    user = timestamp.user
+    user_values = {field.name: getattr(user, field.name) for field in fields(User)}
+    user_values['company'] = DictCompany(**{field.name: getattr(user.company, field.name) for field in fields(Company)})
+    values['user'] = DictUser(**user_values)
+    return DictTimeStamp(**values)
+
+
+def build_models(punches: int, users: int) -> list[TimeStampModel]:
+    company = CompanyModel(company_id=uuid.uuid4(), company_name='benchmark', is_active=True)
+    user_models = [UserModel(email=f'employee{i}@benchmark.com', first_name='Employee', last_name=str(i), company=company,
+                             company_id=company.company_id, role='employee', permission=E_PERMISSIONS.employee, is_active=True,
+                             salary=50, work_capacity=8, weekend_choice='Saturday,Sunday') for i in range(users)]
+
+    first_punch = datetime(2024, 1, 1, 8, tzinfo=timezone.utc)
+    return [TimeStampModel(uuid=uuid.uuid4(), user=user_models[i % users], user_email=user_models[i % users].email,
+                           entered_by=user_models[i % users].email, punch_type=1, reporting_type='work', detail=None,
+                           punch_in_timestamp=first_punch + timedelta(hours=i),
+                           punch_out_timestamp=first_punch + timedelta(hours=i, minutes=480))
+            for i in range(punches)]
+
+
+def measure(build) -> int:
+    gc.collect()
+    tracemalloc.start()
+    objects = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return current
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--punches', type=int, default=100000)
+    parser.add_argument('--users', type=int, default=50)
+    args = parser.parse_args()
+
+    models = build_models(args.punches, args.users)
+
+    def interned():
+        cache = {}
+        return [timestamp.to_class(cache=cache) for timestamp in models]
+
+    variants = [
+        ('dict-backed, copy per punch', lambda: [to_dict_backed(timestamp.to_class()) for timestamp in models]),
+        ('slots, copy per punch', lambda: [timestamp.to_class() for timestamp in models]),
+        ('slots, interned per query', interned),
+    ]
+
+    rows = []
+    baseline = None
+    for label, build in variants:
+        size = measure(build)
+        baseline = baseline or size
+        rows.append([label, f'{size / 2 ** 20:.1f}', f'{size / args.punches:.0f}', f'{size / baseline:.2f}'])
+
+    sample = models[0].to_class()
+    legacy = to_dict_backed(sample)
+    instance_rows = [[name, sys.getsizeof(legacy_object) + sys.getsizeof(legacy_object.__dict__), sys.getsizeof(slotted_object)]
+                     for name, legacy_object, slotted_object in [('TimeStamp', legacy, sample), ('User', legacy.user, sample.user),
+                                                                 ('Company', legacy.user.company, sample.user.company)]]
+
+    print(f'{args.punches} punches of {args.users} users')
+    print(tabulate(rows, headers=['layout', 'MiB', 'bytes/punch', 'vs before'], tablefmt='simple'))
+    print()
+    print(tabulate(instance_rows, headers=['class', 'dict-backed bytes', 'slotted bytes'], tablefmt='simple'))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,42 @@
 from abc import ABC, abstractmethod
+from dataclasses import fields
 
 class BaseDomainClass(ABC):
+    # Lets the slotted dataclasses deriving from it drop the per-instance __dict__.
+    # _snapshot holds the field values captured by track_changes() and is unset otherwise.
+    __slots__ = ('_snapshot',)
+
     @abstractmethod
     def to_dict(self):
         pass
 
     @abstractmethod
     def to_model(self):
-        pass
\ No newline at end of file
+        pass
+
+    def track_changes(self):
+        """
+        Remembers the current field values so changed_fields() can report what was modified since.
+        Repositories call it on the single objects they load for update.
+        """
+        self._snapshot = {field.name: getattr(self, field.name) for field in fields(self)}
+        return self
+
+    def changed_fields(self) -> set[str] | None:
+        """
+        Names of the fields modified since track_changes(), None when changes are not tracked.
+        """
+        snapshot: dict = getattr(self, '_snapshot', None)
+        if snapshot is None:
+            return None
+
+        return {name for name, value in snapshot.items() if getattr(self, name) != value}
+
+    def original_value(self, name: str):
+        """
+        The value a field had when track_changes() was called, its current value when not tracked.
+        """
+        snapshot: dict = getattr(self, '_snapshot', None)
+        if snapshot is None or name not in snapshot:
+            return getattr(self, name)
+        return snapshot[name]
@@ -1,7 +1,7 @@
 from dataclasses import dataclass
 from classes.dataclass.BaseDomainClass import BaseDomainClass
 
-@dataclass
+@dataclass(slots=True)
 class Company(BaseDomainClass):
     company_id: str
     company_name: str
@@ -14,6 +14,18 @@ class Company(BaseDomainClass):
             'company_name': self.company_name,
             'is_active': self.is_active
         }
+
+    @staticmethod
+    def row_to_dict(row) -> dict:
+        """
+        Builds the to_dict() representation straight from a companies row.
+        """
+        return {
+            'company_id': str(row.company_id),
+            'company_name': row.company_name,
+            'is_active': row.is_active
+        }
+
     def to_model(self):
         from models import CompanyModel
         return CompanyModel(
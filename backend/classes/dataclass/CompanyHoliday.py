@@ -0,0 +1,25 @@
+from datetime import date
+from dataclasses import dataclass
+from classes.dataclass.BaseDomainClass import BaseDomainClass
+
+
+@dataclass(slots=True)
+class CompanyHoliday(BaseDomainClass):
+    company_id: str
+    day: date
+    name: str = None
+
+    def to_dict(self):
+        return {
+            'company_id': str(self.company_id),
+            'day': self.day.isoformat() if self.day else None,
+            'name': self.name,
+        }
+
+    def to_model(self):
+        from models import CompanyHolidayModel
+        return CompanyHolidayModel(
+            company_id=self.company_id,
+            day=self.day,
+            name=self.name
+        )
@@ -0,0 +1,44 @@
+from datetime import date, datetime
+from dataclasses import dataclass
+from cmn_utils import datetime2iso
+from classes.dataclass.BaseDomainClass import BaseDomainClass
+
+
+@dataclass(slots=True)
+class DailyTotal(BaseDomainClass):
+    """
+    One user's rollup of a single day of timestamps.
+
+    worked_seconds sums every closed 'work' punch of the day, while reporting_type and
+    first_entry_seconds describe the day's first punch, which is what reports count.
+    """
+    user_email: str
+    day: date
+    worked_seconds: int
+    first_entry_seconds: int
+    reporting_type: str
+    entry_count: int
+    first_punch_in: datetime
+
+    def to_dict(self):
+        return {
+            'user_email': self.user_email,
+            'day': self.day.isoformat() if self.day else None,
+            'worked_seconds': self.worked_seconds,
+            'first_entry_seconds': self.first_entry_seconds,
+            'reporting_type': self.reporting_type,
+            'entry_count': self.entry_count,
+            'first_punch_in': datetime2iso(self.first_punch_in),
+        }
+
+    def to_model(self):
+        from models import UserDailyTotalModel
+        return UserDailyTotalModel(
+            user_email=self.user_email,
+            day=self.day,
+            worked_seconds=self.worked_seconds,
+            first_entry_seconds=self.first_entry_seconds,
+            reporting_type=self.reporting_type,
+            entry_count=self.entry_count,
+            first_punch_in=self.first_punch_in
+        )
@@ -0,0 +1,70 @@
+from datetime import datetime
+from dataclasses import dataclass
+from cmn_utils import datetime2iso
+from classes.dataclass.BaseDomainClass import BaseDomainClass
+
+JOB_PENDING = 'pending'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+
+ACTIVE_STATUSES = (JOB_PENDING, JOB_RUNNING)
+FINISHED_STATUSES = (JOB_DONE, JOB_FAILED, JOB_CANCELLED)
+
+
+@dataclass(slots=True)
+class ReportJob(BaseDomainClass):
+    """
+    A background report run, stored in report_jobs so any worker can answer for it.
+
+    dedup_key identifies the caller and report parameters, result holds the report as JSON text
+    and error / error_code the RC of a failed run.
+    """
+    job_id: str
+    report_type: str
+    params: dict
+    owner_email: str
+    user_permission: int
+    user_company_id: str
+    dedup_key: str
+    status: str
+    cancel_requested: bool = False
+    created_at: datetime = None
+    started_at: datetime = None
+    finished_at: datetime = None
+    result: str = None
+    error: str = None
+    error_code: int = None
+
+    def to_dict(self):
+        return {
+            'job_id': self.job_id,
+            'report_type': self.report_type,
+            'params': self.params,
+            'status': self.status,
+            'created_at': datetime2iso(self.created_at),
+            'started_at': datetime2iso(self.started_at),
+            'finished_at': datetime2iso(self.finished_at),
+            'error': self.error,
+        }
+
+    def to_model(self):
+        from models import ReportJobModel
+        return ReportJobModel(
+            job_id=self.job_id,
+            report_type=self.report_type,
+            params=self.params,
+            owner_email=self.owner_email,
+            user_permission=self.user_permission,
+            user_company_id=self.user_company_id,
+            dedup_key=self.dedup_key,
+            status=self.status,
+            cancel_requested=self.cancel_requested,
+            created_at=self.created_at,
+            started_at=self.started_at,
+            finished_at=self.finished_at,
+            result=self.result,
+            error=self.error,
+            error_code=self.error_code
+        )
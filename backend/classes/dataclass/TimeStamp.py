@@ -7,7 +7,7 @@ from classes.dataclass.BaseDomainClass import BaseDomainClass
 
 
 
-@dataclass
+@dataclass(slots=True)
 class TimeStamp(BaseDomainClass):
     user_email: str
     entered_by: str
@@ -34,6 +34,33 @@ class TimeStamp(BaseDomainClass):
             'total_work_time': self.total_work_time,
             'last_update': datetime2iso(self.last_update),
         }
+
+    @staticmethod
+    def row_to_dict(row) -> dict:
+        """
+        Builds the to_dict() representation straight from a time_stamps row.
+        """
+        return {
+            'uuid': str(row.uuid),
+            'user_email': str(row.user_email),
+            'entered_by': str(row.entered_by),
+            'punch_type': row.punch_type,
+            'punch_in_timestamp': datetime2iso(row.punch_in_timestamp),
+            'punch_out_timestamp': datetime2iso(row.punch_out_timestamp),
+            'reporting_type': row.reporting_type,
+            'detail': row.detail,
+            'total_work_time': TimeStamp.work_time(row.punch_in_timestamp, row.punch_out_timestamp),
+            'last_update': datetime2iso(row.last_update),
+        }
+
+    @staticmethod
+    def work_time(punch_in_timestamp: datetime, punch_out_timestamp: datetime) -> int | None:
+        """
+        Seconds between punch in and punch out, None while the punch is open.
+        """
+        if punch_out_timestamp and punch_in_timestamp:
+            return int((punch_out_timestamp - punch_in_timestamp).total_seconds())
+        return None
         
     def to_model(self):
         from models import TimeStampModel
@@ -7,7 +7,7 @@ from classes.dataclass.Company import Company
 from classes.dataclass.BaseDomainClass import BaseDomainClass
 
 
-@dataclass
+@dataclass(slots=True)
 class User(BaseDomainClass):
     email: str
     first_name: str
@@ -43,6 +43,27 @@ class User(BaseDomainClass):
             'employment_end': datetime2iso(self.employment_end),
             'weekend_choice': self.weekend_choice
         }
+
+    @staticmethod
+    def row_to_dict(row) -> dict:
+        """
+        Builds the to_dict() representation straight from a users row.
+        """
+        return {
+            'email': row.email,
+            'first_name': row.first_name,
+            'last_name': row.last_name,
+            'mobile_phone': row.mobile_phone,
+            'company_id': str(row.company_id),
+            'role': row.role,
+            'permission': row.permission,
+            'is_active': row.is_active,
+            'salary': str(float(row.salary)) if row.salary else None,
+            'work_capacity': str(float(row.work_capacity)) if row.work_capacity else None,
+            'employment_start': datetime2iso(row.employment_start),
+            'employment_end': datetime2iso(row.employment_end),
+            'weekend_choice': row.weekend_choice
+        }
         
     def to_model(self):
         from models import UserModel
@@ -1,6 +1,7 @@
 from classes.dataclass.User import User
 from classes.dataclass.Company import Company
 from classes.dataclass.TimeStamp import TimeStamp
+from classes.dataclass.CompanyHoliday import CompanyHoliday
 from classes.factories.BaseFactoryClass import BaseFactory
 from classes.utilities.RC import RC, E_RC
 from cmn_utils import *
@@ -10,12 +11,12 @@ class DomainClassFactory(BaseFactory):
     Creates instances of domain models based on their type.
     """
 
-    def create(self, model_type: str, **kwargs) -> User | Company | TimeStamp | RC:
+    def create(self, model_type: str, **kwargs) -> User | Company | TimeStamp | CompanyHoliday | RC:
         """
         Creates an instance of the specified model type.
 
         Args:
-            model_type (str): The type of model to create ('user', 'company', 'timestamp').
+            model_type (str): The type of model to create ('user', 'company', 'timestamp', 'company_holiday').
             **kwargs: Keyword arguments to pass to the model constructor.
 
         Returns:
@@ -28,6 +29,8 @@ class DomainClassFactory(BaseFactory):
                 return Company(**kwargs)
             elif model_type == 'timestamp':
                 return TimeStamp(**kwargs)
+            elif model_type == 'company_holiday':
+                return CompanyHoliday(**kwargs)
             else:
                 return RC(E_RC.RC_INVALID_INPUT, f"{model_type} is an invalid domain class type")
         except Exception as e:
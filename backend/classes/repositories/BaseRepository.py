@@ -6,6 +6,10 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_sqlalchemy.model import Model
 from models import db
 from classes.dataclass.BaseDomainClass import BaseDomainClass
+from classes.utilities.LoadStrategy import E_LOAD
+from classes.utilities.Authorization import AccessScope
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy import delete, insert, inspect, select, tuple_, update
 
 
 class BaseRepository:
@@ -15,6 +19,35 @@ class BaseRepository:
     def __init__(self, db: SQLAlchemy):
         self.db = db
 
+    def _load_options(self, load: E_LOAD, *relationships) -> list:
+        """
+        Builds the loader options of a relationship chain, e.g. TimeStampModel.user, UserModel.company.
+
+        The first relationship is loaded with the given strategy and every following
+        many-to-one is joined onto it. E_LOAD.none loads nothing.
+        """
+        if E_LOAD(load) == E_LOAD.none or not relationships:
+            return []
+
+        option = joinedload(relationships[0]) if E_LOAD(load) == E_LOAD.joined else selectinload(relationships[0])
+        for relationship in relationships[1:]:
+            option = option.joinedload(relationship)
+
+        return [option]
+
+    def _scope_filter(self, scope: AccessScope, email_column) -> list:
+        """
+        Compiles an AccessScope to the conditions restricting the rows of email_column to the users
+        the caller may act on, so the permission check runs in the WHERE clause of the query itself.
+        """
+        if scope is None:
+            return []
+        if scope.user_email is not None:
+            return [email_column == scope.user_email]
+        if scope.company_id is not None:
+            return [email_column.in_(select(UserModel.email).where(UserModel.company_id == scope.company_id))]
+        return []
+
     def _save(self, model: Model) -> RC:
         """
         Saves a given model to the database.
@@ -78,6 +111,7 @@ class BaseRepository:
     def update(self, data: BaseDomainClass) -> RC:
         """
          converts a data class to a model and updates it.
+         Data classes loaded with track_changes() only write their changed columns.
 
         Args:
             data (BaseDomainClass): The data class instance to convert and update.
@@ -90,12 +124,63 @@ class BaseRepository:
                 return RC(E_RC.RC_INVALID_INPUT, "Invalid input. Input Cannot be None")
             
             new_model = data.to_model()
-            return self._update(new_model)
+            changed_fields = data.changed_fields()
+            if changed_fields is None:
+                return self._update(new_model)
+
+            return self._update_changed(data, new_model, changed_fields)
         
         except Exception as e:
             print_exception(e)
             return RC(E_RC.RC_ERROR_DATABASE, "DB Exception")
 
+    def _update_changed(self, data: BaseDomainClass, model: Model, changed_fields: set[str]) -> RC:
+        """
+        Writes only the columns of the fields changed since data.track_changes() with a single
+        UPDATE ... WHERE pk = ... RETURNING, instead of merge loading the row first.
+        Server computed columns such as last_update are copied back onto data.
+
+        Args:
+            data (BaseDomainClass): The tracked data class instance.
+            model (Model): The model data.to_model() built, used for its column conversions.
+            changed_fields (set[str]): The fields data reports as changed.
+
+        Returns:
+            RC: A result code indicating success or failure.
+        """
+        model_class = type(model)
+        mapper = inspect(model_class)
+        column_values = self._column_values(model)
+        changed_values = {mapper.column_attrs[key].columns[0]: value for key, value in column_values.items() if key in changed_fields}
+        if not changed_values:
+            return RC(E_RC.RC_OK, f"Nothing to update in {model.__tablename__} DB")
+
+        # The row is found by the primary key it was loaded with, even if the update changes it
+        primary_keys = {mapper.get_property_by_column(column).key: column for column in mapper.primary_key}
+        where_clause = [column == (data.original_value(key) if key in changed_fields else column_values[key])
+                        for key, column in primary_keys.items()]
+        server_computed = [attribute for attribute in mapper.column_attrs if attribute.columns[0].onupdate is not None]
+
+        try:
+            statement = update(model_class.__table__).where(*where_clause).values(changed_values)\
+                .returning(*[attribute.columns[0] for attribute in server_computed] or list(mapper.primary_key))
+            row = self.db.session.execute(statement).first()
+            if row is None:
+                self.db.session.rollback()
+                return RC(E_RC.RC_NOT_FOUND, f"Row to update not found in {model.__tablename__} DB")
+
+            self.db.session.commit()
+        except Exception as e:
+            self.db.session.rollback()
+            print_exception(e)
+            return RC(E_RC.RC_ERROR_DATABASE, "DB Exception")
+
+        for attribute, value in zip(server_computed, row):
+            if hasattr(data, attribute.key):
+                setattr(data, attribute.key, value)
+        data.track_changes()
+        return RC(E_RC.RC_OK, f"Succefully updated in {model.__tablename__} DB")
+
     def _delete(self, model: Model) -> RC:
         """
         Deletes a given model from the database.
@@ -135,4 +220,109 @@ class BaseRepository:
         
         except Exception as e:
             print_exception(e)
-            return RC(E_RC.RC_ERROR_DATABASE, "DB Exception")
\ No newline at end of file
+            return RC(E_RC.RC_ERROR_DATABASE, "DB Exception")
+
+    def save_many(self, data: list[BaseDomainClass]) -> RC:
+        """
+        Inserts a list of data classes of the same type with executemany in a single transaction.
+
+        Args:
+            data (list[BaseDomainClass]): The data class instances to convert and insert.
+
+        Returns:
+            RC: A result code indicating success or failure.
+        """
+        models = self._to_models(data)
+        if isinstance(models, RC):
+            return models
+
+        # Primary keys left None are generated by the server default, as _save lets them
+        rows = [{key: value for key, value in self._column_values(model).items()
+                 if value is not None or key not in self._primary_key_names(model)} for model in models]
+        return self._execute_many(insert(type(models[0])), rows, f"Succefully Saved {len(rows)} rows to {models[0].__tablename__} DB")
+
+    def update_many(self, data: list[BaseDomainClass]) -> RC:
+        """
+        Updates a list of data classes of the same type by primary key with executemany in a
+        single transaction. Like merge, every attribute set by to_model() is written, but no
+        SELECT is issued first.
+
+        Args:
+            data (list[BaseDomainClass]): The data class instances to convert and update.
+
+        Returns:
+            RC: A result code indicating success or failure.
+        """
+        models = self._to_models(data)
+        if isinstance(models, RC):
+            return models
+
+        rows = [self._column_values(model) for model in models]
+        return self._execute_many(update(type(models[0])), rows, f"Succefully updated {len(rows)} rows in {models[0].__tablename__} DB")
+
+    def delete_many(self, data: list[BaseDomainClass]) -> RC:
+        """
+        Deletes a list of data classes of the same type with a single DELETE ... WHERE pk IN (...).
+
+        Args:
+            data (list[BaseDomainClass]): The data class instances to convert and delete.
+
+        Returns:
+            RC: A result code indicating success or failure.
+        """
+        models = self._to_models(data)
+        if isinstance(models, RC):
+            return models
+
+        model_class = type(models[0])
+        primary_keys = inspect(model_class).primary_key
+        identities = [tuple(getattr(model, column.key) for column in primary_keys) for model in models]
+        if len(primary_keys) == 1:
+            where_clause = primary_keys[0].in_([identity[0] for identity in identities])
+        else:
+            where_clause = tuple_(*primary_keys).in_(identities)
+
+        try:
+            self.db.session.execute(delete(model_class).where(where_clause))
+            self.db.session.commit()
+            return RC(E_RC.RC_OK, f"Succefully deleted {len(models)} rows from {model_class.__tablename__} DB")
+        except Exception as e:
+            self.db.session.rollback()
+            print_exception(e)
+            return RC(E_RC.RC_ERROR_DATABASE, "DB Exception")
+
+    def _to_models(self, data: list[BaseDomainClass]) -> list[Model] | RC:
+        try:
+            if not data or any(item is None for item in data):
+                return RC(E_RC.RC_INVALID_INPUT, "Invalid input. Input Cannot be None")
+
+            models = [item.to_model() for item in data]
+            if len({type(model) for model in models}) > 1:
+                return RC(E_RC.RC_INVALID_INPUT, "Invalid input. All items must be of the same type")
+
+            return models
+
+        except Exception as e:
+            print_exception(e)
+            return RC(E_RC.RC_ERROR_DATABASE, "DB Exception")
+
+    def _column_values(self, model: Model) -> dict:
+        """
+        The column attributes to_model() set on a transient model, keyed by attribute name.
+        """
+        state = inspect(model)
+        return {attribute.key: state.dict[attribute.key] for attribute in state.mapper.column_attrs if attribute.key in state.dict}
+
+    def _primary_key_names(self, model: Model) -> set[str]:
+        mapper = inspect(type(model))
+        return {mapper.get_property_by_column(column).key for column in mapper.primary_key}
+
+    def _execute_many(self, statement, rows: list[dict], message: str) -> RC:
+        try:
+            self.db.session.execute(statement, rows)
+            self.db.session.commit()
+            return RC(E_RC.RC_OK, message)
+        except Exception as e:
+            self.db.session.rollback()
+            print_exception(e)
+            return RC(E_RC.RC_ERROR_DATABASE, "DB Exception")
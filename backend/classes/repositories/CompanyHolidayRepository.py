@@ -0,0 +1,54 @@
+from models import *
+from typing import List
+from datetime import date
+from cmn_utils import print_exception
+from classes.dataclass.CompanyHoliday import CompanyHoliday
+from classes.utilities.RC import RC, E_RC
+from classes.repositories.BaseRepository import BaseRepository
+
+
+class CompanyHolidayRepository(BaseRepository):
+    def __init__(self, db: SQLAlchemy):
+        super().__init__(db)
+
+    def get_holidays(self, company_id: str, first_day: date = None, last_day: date = None) -> List[CompanyHoliday] | RC:
+        """
+        Fetches a company's holidays ordered by day, optionally limited to a range of days.
+
+        Args:
+            company_id (str): The company whose holidays are fetched.
+            first_day (date, optional): First day of the range (inclusive).
+            last_day (date, optional): Last day of the range (inclusive).
+
+        Returns:
+            List[CompanyHoliday] | RC: The holidays, or an RC on failure.
+        """
+        try:
+            query = CompanyHolidayModel.query.filter(CompanyHolidayModel.company_id == company_id)
+            if first_day is not None:
+                query = query.filter(CompanyHolidayModel.day >= first_day)
+            if last_day is not None:
+                query = query.filter(CompanyHolidayModel.day <= last_day)
+
+            return [holiday.to_class() for holiday in query.order_by(CompanyHolidayModel.day).all()]
+
+        except Exception as e:
+            print_exception(e)
+            return RC(E_RC.RC_ERROR_DATABASE, "DB Exception")
+
+    def get_holiday_days(self, company_id: str, first_day: date, last_day: date) -> tuple[date, ...] | RC:
+        """
+        Fetches only the days of a company's holidays in the range, as WorkCalendar takes them.
+        """
+        holidays = self.get_holidays(company_id, first_day, last_day)
+        if isinstance(holidays, RC):
+            return holidays
+
+        return tuple(holiday.day for holiday in holidays)
+
+    def get_holiday(self, company_id: str, day: date) -> CompanyHoliday | RC:
+        holiday = CompanyHolidayModel.query.get((company_id, day))
+        if holiday:
+            return holiday.to_class()
+
+        return RC(E_RC.RC_NOT_FOUND, "Holiday not found")
@@ -1,4 +1,4 @@
-from models import CompanyModel, UserModel
+from models import CompanyModel, UserModel, TimeStampModel
 from classes.dataclass.User import User
 from classes.dataclass.Company import Company
 from classes.utilities.RC import RC, E_RC
@@ -8,7 +8,13 @@ import bcrypt
 from cmn_utils import print_exception, datetime2iso, iso2datetime
 from flask_sqlalchemy import SQLAlchemy
 from classes.repositories.BaseRepository import BaseRepository
+from classes.repositories.UserRepository import USER_DICT_COLUMNS
+from classes.utilities.LoadStrategy import E_LOAD
 from classes.utilities.Permission import E_PERMISSIONS
+from classes.utilities.CompanyDirectory import company_directory
+from dataclasses import replace
+from sqlalchemy.orm import contains_eager
+from sqlalchemy import and_, create_engine, extract, func, select, tuple_
 
 
 
@@ -28,31 +34,181 @@ class CompanyRepository(BaseRepository):
         companies = CompanyModel.query.filter(CompanyModel.is_active == False).all()
         return [company.to_class() for company in companies]
     
-    def get_company_admins(self, company_id: str) -> List[User]:
+    def get_company_dicts(self, is_active: bool = None, limit: int = None, after: tuple = None) -> list[dict] | RC:
+        """
+        Projection read path of the company listings: selects only the columns
+        Company.to_dict() emits and builds the dicts straight from the rows.
+        With a limit it returns a keyset page continuing after the (company_name, company_id) after.
+
+        Returns:
+            list[dict] | RC: Company.to_dict() dicts ordered by company name, or an RC on failure.
+        """
+        try:
+            stmt = select(CompanyModel.company_id, CompanyModel.company_name, CompanyModel.is_active)
+            if is_active is not None:
+                stmt = stmt.where(CompanyModel.is_active == is_active)
+            if after:
+                stmt = stmt.where(tuple_(CompanyModel.company_name, CompanyModel.company_id) > tuple_(*after))
+
+            rows = self.db.session.execute(stmt.order_by(CompanyModel.company_name, CompanyModel.company_id).limit(limit))
+            return [Company.row_to_dict(row) for row in rows]
+
+        except Exception as e:
+            print_exception(e)
+            return RC(E_RC.RC_ERROR_DATABASE, "DB Exception")
+
+    def get_admin_dicts_by_company(self, company_ids: list[str] = None) -> dict[str, list[dict]] | RC:
+        """
+        Projection read path of the company admins: fetches the User.to_dict() dicts of the
+        active admins of every company, or of the given companies, with a single query.
+
+        Returns:
+            dict | RC: A mapping of company id to that company's admin dicts ordered by email, or an RC on failure.
+        """
+        try:
+            stmt = select(*USER_DICT_COLUMNS).where(UserModel.permission.in_([E_PERMISSIONS.employer, E_PERMISSIONS.net_admin]),
+                                                   UserModel.is_active == True)
+            if company_ids is not None:
+                stmt = stmt.where(UserModel.company_id.in_(company_ids))
+
+            rows = self.db.session.execute(stmt.order_by(UserModel.company_id, UserModel.email))
+
+            admins_by_company: dict[str, list[dict]] = {}
+            for row in rows:
+                admins_by_company.setdefault(str(row.company_id), []).append(User.row_to_dict(row))
+
+            return admins_by_company
+
+        except Exception as e:
+            print_exception(e)
+            return RC(E_RC.RC_ERROR_DATABASE, "DB Exception")
+
+    def get_company_admins(self, company_id: str, load: E_LOAD = E_LOAD.none) -> List[User]:
         if not company_id:
             return []
+
+        directory = company_directory.get(self._load_directory) if E_LOAD(load) == E_LOAD.none else None
+        if directory:
+            return [replace(admin) for admin in directory.admins_by_company.get(str(company_id), [])]
         
         admins = UserModel.query.filter(UserModel.company_id == company_id, UserModel.permission.in_([E_PERMISSIONS.employer, E_PERMISSIONS.net_admin]), 
-                        UserModel.is_active == True ).all()
+                        UserModel.is_active == True ).options(*self._load_options(load, UserModel.company)).all()
+        
+        cache = {}
+        return [admin.to_class(include_company=load != E_LOAD.none, cache=cache) for admin in admins]
+
+    def get_active_companies_admins(self, load: E_LOAD = E_LOAD.none) -> dict[str, List[User]]:
+        """
+        Fetches the active admins of every active company with a single query.
+        The companies are joined to filter on them and populate the admins for E_LOAD.joined.
+
+        Returns:
+            dict: A mapping of company id to the list of that company's admins.
+        """
+        admins = UserModel.query.join(UserModel.company)\
+            .filter(CompanyModel.is_active == True,
+                    UserModel.permission.in_([E_PERMISSIONS.employer, E_PERMISSIONS.net_admin]),
+                    UserModel.is_active == True)\
+            .options(*([contains_eager(UserModel.company)] if load == E_LOAD.joined else self._load_options(load, UserModel.company))).all()
+
+        admins_by_company: dict[str, List[User]] = {}
+        cache = {}
+        for admin in admins:
+            admins_by_company.setdefault(str(admin.company_id), []).append(admin.to_class(include_company=load != E_LOAD.none, cache=cache))
+
+        return admins_by_company
+
+    def get_active_company_ids(self) -> list[str] | RC:
+        """
+        Fetches the ids of the active companies in the order the overview lists them.
+
+        Returns:
+            list[str] | RC: Company ids ordered by company name, or an RC on failure.
+        """
+        try:
+            rows = self.db.session.execute(
+                select(CompanyModel.company_id)
+                .where(CompanyModel.is_active == True)
+                .order_by(CompanyModel.company_name, CompanyModel.company_id)
+            )
+            return [str(row.company_id) for row in rows]
+
+        except Exception as e:
+            print_exception(e)
+            return RC(E_RC.RC_ERROR_DATABASE, "DB Exception")
+
+    def get_active_companies_work_totals(self, start_date: datetime, end_date: datetime, company_ids: list[str] = None) -> list[dict] | RC:
+        """
+        Aggregates the seconds worked by every active employee of every active company
+        in the date range with a single GROUP BY statement.
+
+        Companies without active employees are returned with a single row whose email is None.
+        Worked seconds are summed per punch the same way TimeStampModel.total_work_time computes
+        them, open punches contribute nothing.
+
+        Args:
+            start_date (datetime): Start of the range (inclusive).
+            end_date (datetime): End of the range (inclusive).
+            company_ids (list[str], optional): Restricts the aggregate to these companies.
+
+        Returns:
+            list[dict] | RC: One dict per (company, employee) ordered by company, or an RC on failure.
+        """
+        try:
+            rows = self.db.session.execute(work_totals_statement(start_date, end_date, company_ids))
+            return work_totals_to_dicts(rows)
         
-        return [admin.to_class() for admin in admins]
+        except Exception as e:
+            print_exception(e)
+            return RC(E_RC.RC_ERROR_DATABASE, "DB Exception")
 
     def get_company_by_id(self, company_id: str) -> Company | RC:
+        # Copies are handed out since callers modify the companies they update
+        directory = company_directory.get(self._load_directory)
+        if directory and str(company_id) in directory.companies_by_id:
+            return replace(directory.companies_by_id[str(company_id)]).track_changes()
+
         company = CompanyModel.query.get(company_id)
         if company:
-            return company.to_class()
+            return company.to_class().track_changes()
         return RC(E_RC.RC_NOT_FOUND, f"Company {company_id} not found")
     
     def get_company_by_name(self, company_name: str) -> Company:
+        directory = company_directory.get(self._load_directory)
+        if directory and company_name in directory.company_ids_by_name:
+            return replace(directory.companies_by_id[directory.company_ids_by_name[company_name]])
+
         company: CompanyModel = CompanyModel.query.filter_by(company_name=company_name).first()
         if company:
             return company.to_class()
         return RC(E_RC.RC_NOT_FOUND, f"Company {company_name} not found")
     
-    def get_company_users(self, company_id: str) -> List[User]:
-        users: UserModel = UserModel.query.filter_by(company_id=company_id, is_active=True).all()
+    def _load_directory(self) -> tuple[list[Company], dict[str, list[User]]] | RC:
+        """
+        Loads every company and the active admins of every company for the company directory.
+        """
+        try:
+            companies = [company.to_class() for company in
+                         CompanyModel.query.order_by(CompanyModel.company_name, CompanyModel.company_id).all()]
+            admins = UserModel.query.filter(UserModel.permission.in_([E_PERMISSIONS.employer, E_PERMISSIONS.net_admin]),
+                                            UserModel.is_active == True).order_by(UserModel.email).all()
+
+            admins_by_company: dict[str, List[User]] = {}
+            for admin in admins:
+                admins_by_company.setdefault(str(admin.company_id), []).append(admin.to_class(include_company=False))
+
+            return companies, admins_by_company
+
+        except Exception as e:
+            print_exception(e)
+            return RC(E_RC.RC_ERROR_DATABASE, "DB Exception")
+
+    def get_company_users(self, company_id: str, load: E_LOAD = E_LOAD.none) -> List[User]:
+        users: UserModel = UserModel.query.filter_by(company_id=company_id, is_active=True)\
+            .options(*self._load_options(load, UserModel.company)).all()
         if users:
-            return [user.to_class() for user in users]
+            cache = {}
+            return [user.to_class(include_company=load != E_LOAD.none, cache=cache) for user in users]
         return []
     
     # def create_company(self,  new_company: Company) -> RC:
@@ -87,4 +243,65 @@ class CompanyRepository(BaseRepository):
     #     except Exception as e:
     #         print_exception(e)
     #         return RC(E_RC.RC_ERROR_DATABASE, "DB Exception")
-    
\ No newline at end of file
+    
+
+
+def work_totals_statement(start_date: datetime, end_date: datetime, company_ids: list[str] = None):
+    """
+    Builds the company overview aggregate, optionally restricted to a chunk of companies.
+    """
+    worked_seconds = func.coalesce(func.sum(func.floor(extract(
+        'epoch', TimeStampModel.punch_out_timestamp - TimeStampModel.punch_in_timestamp))), 0)
+
+    statement = select(
+            CompanyModel.company_id,
+            CompanyModel.company_name,
+            UserModel.email,
+            UserModel.salary,
+            worked_seconds.label('worked_seconds'))\
+        .select_from(CompanyModel)\
+        .outerjoin(UserModel, and_(UserModel.company_id == CompanyModel.company_id, UserModel.is_active == True))\
+        .outerjoin(TimeStampModel, and_(TimeStampModel.user_email == UserModel.email,
+                                        TimeStampModel.punch_in_timestamp >= start_date,
+                                        TimeStampModel.punch_in_timestamp <= end_date))\
+        .where(CompanyModel.is_active == True)\
+        .group_by(CompanyModel.company_id, CompanyModel.company_name, UserModel.email, UserModel.salary)\
+        .order_by(CompanyModel.company_name, CompanyModel.company_id, UserModel.email)
+
+    if company_ids is not None:
+        statement = statement.where(CompanyModel.company_id.in_(company_ids))
+
+    return statement
+
+
+def work_totals_to_dicts(rows) -> list[dict]:
+    return [{
+        'company_id': str(row.company_id),
+        'company_name': row.company_name,
+        'email': row.email,
+        'salary': float(row.salary or 0),
+        'worked_seconds': int(row.worked_seconds),
+    } for row in rows]
+
+
+_process_engines: dict = {}
+
+
+def fetch_work_totals(database_uri: str, start_date: datetime, end_date: datetime, company_ids: list[str]) -> list[dict] | RC:
+    """
+    Process pool entry point of the parallel company overview.
+
+    Runs outside the Flask app, so every worker process lazily creates and keeps its own
+    engine for the database and runs the chunk on a connection of that engine.
+    """
+    try:
+        engine = _process_engines.get(database_uri)
+        if engine is None:
+            engine = _process_engines[database_uri] = create_engine(database_uri, pool_size=1)
+
+        with engine.connect() as connection:
+            return work_totals_to_dicts(connection.execute(work_totals_statement(start_date, end_date, company_ids)))
+
+    except Exception as e:
+        print_exception(e)
+        return RC(E_RC.RC_ERROR_DATABASE, "DB Exception")
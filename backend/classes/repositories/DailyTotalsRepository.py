@@ -0,0 +1,142 @@
+from models import *
+from typing import List
+from cmn_utils import print_exception
+from classes.dataclass.DailyTotal import DailyTotal
+from classes.utilities.RC import RC, E_RC
+from classes.repositories.BaseRepository import BaseRepository
+from sqlalchemy import Date, and_, cast, delete, exists, extract, literal, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by, array_agg, insert
+
+
+class DailyTotalsRepository(BaseRepository):
+    """
+    Maintains the user_daily_totals rollup: one row per user and day, recomputed
+    from time_stamps whenever one of that day's timestamps is written.
+    """
+    def __init__(self, db: SQLAlchemy):
+        super().__init__(db)
+
+    def get_range(self, start_date: datetime, end_date: datetime, email: str = None, company_id: str = None) -> dict|RC:
+        """
+        Fetches the daily totals of a user or of a whole company, grouped by user email.
+
+        A day is included when its first punch-in falls inside the range, which is the
+        same first entry the raw timestamps give for every day but a start day whose
+        first punch precedes start_date.
+
+        Returns:
+            dict | RC: A mapping of user email to that user's DailyTotal list ordered by day, or an RC on failure.
+        """
+        try:
+            query = UserDailyTotalModel.query.filter(
+                UserDailyTotalModel.first_punch_in >= start_date,
+                UserDailyTotalModel.first_punch_in <= end_date
+            )
+            if company_id is None:
+                query = query.filter(UserDailyTotalModel.user_email == email)
+            else:
+                query = query.join(UserModel, UserDailyTotalModel.user_email == UserModel.email)\
+                    .filter(UserModel.company_id == company_id)
+
+            totals_by_user: dict[str, List[DailyTotal]] = {}
+            for total in query.order_by(UserDailyTotalModel.user_email, UserDailyTotalModel.day).all():
+                totals_by_user.setdefault(total.user_email, []).append(total.to_class())
+
+            return totals_by_user
+
+        except Exception as e:
+            print_exception(e)
+            return RC(E_RC.RC_ERROR_DATABASE, "DB Exception")
+
+    def refresh_days(self, user_email: str, punch_ins: List[datetime]) -> RC:
+        """
+        Recomputes the user's rollup rows for the days of the given punch-in times.
+
+        Refreshes of the same user are serialized with a transaction-level advisory lock, so the
+        aggregate of the later one sees every punch committed before it, and rows are upserted
+        with ON CONFLICT (user_email, day) rather than deleted and re-inserted. Only the days
+        left without any punch are deleted.
+
+        Args:
+            user_email (str): The user whose days are recomputed.
+            punch_ins (List[datetime]): Punch-in times identifying the days to recompute.
+
+        Returns:
+            RC: A result code indicating success or failure.
+        """
+        try:
+            days = [cast(literal(punch_in, DateTime(timezone=True)), Date) for punch_in in punch_ins if punch_in]
+            if not days:
+                return RC(E_RC.RC_OK, "No days to refresh")
+
+            self.db.session.execute(select(func.pg_advisory_xact_lock(func.hashtext(f'user_daily_totals:{user_email}'))))
+            self.db.session.execute(
+                delete(UserDailyTotalModel).where(
+                    UserDailyTotalModel.user_email == user_email,
+                    UserDailyTotalModel.day.in_(days),
+                    ~exists().where(TimeStampModel.user_email == UserDailyTotalModel.user_email,
+                                    cast(TimeStampModel.punch_in_timestamp, Date) == UserDailyTotalModel.day)
+                )
+            )
+            self.db.session.execute(self._rollup_insert(
+                and_(TimeStampModel.user_email == user_email, cast(TimeStampModel.punch_in_timestamp, Date).in_(days))
+            ))
+            self.db.session.commit()
+            return RC(E_RC.RC_OK, "Succefully refreshed user_daily_totals")
+
+        except Exception as e:
+            self.db.session.rollback()
+            print_exception(e)
+            return RC(E_RC.RC_ERROR_DATABASE, "DB Exception")
+
+    def backfill(self) -> RC:
+        """
+        Rebuilds the whole rollup from the existing time_stamps.
+
+        Returns:
+            RC: A result code indicating success or failure.
+        """
+        try:
+            self.db.session.execute(delete(UserDailyTotalModel))
+            self.db.session.execute(self._rollup_insert(TimeStampModel.punch_in_timestamp.isnot(None)))
+            self.db.session.commit()
+            return RC(E_RC.RC_OK, "Succefully backfilled user_daily_totals")
+
+        except Exception as e:
+            self.db.session.rollback()
+            print_exception(e)
+            return RC(E_RC.RC_ERROR_DATABASE, "DB Exception")
+
+    def _rollup_insert(self, where_clause):
+        """
+        Builds an INSERT ... SELECT that aggregates the matching timestamps into one row per user and day,
+        replacing the rows of the days that already have one.
+        """
+        day = cast(TimeStampModel.punch_in_timestamp, Date)
+        seconds = func.floor(extract('epoch', TimeStampModel.punch_out_timestamp - TimeStampModel.punch_in_timestamp))
+        first_order = (TimeStampModel.punch_in_timestamp, TimeStampModel.uuid)
+
+        rollup = select(
+            TimeStampModel.user_email,
+            day,
+            func.coalesce(func.sum(seconds).filter(TimeStampModel.reporting_type == 'work'), 0),
+            func.coalesce(array_agg(aggregate_order_by(seconds, *first_order))[1], 0),
+            array_agg(aggregate_order_by(TimeStampModel.reporting_type, *first_order))[1],
+            func.count(),
+            func.min(TimeStampModel.punch_in_timestamp)
+        ).where(where_clause).group_by(TimeStampModel.user_email, day)
+
+        statement = insert(UserDailyTotalModel).from_select([
+            UserDailyTotalModel.user_email,
+            UserDailyTotalModel.day,
+            UserDailyTotalModel.worked_seconds,
+            UserDailyTotalModel.first_entry_seconds,
+            UserDailyTotalModel.reporting_type,
+            UserDailyTotalModel.entry_count,
+            UserDailyTotalModel.first_punch_in
+        ], rollup)
+        return statement.on_conflict_do_update(
+            index_elements=[UserDailyTotalModel.user_email, UserDailyTotalModel.day],
+            set_={column: statement.excluded[column] for column in
+                  ('worked_seconds', 'first_entry_seconds', 'reporting_type', 'entry_count', 'first_punch_in')}
+        )
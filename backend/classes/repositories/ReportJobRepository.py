@@ -0,0 +1,136 @@
+from models import *
+from cmn_utils import print_exception
+from classes.dataclass.ReportJob import ReportJob, JOB_PENDING, JOB_RUNNING, JOB_CANCELLED, JOB_FAILED, ACTIVE_STATUSES, FINISHED_STATUSES
+from classes.utilities.RC import RC, E_RC
+from classes.repositories.BaseRepository import BaseRepository
+from sqlalchemy import and_, case, delete, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+
+class ReportJobRepository(BaseRepository):
+    """
+    Stores the background report jobs in report_jobs, so the worker running a job and
+    the workers answering its polls share its state and result.
+    """
+    def __init__(self, db: SQLAlchemy):
+        super().__init__(db)
+
+    def create_job(self, job: ReportJob) -> ReportJob | RC:
+        """
+        Inserts a pending job, unless the same caller already has an identical pending or running one.
+
+        Returns:
+            ReportJob | RC: The new job, the active job sharing its dedup_key, or an RC on failure.
+        """
+        try:
+            self.db.session.add(job.to_model())
+            self.db.session.commit()
+            return job
+
+        except IntegrityError:
+            # Another request, possibly on another worker, submitted the same job first
+            self.db.session.rollback()
+            active: ReportJob = self.get_active_job(job.dedup_key)
+            return active if active else RC(E_RC.RC_CONFLICT, "Report job could not be created, please retry")
+
+        except Exception as e:
+            self.db.session.rollback()
+            print_exception(e)
+            return RC(E_RC.RC_ERROR_DATABASE, "DB Exception")
+
+    def get_job(self, job_id: str) -> ReportJob | None | RC:
+        try:
+            job: ReportJobModel = self.db.session.get(ReportJobModel, job_id, populate_existing=True)
+            return job.to_class() if job else None
+
+        except Exception as e:
+            print_exception(e)
+            return RC(E_RC.RC_ERROR_DATABASE, "DB Exception")
+
+    def get_active_job(self, dedup_key: str) -> ReportJob | None:
+        job: ReportJobModel = self.db.session.execute(
+            select(ReportJobModel).where(ReportJobModel.dedup_key == dedup_key, ReportJobModel.status.in_(ACTIVE_STATUSES))
+        ).scalar_one_or_none()
+        return job.to_class() if job else None
+
+    def start_job(self, job_id: str, started_at: datetime) -> bool:
+        """
+        Moves a pending job to running. False when it was cancelled or lost meanwhile.
+        """
+        return self._set_status(job_id, (JOB_PENDING,), status=JOB_RUNNING, started_at=started_at)
+
+    def finish_job(self, job_id: str, status: str, finished_at: datetime, result: str = None, error: RC = None) -> bool:
+        """
+        Stores the outcome of a running job, which ends cancelled instead when a cancel was requested meanwhile.
+        False when the job is no longer running.
+        """
+        return self._set_status(job_id, (JOB_RUNNING,), status=case((ReportJobModel.cancel_requested, JOB_CANCELLED), else_=status),
+                                finished_at=finished_at, result=result,
+                                error=error.description if error else None, error_code=error.code if error else None)
+
+    def cancel_job(self, job_id: str, finished_at: datetime) -> RC:
+        """
+        Cancels a pending job right away, and flags a running one so its result is discarded when it completes.
+        """
+        try:
+            self.db.session.execute(
+                update(ReportJobModel).where(ReportJobModel.job_id == job_id, ReportJobModel.status.in_(ACTIVE_STATUSES))
+                .values(cancel_requested=True)
+            )
+            self.db.session.execute(
+                update(ReportJobModel).where(ReportJobModel.job_id == job_id, ReportJobModel.status == JOB_PENDING)
+                .values(status=JOB_CANCELLED, finished_at=finished_at)
+            )
+            self.db.session.commit()
+            return RC(E_RC.RC_OK, "Report job cancelled")
+
+        except Exception as e:
+            self.db.session.rollback()
+            print_exception(e)
+            return RC(E_RC.RC_ERROR_DATABASE, "DB Exception")
+
+    def prune(self, now: datetime, expire_before: datetime, running_lost_before: datetime, pending_lost_before: datetime,
+              max_retained: int) -> RC:
+        """
+        Fails the lost jobs, whose worker was most likely restarted: the running jobs started before
+        running_lost_before and the pending ones created before pending_lost_before, since a pending job
+        may wait for a free thread well past the running timeout. Then deletes the finished jobs that
+        finished before expire_before and the oldest ones beyond max_retained.
+        """
+        try:
+            self.db.session.execute(
+                update(ReportJobModel).where(or_(
+                    and_(ReportJobModel.status == JOB_RUNNING, ReportJobModel.started_at < running_lost_before),
+                    and_(ReportJobModel.status == JOB_PENDING, ReportJobModel.created_at < pending_lost_before)
+                ))
+                .values(status=JOB_FAILED, finished_at=now, error="Report job was lost, please submit it again",
+                        error_code=E_RC.RC_ERROR_DATABASE)
+            )
+            self.db.session.execute(
+                delete(ReportJobModel).where(ReportJobModel.status.in_(FINISHED_STATUSES), ReportJobModel.finished_at < expire_before)
+            )
+            retained = select(ReportJobModel.job_id).where(ReportJobModel.status.in_(FINISHED_STATUSES))\
+                .order_by(ReportJobModel.finished_at.desc()).limit(max_retained)
+            self.db.session.execute(
+                delete(ReportJobModel).where(ReportJobModel.status.in_(FINISHED_STATUSES), ReportJobModel.job_id.not_in(retained))
+            )
+            self.db.session.commit()
+            return RC(E_RC.RC_OK, "Report jobs pruned")
+
+        except Exception as e:
+            self.db.session.rollback()
+            print_exception(e)
+            return RC(E_RC.RC_ERROR_DATABASE, "DB Exception")
+
+    def _set_status(self, job_id: str, from_statuses: tuple, **values) -> bool:
+        try:
+            updated = self.db.session.execute(
+                update(ReportJobModel).where(ReportJobModel.job_id == job_id, ReportJobModel.status.in_(from_statuses)).values(**values)
+            ).rowcount
+            self.db.session.commit()
+            return updated == 1
+
+        except Exception as e:
+            self.db.session.rollback()
+            print_exception(e)
+            return False
@@ -1,23 +1,34 @@
 from models import *
-from typing import List
+from typing import Iterator, List
 from cmn_utils import print_exception, datetime2iso, iso2datetime
 from classes.dataclass.TimeStamp import TimeStamp
 from classes.utilities.RC import RC, E_RC
 from classes.repositories.BaseRepository import BaseRepository
+from classes.utilities.LoadStrategy import E_LOAD
+from classes.utilities.Authorization import AccessScope
+from sqlalchemy.orm import contains_eager, joinedload
+from sqlalchemy import select, tuple_, update
+from typing import Callable
+
+# The time_stamps columns TimeStamp.to_dict() is built from
+TIMESTAMP_COLUMNS = (TimeStampModel.uuid, TimeStampModel.user_email, TimeStampModel.entered_by, TimeStampModel.punch_type,
+                     TimeStampModel.punch_in_timestamp, TimeStampModel.punch_out_timestamp, TimeStampModel.reporting_type,
+                     TimeStampModel.detail, TimeStampModel.last_update)
 
 
 class TimeStampRepository(BaseRepository):
     def __init__(self, db: SQLAlchemy):
         super().__init__(db)
 
-    def get_all_timestamps(self) -> List[TimeStamp]:
-        timestamps = TimeStampModel.query.all()
-        return [timestamp.to_class() for timestamp in timestamps]
+    def get_all_timestamps(self, load: E_LOAD = E_LOAD.none) -> List[TimeStamp]:
+        timestamps = TimeStampModel.query.options(*self._user_options(load)).all()
+        cache = {}
+        return [timestamp.to_class(include_user=load != E_LOAD.none, cache=cache) for timestamp in timestamps]
 
-    def get_timestamp_by_uuid(self, uuid: str) -> TimeStamp|RC:
-        timestamp = TimeStampModel.query.get(uuid)
+    def get_timestamp_by_uuid(self, uuid: str, load: E_LOAD = E_LOAD.joined) -> TimeStamp|RC:
+        timestamp = TimeStampModel.query.options(*self._user_options(load)).get(uuid)
         if timestamp:
-            return timestamp.to_class()
+            return timestamp.to_class(include_user=load != E_LOAD.none).track_changes()
         return RC(E_RC.RC_NOT_FOUND, "Time stamp not found")
     
     # def create_timestamp(self, new_timestamp: TimeStamp) -> RC:
@@ -78,10 +89,10 @@ class TimeStampRepository(BaseRepository):
     #         print_exception(e)
     #         return RC(E_RC.RC_ERROR_DATABASE, "DB Exception")
         
-    def check_punch_in_status(self, email, start_of_day, end_of_day) -> bool|RC|None:
+    def check_punch_in_status(self, email, start_of_day, end_of_day, load: E_LOAD = E_LOAD.none) -> bool|RC|None:
         try:
             
-            timestamp: TimeStampModel = TimeStampModel.query.filter(
+            timestamp: TimeStampModel = TimeStampModel.query.options(*self._user_options(load)).filter(
                 TimeStampModel.user_email == email,
                 TimeStampModel.punch_in_timestamp >= start_of_day,
                 TimeStampModel.punch_in_timestamp <= end_of_day,
@@ -89,7 +100,7 @@ class TimeStampRepository(BaseRepository):
             ).order_by(TimeStampModel.punch_in_timestamp.desc()).first()
 
             if timestamp:
-                return timestamp.to_class()
+                return timestamp.to_class(include_user=load != E_LOAD.none)
             else:
                 return None
                 
@@ -97,22 +108,225 @@ class TimeStampRepository(BaseRepository):
             print_exception(e)
             return RC(E_RC.RC_ERROR_DATABASE, "DB Exception")
         
-    def get_range(self, start_date: datetime, end_date: datetime, email: str = None, company_id: str = None) -> list|RC:
+    def get_open_punches(self, since: datetime) -> list[dict]|RC:
+        """
+        The punches still open that started at or after since, with the company of their user.
+        """
+        try:
+            rows = self.db.session.execute(
+                select(TimeStampModel.uuid, TimeStampModel.user_email, TimeStampModel.punch_in_timestamp, UserModel.company_id)
+                .join(UserModel, TimeStampModel.user_email == UserModel.email)
+                .filter(TimeStampModel.punch_out_timestamp == None, TimeStampModel.punch_in_timestamp >= since)
+            ).all()
+            return [{'uuid': str(row.uuid), 'user_email': row.user_email, 'punch_in_timestamp': row.punch_in_timestamp,
+                     'company_id': str(row.company_id)} for row in rows]
+
+        except Exception as e:
+            print_exception(e)
+            return RC(E_RC.RC_ERROR_DATABASE, "DB Exception")
+
+    def punch_out_latest(self, email: str, start_of_day: datetime, end_of_day: datetime, punch_out_timestamp: datetime,
+                         reporting_type: str, detail: str, validate: Callable[[TimeStamp], RC],
+                         scope: AccessScope = None) -> TimeStamp|RC|None:
+        """
+        Closes the user's latest open punch of the day with a single
+        UPDATE ... WHERE uuid = (SELECT ... FOR UPDATE) RETURNING.
+
+        A request racing another one closing the same punch waits for it to commit, then finds the
+        punch no longer open, so a double-click closes one punch and the second request finds none
+        rather than closing an older open punch. The returned punch is checked with
+        validate before committing, and the update is rolled back when it fails.
+        Only the punches of the users within scope are considered.
+
+        Returns:
+            TimeStamp|RC|None: The closed punch, the failed validation or DB RC, or None when no punch is open.
+        """
+        try:
+            open_punch = select(TimeStampModel.uuid).filter(
+                TimeStampModel.user_email == email,
+                TimeStampModel.punch_in_timestamp >= start_of_day,
+                TimeStampModel.punch_in_timestamp <= end_of_day,
+                TimeStampModel.punch_out_timestamp == None,
+                *self._scope_filter(scope, TimeStampModel.user_email)
+            ).order_by(TimeStampModel.punch_in_timestamp.desc()).limit(1).with_for_update().scalar_subquery()
+
+            statement = update(TimeStampModel.__table__)\
+                .where(TimeStampModel.uuid == open_punch, TimeStampModel.punch_out_timestamp == None)\
+                .values(punch_out_timestamp=punch_out_timestamp, reporting_type=reporting_type, detail=detail)\
+                .returning(*TimeStampModel.__table__.columns)
+            row = self.db.session.execute(statement).first()
+            if row is None:
+                self.db.session.rollback()
+                return None
+
+            timestamp: TimeStamp = TimeStampModel(**row._mapping).to_class(include_user=False)
+            rc: RC = validate(timestamp)
+            if not rc.is_ok():
+                self.db.session.rollback()
+                return rc
+
+            self.db.session.commit()
+            return timestamp
+
+        except Exception as e:
+            self.db.session.rollback()
+            print_exception(e)
+            return RC(E_RC.RC_ERROR_DATABASE, "DB Exception")
+        
+    def get_range(self, start_date: datetime, end_date: datetime, email: str = None, company_id: str = None,
+                  load: E_LOAD = E_LOAD.none) -> list|RC:
         try:
             
             if company_id is None:
-                timestamps: TimeStampModel= TimeStampModel.query.filter(
+                timestamps: TimeStampModel= TimeStampModel.query.options(*self._user_options(load)).filter(
                     TimeStampModel.user_email == email,
                     TimeStampModel.punch_in_timestamp >= start_date,
                     TimeStampModel.punch_in_timestamp <= end_date
-                ).all()
+                ).order_by(TimeStampModel.punch_in_timestamp, TimeStampModel.uuid).all()
             elif company_id is not None:
-                timestamps: TimeStampModel= TimeStampModel.query.filter(TimeStampModel.punch_in_timestamp >= start_date,
+                timestamps: TimeStampModel= TimeStampModel.query.options(*self._user_options(load)).filter(TimeStampModel.punch_in_timestamp >= start_date,
                             TimeStampModel.punch_in_timestamp <= end_date).join(UserModel, TimeStampModel.user_email == UserModel.email)\
-                            .filter(UserModel.company_id == company_id).all()
+                            .filter(UserModel.company_id == company_id)\
+                            .order_by(TimeStampModel.punch_in_timestamp, TimeStampModel.uuid).all()
                 
-            return [timestamp.to_class() for timestamp in timestamps]
+            cache = {}
+            return [timestamp.to_class(include_user=load != E_LOAD.none, cache=cache) for timestamp in timestamps]
+                
+        except Exception as e:
+            print_exception(e)
+            return RC(E_RC.RC_ERROR_DATABASE, "DB Exception")
+        
+    def get_range_dicts(self, start_date: datetime, end_date: datetime, email: str) -> list[dict] | RC:
+        """
+        Projection read path of get_range: selects only the time_stamps columns and
+        builds the TimeStamp.to_dict() dicts straight from the rows.
+
+        Returns:
+            list[dict] | RC: The user's timestamp dicts ordered by punch-in time, or an RC on failure.
+        """
+        try:
+            rows = self.db.session.execute(
+                select(*TIMESTAMP_COLUMNS).where(
+                    TimeStampModel.user_email == email,
+                    TimeStampModel.punch_in_timestamp >= start_date,
+                    TimeStampModel.punch_in_timestamp <= end_date
+                ).order_by(TimeStampModel.punch_in_timestamp, TimeStampModel.uuid)
+            )
+            return [TimeStamp.row_to_dict(row) for row in rows]
+
+        except Exception as e:
+            print_exception(e)
+            return RC(E_RC.RC_ERROR_DATABASE, "DB Exception")
+        
+    def get_page_dicts(self, limit: int, after: tuple = None, email: str = None, company_id: str = None,
+                       start_date: datetime = None, end_date: datetime = None) -> list[dict] | RC:
+        """
+        Keyset page of the time_stamps table ordered by (punch_in_timestamp, uuid), so a page
+        costs the same however deep into the table it is.
+
+        Args:
+            limit (int): The number of rows to return.
+            after (tuple, optional): The (punch_in_timestamp, uuid) of the last row of the previous page.
+            email (str, optional): Restricts the page to one user.
+            company_id (str, optional): Restricts the page to the users of one company.
+            start_date (datetime, optional): Earliest punch-in time (inclusive).
+            end_date (datetime, optional): Latest punch-in time (inclusive).
+
+        Returns:
+            list[dict] | RC: TimeStamp.to_dict() dicts, or an RC on failure.
+        """
+        try:
+            stmt = select(*TIMESTAMP_COLUMNS)
+            if email:
+                stmt = stmt.where(TimeStampModel.user_email == email)
+            if company_id:
+                stmt = stmt.join(UserModel, TimeStampModel.user_email == UserModel.email).where(UserModel.company_id == company_id)
+            if start_date:
+                stmt = stmt.where(TimeStampModel.punch_in_timestamp >= start_date)
+            if end_date:
+                stmt = stmt.where(TimeStampModel.punch_in_timestamp <= end_date)
+            if after:
+                stmt = stmt.where(tuple_(TimeStampModel.punch_in_timestamp, TimeStampModel.uuid) > tuple_(*after))
+
+            rows = self.db.session.execute(stmt.order_by(TimeStampModel.punch_in_timestamp, TimeStampModel.uuid).limit(limit))
+            return [TimeStamp.row_to_dict(row) for row in rows]
+
+        except Exception as e:
+            print_exception(e)
+            return RC(E_RC.RC_ERROR_DATABASE, "DB Exception")
+
+    def get_company_range_by_user(self, start_date: datetime, end_date: datetime, company_id: str, load: E_LOAD = E_LOAD.none) -> dict|RC:
+        """
+        Fetches all of a company's timestamps in the date range with a single query
+        and groups them by user email.
+
+        Args:
+            start_date (datetime): Start of the range (inclusive).
+            end_date (datetime): End of the range (inclusive).
+            company_id (str): The company whose users' timestamps are fetched.
+            load (E_LOAD): How the timestamps' users are loaded. The join used to filter on the
+                company populates them for E_LOAD.joined.
+
+        Returns:
+            dict | RC: A mapping of user email to that user's list of TimeStamp objects, or an RC on failure.
+        """
+        try:
+            options = [contains_eager(TimeStampModel.user).joinedload(UserModel.company)] if load == E_LOAD.joined \
+                else self._user_options(load)
+            timestamps: list[TimeStampModel] = TimeStampModel.query\
+                .join(TimeStampModel.user)\
+                .filter(UserModel.company_id == company_id,
+                        TimeStampModel.punch_in_timestamp >= start_date,
+                        TimeStampModel.punch_in_timestamp <= end_date)\
+                .options(*options)\
+                .order_by(TimeStampModel.punch_in_timestamp, TimeStampModel.uuid)\
+                .all()
+
+            timestamps_by_user: dict[str, list[TimeStamp]] = {}
+            cache = {}
+            for timestamp in timestamps:
+                timestamps_by_user.setdefault(timestamp.user_email, []).append(timestamp.to_class(include_user=load != E_LOAD.none, cache=cache))
+
+            return timestamps_by_user
                 
         except Exception as e:
             print_exception(e)
-            return RC(E_RC.RC_ERROR_DATABASE, "DB Exception")
\ No newline at end of file
+            return RC(E_RC.RC_ERROR_DATABASE, "DB Exception")
+
+    def iter_range(self, start_date: datetime, end_date: datetime, email: str = None, company_id: str = None, batch_size: int = 1000) -> Iterator:
+        """
+        Streams the timestamp rows of a user, or of a whole company, through a server-side cursor.
+
+        Only the time_stamps columns are selected and rows are fetched batch_size at a time,
+        so memory stays flat whatever the range size. Company rows are ordered by user email
+        in byte order (COLLATE "C"), which is the order of Python's str comparison callers merge
+        them with, and every user's rows by punch-in time.
+
+        Yields:
+            Row: One time_stamps row at a time.
+
+        Raises:
+            Exception: The database error, once logged, so that a stream failing midway is not mistaken for a complete one.
+        """
+        try:
+            stmt = select(*TIMESTAMP_COLUMNS).where(
+                TimeStampModel.punch_in_timestamp >= start_date,
+                TimeStampModel.punch_in_timestamp <= end_date
+            )
+            if company_id is None:
+                stmt = stmt.where(TimeStampModel.user_email == email)
+            else:
+                stmt = stmt.join(UserModel, TimeStampModel.user_email == UserModel.email)\
+                    .where(UserModel.company_id == company_id)
+
+            stmt = stmt.order_by(TimeStampModel.user_email.collate('C'), TimeStampModel.punch_in_timestamp, TimeStampModel.uuid)
+            for row in self.db.session.execute(stmt, execution_options={'yield_per': batch_size}):
+                yield row
+
+        except Exception as e:
+            # Re-raised so a streamed export is aborted instead of ending early with a success status
+            print_exception(e)
+            raise
+
+    def _user_options(self, load: E_LOAD) -> list:
+        return self._load_options(load, TimeStampModel.user, UserModel.company)
@@ -4,72 +4,113 @@ from typing import List
 from cmn_utils import print_exception, datetime2iso, iso2datetime
 from classes.utilities.RC import RC, E_RC
 from classes.repositories.BaseRepository import BaseRepository
+from classes.utilities.LoadStrategy import E_LOAD
+from classes.utilities.UserCache import user_cache, COMPANY_ID, MISSING
+from dataclasses import replace
+from sqlalchemy import select
+
+# The users columns User.to_dict() emits
+USER_DICT_COLUMNS = (UserModel.email, UserModel.first_name, UserModel.last_name, UserModel.mobile_phone, UserModel.company_id,
+                     UserModel.role, UserModel.permission, UserModel.is_active, UserModel.salary, UserModel.work_capacity,
+                     UserModel.employment_start, UserModel.employment_end, UserModel.weekend_choice)
 
 
 class UserRepository(BaseRepository):
     def __init__(self, db: SQLAlchemy):
         super().__init__(db)
 
-    def get_active_users(self, company_id: str = None) -> List[User]:
-        if not company_id:
-            active_users: list[User] = (
-                self.db.session.query(UserModel)
-                .filter(UserModel.is_active == True)
-                .all()
-            )
-        else:
-            active_users: list[User] = (
-                self.db.session.query(UserModel, CompanyModel)
-                .filter(
-                    UserModel.is_active == True,  # Filter for active users
-                    CompanyModel.company_id == company_id  # Filter by the employer's company_id
-                )
-                .all()
-            )
-         
-        return [user.to_class() for user in active_users]
+    def get_active_users(self, company_id: str = None, load: E_LOAD = E_LOAD.none) -> List[User]:
+        return self._get_users(company_id, True, load)
     
-    def get_inactive_users(self, company_id: str = None) -> List[User]:
-        if not company_id:
-            active_users: list[User] = (
-                self.db.session.query(UserModel)
-                .filter(UserModel.is_active == False)
-                .all()
-            )
-        else:
-            active_users: list[User] = (
-                self.db.session.query(UserModel, CompanyModel)
-                .filter(
-                    UserModel.is_active == False,  # Filter for active users
-                    CompanyModel.company_id == company_id  # Filter by the employer's company_id
-                )
-                .all()
-            )
-         
-        return [user.to_class() for user in active_users]
+    def get_inactive_users(self, company_id: str = None, load: E_LOAD = E_LOAD.none) -> List[User]:
+        return self._get_users(company_id, False, load)
     
-    def get_users(self, company_id: str = None) -> List[User]:
-        if not company_id:
-            active_users: list[User] = (
-                self.db.session.query(UserModel)
-                .all()
-            )
-        else:
-            active_users: list[User] = (
-                self.db.session.query(UserModel, CompanyModel)
-                .filter(
-                    CompanyModel.company_id == company_id  # Filter by the employer's company_id
-                )
-                .all()
-            )
-         
-        return [user.to_class() for user in active_users]
-
-    def get_user_by_email(self, email: str) -> User | RC:
-        user: UserModel = UserModel.query.get(email)
-        if user:
-            return user.to_class()
-        return RC(E_RC.RC_NOT_FOUND, f"User not found for id: {email}'")
+    def get_users(self, company_id: str = None, load: E_LOAD = E_LOAD.none) -> List[User]:
+        return self._get_users(company_id, None, load)
+
+    def _get_users(self, company_id: str, is_active: bool, load: E_LOAD) -> List[User]:
+        """
+        Fetches the users of a company, or of every company, filtered by activity in SQL with a
+        single query. The companies are loaded by the same round trip unless load is E_LOAD.none.
+        """
+        query = self.db.session.query(UserModel).options(*self._load_options(load, UserModel.company))
+        if company_id:
+            query = query.filter(UserModel.company_id == company_id)
+        if is_active is not None:
+            query = query.filter(UserModel.is_active == is_active)
+
+        cache = {}
+        return [user.to_class(include_company=load != E_LOAD.none, cache=cache) for user in query.order_by(UserModel.email).all()]
+
+    def get_user_dicts(self, company_id: str = None, is_active: bool = None, limit: int = None, after: tuple = None) -> list[dict] | RC:
+        """
+        Projection read path of the user listings: selects only the columns User.to_dict()
+        emits plus the company name, and builds the dicts straight from the rows.
+
+        Args:
+            company_id (str, optional): Restricts the listing to one company.
+            is_active (bool, optional): Restricts the listing to active or inactive users.
+            limit (int, optional): Returns a keyset page of at most limit users.
+            after (tuple, optional): The (email,) of the last user of the previous page.
+
+        Returns:
+            list[dict] | RC: User.to_dict() dicts with a 'company_name' key ordered by email, or an RC on failure.
+        """
+        try:
+            stmt = select(*USER_DICT_COLUMNS, CompanyModel.company_name)\
+                .outerjoin(CompanyModel, UserModel.company_id == CompanyModel.company_id)
+            if company_id:
+                stmt = stmt.where(UserModel.company_id == company_id)
+            if is_active is not None:
+                stmt = stmt.where(UserModel.is_active == is_active)
+            if after:
+                stmt = stmt.where(UserModel.email > after[0])
+
+            rows = self.db.session.execute(stmt.order_by(UserModel.email).limit(limit))
+            return [dict(User.row_to_dict(row), company_name=row.company_name) for row in rows]
+
+        except Exception as e:
+            print_exception(e)
+            return RC(E_RC.RC_ERROR_DATABASE, "DB Exception")
+
+    def get_user_by_email(self, email: str, load: E_LOAD = E_LOAD.joined) -> User | RC:
+        """
+        Fetches a user through the request and worker tiers of user_cache, so the repeated
+        lookups of a request and the authorization checks of back to back requests skip the database.
+        Returns a tracked copy the caller may modify.
+        """
+        include_company = load != E_LOAD.none
+        cached: User = user_cache.get(email, include_company)
+        if cached is MISSING:
+            generation = user_cache.generation()
+            user: UserModel = UserModel.query.options(*self._load_options(load, UserModel.company)).get(email)
+            if not user:
+                return RC(E_RC.RC_NOT_FOUND, f"User not found for id: {email}'")
+            cached = user.to_class(include_company=include_company)
+            user_cache.put(email, include_company, cached, generation)
+
+        return replace(cached).track_changes()
+
+    def get_user_company_id(self, email: str) -> str | RC:
+        """
+        Fetches only the company id of a user for the authorization checks, through the
+        email to company map of user_cache. The id is a string like User.company_id.
+        """
+        company_id: str = user_cache.get(email, COMPANY_ID)
+        if company_id is MISSING:
+            generation = user_cache.generation()
+            try:
+                row = self.db.session.execute(select(UserModel.company_id).where(UserModel.email == email)).first()
+            except Exception as e:
+                print_exception(e)
+                return RC(E_RC.RC_ERROR_DATABASE, "DB Exception")
+
+            if row is None:
+                return RC(E_RC.RC_NOT_FOUND, f"User not found for id: {email}'")
+            company_id = str(row.company_id)
+            user_cache.put(email, COMPANY_ID, company_id, generation)
+
+        return company_id
     
     # def create_user(self, new_user: User) -> RC:
         
@@ -1,12 +1,13 @@
 from flask_jwt_extended import create_access_token, create_refresh_token
 from models import User
 from classes.utilities.RC import RC, E_RC
+from classes.utilities.PasswordHasher import password_hasher
+from classes.utilities.UserCache import user_cache
 from classes.repositories.UserRepository import UserRepository
 from classes.validators.ModelValidator import ModelValidator
 from classes.services.BaseServiceClass import BaseService
 from classes.factories.DomainClassFactory import DomainClassFactory
 from cmn_utils import *
-import bcrypt
 
 
 class AuthService(BaseService):
@@ -24,9 +25,16 @@ class AuthService(BaseService):
             if not user.pass_hash:
                 return RC(E_RC.RC_INVALID_INPUT, 'Password not set for this user')
 
-            if not bcrypt.checkpw(password.encode('utf-8'), user.pass_hash.encode('utf-8')):
+            verified: bool | RC = password_hasher.verify(password, user.pass_hash)
+            if isinstance(verified, RC):
+                return verified
+            if not verified:
                 return RC(E_RC.RC_INVALID_INPUT, 'Invalid credentials')
 
+            # A failed rehash does not fail the login, the old hash stays valid and is retried on the next one
+            if password_hasher.needs_rehash(user.pass_hash):
+                self._rehash(user, password)
+
             additional_claims = {
                 'permission': user.permission,
                 'company_id': user.company_id
@@ -71,4 +79,19 @@ class AuthService(BaseService):
 
         except Exception as e:
             print_exception(e)
-            return RC(E_RC.RC_ERROR_DATABASE, 'Server error')
\ No newline at end of file
+            return RC(E_RC.RC_ERROR_DATABASE, 'Server error')
+
+    def _rehash(self, user: User, password: str) -> RC:
+        """
+        Rehashes the password of a user whose hash has another cost factor than BCRYPT_ROUNDS,
+        now that the plain password is known. A failure only leaves the old hash in place.
+        """
+        pass_hash: str | RC = password_hasher.hash(password)
+        if isinstance(pass_hash, RC):
+            return pass_hash
+
+        user.pass_hash = pass_hash
+        rc: RC = self._update(self.user_repository, user)
+        if rc.is_ok():
+            user_cache.invalidate(user.email)
+        return rc
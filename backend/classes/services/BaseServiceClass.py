@@ -3,6 +3,7 @@ from classes.dataclass.BaseDomainClass import BaseDomainClass
 from classes.repositories.BaseRepository import BaseRepository
 from classes.validators.BaseValidator import ValidatorInterface
 from classes.factories.DomainClassFactory import DomainClassFactory
+from classes.utilities.RC import RC
 
 class BaseService(ABC):
     """
@@ -35,5 +36,44 @@ class BaseService(ABC):
         
         return repository.delete(obj)
 
-        
+    def _save_many(self, repository: BaseRepository, objs: list[BaseDomainClass], atomic: bool = False) -> dict | RC:
+        return self._write_many(repository.save_many, objs, atomic)
+
+    def _update_many(self, repository: BaseRepository, objs: list[BaseDomainClass], atomic: bool = False) -> dict | RC:
+        return self._write_many(repository.update_many, objs, atomic)
+
+    def _delete_many(self, repository: BaseRepository, objs: list[BaseDomainClass], atomic: bool = False) -> dict | RC:
+        return self._write_many(repository.delete_many, objs, atomic)
+
+    def _write_many(self, write_many, objs: list[BaseDomainClass], atomic: bool) -> dict | RC:
+        """
+        Validates every object, then writes the valid ones in a single bulk statement.
+        Only the rows are written: service hooks of the single writes are not run, so timestamps
+        are written through TimeStampService._save_timestamps and its siblings instead.
+
+        Args:
+            write_many: The repository bulk method to call.
+            objs (list[BaseDomainClass]): The objects to write.
+            atomic (bool): When True, nothing is written if any object fails validation.
+
+        Returns:
+            dict | RC: {'written': count, 'failed': [{'index': i, 'error': description}, ...]},
+                or the RC of the failed bulk write.
+        """
+        valid_objs = []
+        failed = []
+        for index, obj in enumerate(objs):
+            validation_result = self.validator.validate(obj)
+            if validation_result.is_ok():
+                valid_objs.append(obj)
+            else:
+                failed.append({'index': index, 'error': validation_result.description})
+
+        if not valid_objs or (atomic and failed):
+            return {'written': 0, 'failed': failed}
+
+        rc: RC = write_many(valid_objs)
+        if not rc.is_ok():
+            return rc
 
+        return {'written': len(valid_objs), 'failed': failed}
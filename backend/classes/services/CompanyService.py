@@ -1,17 +1,27 @@
 from classes.dataclass.Company import Company
 from classes.utilities.RC import RC
+from classes.utilities.ReportCache import report_cache
+from classes.utilities.CompanyDirectory import company_directory
+from classes.utilities.UserCache import user_cache
+from classes.utilities.Pagination import parse_page, page_result
 from cmn_utils import *
 from flask_sqlalchemy import SQLAlchemy
 from classes.repositories.CompanyRepository import CompanyRepository
+from classes.repositories.CompanyHolidayRepository import CompanyHolidayRepository
+from classes.dataclass.CompanyHoliday import CompanyHoliday
+from datetime import date
+from uuid import UUID
 from classes.utilities.Permission import Permission
 from classes.services.BaseServiceClass import BaseService
 from classes.validators.ModelValidator import ModelValidator
 from classes.factories.DomainClassFactory import DomainClassFactory
 
 class CompanyService(BaseService):
-    def __init__(self, company_repository: CompanyRepository, validator: ModelValidator, factory: DomainClassFactory):
+    def __init__(self, company_repository: CompanyRepository, company_holiday_repository: CompanyHolidayRepository,
+                 validator: ModelValidator, factory: DomainClassFactory):
         super().__init__(validator, factory)
         self.company_repository = company_repository
+        self.company_holiday_repository = company_holiday_repository
 
     def create_company(self, company_name: str, user_permission: int) -> RC:
         perm: Permission = Permission(user_permission)
@@ -38,7 +48,10 @@ class CompanyService(BaseService):
         if isinstance(new_company, RC):
             return new_company
         
-        return self._save(self.company_repository, new_company)
+        rc: RC = self._save(self.company_repository, new_company)
+        if rc.is_ok():
+            company_directory.invalidate()
+        return rc
 
     def update_company(self, company_id: str, company_name: str, user_permission: int) -> RC:
         perm: Permission = Permission(user_permission)
@@ -57,7 +70,13 @@ class CompanyService(BaseService):
 
         company.company_name = company_name
         
-        return self._update(self.company_repository, company)  
+        rc: RC = self._update(self.company_repository, company)
+        if rc.is_ok():
+            report_cache.invalidate_company(company.company_id)
+            company_directory.invalidate()
+            # The cached users carry their company
+            user_cache.clear()
+        return rc
 
     def delete_company(self, company_id: str, user_permission: int) -> RC:
         
@@ -75,9 +94,15 @@ class CompanyService(BaseService):
 
         company.is_active = False
         
-        return self._update(self.company_repository, company)
+        rc: RC = self._update(self.company_repository, company)
+        if rc.is_ok():
+            report_cache.invalidate_company(company.company_id)
+            company_directory.invalidate()
+            # The cached users carry their company
+            user_cache.clear()
+        return rc
 
-    def get_active_companies(self, user_permission: int) -> list:
+    def get_active_companies(self, user_permission: int, limit: str = None, cursor: str = None) -> list | dict:
         
         perm: Permission = Permission(user_permission)
         if isinstance(perm, RC):
@@ -86,19 +111,9 @@ class CompanyService(BaseService):
         if not perm.is_net_admin():
             return RC(E_RC.RC_UNAUTHORIZED, "Unauthorized access")
         
-        active_companies = self.company_repository.get_all_active_companies()
+        return self._get_company_dicts(True, limit, cursor)
 
-        # Format the results
-        company_data = []
-        for company in active_companies:
-            company_dict = company.to_dict()
-            admins = self.company_repository.get_company_admins(company.company_id)
-            company_dict['admin_user'] = admins[0].to_dict() if admins else None
-            company_data.append(company_dict)
-
-        return company_data
-
-    def get_all_companies(self, user_permission: int) -> list:
+    def get_all_companies(self, user_permission: int, limit: str = None, cursor: str = None) -> list | dict:
         
         perm: Permission = Permission(user_permission)
         if isinstance(perm, RC):
@@ -107,17 +122,37 @@ class CompanyService(BaseService):
         if not perm.is_net_admin():
             return RC(E_RC.RC_UNAUTHORIZED, "Unauthorized access")
         
-        all_companies = self.company_repository.get_all_companies()
+        return self._get_company_dicts(None, limit, cursor)
+
+    def _get_company_dicts(self, is_active: bool = None, limit: str = None, cursor: str = None) -> list | dict | RC:
+        """
+        The company listing, or with a limit or cursor a keyset page ordered by
+        (company_name, company_id) as {'items': [...], 'next_cursor': str | None}.
+        """
+        paged = limit is not None or cursor is not None
+        after = None
+        if paged:
+            page = parse_page(limit, cursor, str, UUID)
+            if isinstance(page, RC):
+                return page
+            limit, after = page
+
+        company_data = self.company_repository.get_company_dicts(is_active, limit + 1 if paged else None, after)
+        if isinstance(company_data, RC):
+            return company_data
+
+        company_ids = [UUID(company_dict['company_id']) for company_dict in company_data] if paged else None
+        admins_by_company = self.company_repository.get_admin_dicts_by_company(company_ids)
+        if isinstance(admins_by_company, RC):
+            return admins_by_company
 
-        # Format the results
-        company_data = []
-        for company in all_companies:
-            company_dict = company.to_dict()
-            admins = self.company_repository.get_company_admins(company.company_id)
-            company_dict['admin_user'] = admins[0].to_dict() if admins else None
-            company_data.append(company_dict)
+        for company_dict in company_data:
+            admins = admins_by_company.get(company_dict['company_id'])
+            company_dict['admin_user'] = admins[0] if admins else None
 
-        return company_data
+        if not paged:
+            return company_data
+        return page_result(company_data, limit, lambda row: (row['company_name'], row['company_id']))
 
     def get_company_users(self, company_id: str, user_permission: int, user_company_id) -> list:
         
@@ -195,4 +230,88 @@ class CompanyService(BaseService):
         if perm.is_employer() and user_company_id != company_id:
             return RC(E_RC.RC_UNAUTHORIZED, 'Unauthorized to access this information')
 
-        return {'company_name': company.company_name}
\ No newline at end of file
+        return {'company_name': company.company_name}
+
+    def get_company_holidays(self, company_id: str, year: str, user_company_id: str, user_permission: int) -> list | RC:
+        
+        perm: Permission = Permission(user_permission)
+        if isinstance(perm, RC):
+            return perm
+        
+        if not perm.is_net_admin() and str(user_company_id) != str(company_id):
+            return RC(E_RC.RC_UNAUTHORIZED, 'Unauthorized to access this information')
+
+        first_day = last_day = None
+        if year:
+            try:
+                first_day, last_day = date(int(year), 1, 1), date(int(year), 12, 31)
+            except ValueError:
+                return RC(E_RC.RC_INVALID_INPUT, 'Invalid year')
+
+        holidays = self.company_holiday_repository.get_holidays(company_id, first_day, last_day)
+        if isinstance(holidays, RC):
+            return holidays
+
+        return [holiday.to_dict() for holiday in holidays]
+
+    def add_company_holiday(self, company_id: str, day_str: str, name: str, user_company_id: str, user_permission: int) -> RC:
+        
+        rc: RC = self._check_holiday_write(company_id, user_company_id, user_permission)
+        if not rc.is_ok():
+            return rc
+
+        try:
+            day = date.fromisoformat(day_str or '')
+        except ValueError:
+            return RC(E_RC.RC_INVALID_INPUT, 'Invalid holiday date format')
+
+        existing_holiday = self.company_holiday_repository.get_holiday(company_id, day)
+        if not isinstance(existing_holiday, RC):
+            return RC(E_RC.RC_INVALID_INPUT, 'Holiday already exists')
+
+        holiday: CompanyHoliday = self.factory.create("company_holiday", company_id=company_id, day=day, name=name)
+        if isinstance(holiday, RC):
+            return holiday
+
+        rc = self._save(self.company_holiday_repository, holiday)
+        if rc.is_ok():
+            # User reports are keyed by email, so every cached report may count this day
+            report_cache.clear()
+        return rc
+
+    def delete_company_holiday(self, company_id: str, day_str: str, user_company_id: str, user_permission: int) -> RC:
+        
+        rc: RC = self._check_holiday_write(company_id, user_company_id, user_permission)
+        if not rc.is_ok():
+            return rc
+
+        try:
+            day = date.fromisoformat(day_str or '')
+        except ValueError:
+            return RC(E_RC.RC_INVALID_INPUT, 'Invalid holiday date format')
+
+        holiday = self.company_holiday_repository.get_holiday(company_id, day)
+        if isinstance(holiday, RC):
+            return holiday
+
+        rc = self._delete(self.company_holiday_repository, holiday)
+        if rc.is_ok():
+            report_cache.clear()
+        return rc
+
+    def _check_holiday_write(self, company_id: str, user_company_id: str, user_permission: int) -> RC:
+        perm: Permission = Permission(user_permission)
+        if isinstance(perm, RC):
+            return perm
+        
+        if perm.is_employee():
+            return RC(E_RC.RC_UNAUTHORIZED, "Unauthorized access")
+
+        if perm.is_employer() and str(user_company_id) != str(company_id):
+            return RC(E_RC.RC_UNAUTHORIZED, "Unauthorized access")
+
+        company = self.company_repository.get_company_by_id(company_id)
+        if isinstance(company, RC):
+            return company
+
+        return RC(E_RC.RC_OK, "Authorized")
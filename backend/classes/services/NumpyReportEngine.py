@@ -0,0 +1,121 @@
+from classes.dataclass.User import User
+from classes.utilities.WorkCalendar import WorkCalendar, range_days
+from cmn_utils import format_hours_to_hhmm
+from datetime import datetime, timedelta
+import numpy as np
+
+NO_ENTRY = -1
+OTHER = 0
+WORK = 1
+PAID_OFF = 2
+UNPAID_OFF = 3
+
+REPORTING_TYPE_CODES = {
+    'work': WORK,
+    'paidoff': PAID_OFF,
+    'unpaidoff': UNPAID_OFF,
+}
+
+REPORTING_TYPE_NAMES = {
+    WORK: 'work',
+    PAID_OFF: 'paidoff',
+    UNPAID_OFF: 'unpaidoff',
+}
+
+PAID_OFF_SECONDS = 8 * 3600
+
+
+class NumpyReportEngine:
+    """
+    Computes the work days of many users at once with NumPy day bins.
+
+    Produces exactly the same figures as ReportService._calculate_work_days:
+    only the first timestamp of each day counts, and days off on the user's
+    work calendar are neither potential work days nor reported.
+    """
+
+    def calculate_work_days(self, users: list[User], day_entries_by_user: dict[str, list[tuple]],
+                            calendars: list[WorkCalendar], start_date: datetime, end_date: datetime,
+                            with_breakdown: bool = False) -> dict[str, tuple]:
+        """
+        Calculates the work days of every user in the date range.
+
+        Args:
+            users (list[User]): The users to report on.
+            day_entries_by_user (dict): A mapping of user email to that user's (date, reporting_type, seconds) entries.
+            calendars (list[WorkCalendar]): Per user, the work calendar of the range.
+            start_date (datetime): Start of the range.
+            end_date (datetime): End of the range.
+            with_breakdown (bool): Whether to build the daily breakdown of every user.
+
+        Returns:
+            dict: A mapping of user email to the same tuple ReportService._calculate_work_days returns.
+        """
+        n_users = len(users)
+        first_day, last_day = range_days(start_date, end_date)
+        n_days = max((last_day - first_day).days + 1, 0)
+
+        # Work days: users x days grid of weekday bins, minus the holidays
+        day_weekdays = (np.arange(n_days) + first_day.weekday()) % 7
+        weekend = np.array([work_calendar.weekend_mask for work_calendar in calendars], dtype=bool).reshape(n_users, 7)
+        workday = ~weekend[:, day_weekdays]
+        for i, work_calendar in enumerate(calendars):
+            for holiday in work_calendar.holidays:
+                if first_day <= holiday <= last_day:
+                    workday[i, (holiday - first_day).days] = False
+
+        reporting_types = np.full((n_users, n_days), NO_ENTRY, dtype=np.int8)
+        seconds = np.zeros((n_users, n_days), dtype=np.int64)
+
+        user_idx, punch_in_dates, type_codes, durations = self._load_arrays(users, day_entries_by_user)
+        if n_days and len(user_idx):
+            day_idx = (punch_in_dates - np.datetime64(first_day, 'D')).astype(np.int64)
+            in_range = (day_idx >= 0) & (day_idx < n_days)
+
+            keys = user_idx[in_range] * n_days + day_idx[in_range]
+            _, first = np.unique(keys, return_index=True)  # first entry of every (user, day)
+            reporting_types.flat[keys[first]] = type_codes[in_range][first]
+            seconds.flat[keys[first]] = durations[in_range][first]
+
+        reporting_types[~workday] = NO_ENTRY
+        daily_seconds = np.where(reporting_types == WORK, seconds, 0)
+        daily_seconds[reporting_types == PAID_OFF] = PAID_OFF_SECONDS
+
+        days_worked = np.count_nonzero(reporting_types == WORK, axis=1)
+        paid_days_off = np.count_nonzero(reporting_types == PAID_OFF, axis=1)
+        unpaid_days_off = np.count_nonzero(reporting_types == UNPAID_OFF, axis=1)
+        potential_work_days = np.array([work_calendar.work_days(first_day, last_day) for work_calendar in calendars], dtype=np.int64)
+        days_not_reported = potential_work_days - np.count_nonzero(reporting_types != NO_ENTRY, axis=1)
+        total_hours_worked = daily_seconds.sum(axis=1)
+
+        day_labels = [(first_day + timedelta(days=day)).strftime('%Y-%m-%d') for day in range(n_days)] if with_breakdown else []
+
+        results = {}
+        for i, user in enumerate(users):
+            daily_breakdown = [{
+                "date": day_labels[day],
+                "hoursWorked": format_hours_to_hhmm(int(daily_seconds[i, day])),
+                "reportingType": REPORTING_TYPE_NAMES.get(int(reporting_types[i, day]))
+            } for day in range(n_days)] if with_breakdown else None
+
+            results[user.email] = (int(days_worked[i]), int(paid_days_off[i]), int(unpaid_days_off[i]), int(days_not_reported[i]),
+                                   int(total_hours_worked[i]), int(potential_work_days[i]), daily_breakdown)
+
+        return results
+
+    def _load_arrays(self, users: list[User], day_entries_by_user: dict[str, list[tuple]]) -> tuple:
+        """
+        Flattens the users' day entries into parallel arrays, keeping every user's entry order.
+        """
+        user_idx, punch_in_dates, type_codes, durations = [], [], [], []
+        for i, user in enumerate(users):
+            for day, reporting_type, seconds in day_entries_by_user.get(user.email, []):
+                user_idx.append(i)
+                punch_in_dates.append(day)
+                type_codes.append(REPORTING_TYPE_CODES.get(reporting_type, OTHER))
+                durations.append(seconds)
+
+        return (np.array(user_idx, dtype=np.int64),
+                np.array(punch_in_dates, dtype='datetime64[D]'),
+                np.array(type_codes, dtype=np.int8),
+                np.array(durations, dtype=np.int64))
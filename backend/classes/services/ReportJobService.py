@@ -0,0 +1,167 @@
+from concurrent.futures import ThreadPoolExecutor
+from classes.services.ReportService import ReportService
+from classes.services.BaseServiceClass import BaseService
+from classes.repositories.ReportJobRepository import ReportJobRepository
+from classes.validators.ModelValidator import ModelValidator
+from classes.factories.DomainClassFactory import DomainClassFactory
+from classes.dataclass.ReportJob import ReportJob, JOB_PENDING, JOB_DONE, JOB_FAILED, FINISHED_STATUSES
+from classes.utilities.Permission import Permission
+from classes.utilities.RC import RC, E_RC
+from cmn_utils import print_exception
+from datetime import datetime, timezone, timedelta
+from flask import Flask
+import hashlib
+import json
+import threading
+import time
+import uuid
+
+REPORT_PARAMS = {
+    'user': ('user_email', 'dateRangeType', 'year', 'month', 'start_date', 'end_date'),
+    'company': ('company_id', 'dateRangeType', 'year', 'month', 'start_date', 'end_date'),
+    'overview': ('dateRangeType', 'year', 'month', 'start_date', 'end_date'),
+}
+
+# Seconds between two prunes of report_jobs by the same worker
+PRUNE_INTERVAL = 60
+
+
+class ReportJobService(BaseService):
+    """
+    Runs ReportService reports on a bounded local thread pool so request workers return immediately.
+
+    Jobs are stored in report_jobs, so any worker can answer for the status and result of a job.
+    Identical requests by the same caller share one job while it is pending or running; once it
+    finished, the same request runs the report again. Finished jobs are kept for retention_seconds,
+    and at most max_retained of them are kept. Jobs still running timeout_seconds after they started,
+    or still pending queue_timeout_seconds after they were submitted, are failed, since the worker
+    running them was most likely restarted.
+    """
+
+    def __init__(self, report_service: ReportService, report_job_repository: ReportJobRepository, validator: ModelValidator,
+                 factory: DomainClassFactory, max_workers: int, max_retained: int, retention_seconds: int, timeout_seconds: int,
+                 queue_timeout_seconds: int):
+        super().__init__(validator, factory)
+        self.report_service = report_service
+        self.report_job_repository = report_job_repository
+        self.max_workers = max_workers
+        self.max_retained = max_retained
+        self.retention = timedelta(seconds=retention_seconds)
+        self.timeout = timedelta(seconds=timeout_seconds)
+        self.queue_timeout = timedelta(seconds=queue_timeout_seconds)
+        self._executor: ThreadPoolExecutor = None
+        self._lock = threading.Lock()
+        self._next_prune: float = 0
+
+    def submit(self, app: Flask, report_type: str, params: dict, current_user_email: str, user_permission: int, user_company_id: str) -> dict | RC:
+        perm: Permission = Permission(user_permission)
+        if isinstance(perm, RC):
+            return perm
+
+        if report_type not in REPORT_PARAMS:
+            return RC(E_RC.RC_INVALID_INPUT, f"{report_type} is an invalid report type")
+
+        params = {name: params.get(name) for name in REPORT_PARAMS[report_type]}
+        dedup_key = hashlib.sha256(json.dumps([current_user_email, report_type, params], default=str).encode('utf-8')).hexdigest()
+
+        self._prune()
+        job = ReportJob(uuid.uuid4().hex, report_type, params, current_user_email, user_permission, user_company_id, dedup_key,
+                        JOB_PENDING, created_at=datetime.now(timezone.utc))
+        created: ReportJob | RC = self.report_job_repository.create_job(job)
+        if isinstance(created, RC):
+            return created
+
+        # An identical pending or running job was returned instead, it is already queued by its worker
+        if created.job_id == job.job_id:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='report-job')
+                self._executor.submit(self._run, app, job.job_id)
+
+        return created.to_dict()
+
+    def get_status(self, job_id: str, current_user_email: str, user_permission: int) -> dict | RC:
+        job: ReportJob | RC = self._get_job(job_id, current_user_email, user_permission)
+        if isinstance(job, RC):
+            return job
+
+        return job.to_dict()
+
+    def get_result(self, job_id: str, current_user_email: str, user_permission: int) -> dict | list | RC:
+        job: ReportJob | RC = self._get_job(job_id, current_user_email, user_permission)
+        if isinstance(job, RC):
+            return job
+
+        if job.status == JOB_FAILED:
+            return RC(job.error_code or E_RC.RC_ERROR_DATABASE, job.error)
+        if job.status != JOB_DONE:
+            return RC(E_RC.RC_CONFLICT, f"Report job is {job.status}")
+
+        return json.loads(job.result)
+
+    def cancel(self, job_id: str, current_user_email: str, user_permission: int) -> RC:
+        job: ReportJob | RC = self._get_job(job_id, current_user_email, user_permission)
+        if isinstance(job, RC):
+            return job
+
+        if job.status in FINISHED_STATUSES:
+            return RC(E_RC.RC_CONFLICT, f"Report job is already {job.status}")
+
+        # A running report cannot be interrupted, its result is discarded when it completes
+        return self.report_job_repository.cancel_job(job_id, datetime.now(timezone.utc))
+
+    def _run(self, app: Flask, job_id: str) -> None:
+        with app.app_context():
+            if not self.report_job_repository.start_job(job_id, datetime.now(timezone.utc)):
+                return
+
+            try:
+                job: ReportJob | None | RC = self.report_job_repository.get_job(job_id)
+                result = self._generate(job) if isinstance(job, ReportJob) else RC(E_RC.RC_ERROR_DATABASE, "Failed to generate report")
+                if not isinstance(result, RC):
+                    result = app.json.dumps(result)
+            except Exception as e:
+                print_exception(e)
+                result = RC(E_RC.RC_ERROR_DATABASE, "Failed to generate report")
+
+            if isinstance(result, RC):
+                self.report_job_repository.finish_job(job_id, JOB_FAILED, datetime.now(timezone.utc), error=result)
+            else:
+                self.report_job_repository.finish_job(job_id, JOB_DONE, datetime.now(timezone.utc), result=result)
+
+    def _generate(self, job: ReportJob) -> dict | list | RC:
+        params = job.params
+        if job.report_type == 'user':
+            return self.report_service.user_report(params['user_email'], params['dateRangeType'], params['year'], params['month'],
+                                                   params['start_date'], params['end_date'], job.user_permission, job.user_company_id, job.owner_email)
+        if job.report_type == 'company':
+            return self.report_service.company_summary(params['company_id'], params['dateRangeType'], params['year'], params['month'],
+                                                       params['start_date'], params['end_date'], job.user_permission, job.user_company_id)
+        return self.report_service.company_overview(params['dateRangeType'], params['year'], params['month'],
+                                                    params['start_date'], params['end_date'], job.user_permission)
+
+    def _get_job(self, job_id: str, current_user_email: str, user_permission: int) -> ReportJob | RC:
+        self._prune()
+        job: ReportJob | None | RC = self.report_job_repository.get_job(job_id)
+        if isinstance(job, RC):
+            return job
+
+        if not job:
+            return RC(E_RC.RC_NOT_FOUND, f"Report job {job_id} not found")
+
+        if job.owner_email != current_user_email and not Permission(user_permission).is_net_admin():
+            return RC(E_RC.RC_UNAUTHORIZED, "Unauthorized access")
+
+        return job
+
+    def _prune(self) -> None:
+        """
+        Fails the lost jobs and drops the expired finished ones, at most once per PRUNE_INTERVAL per worker.
+        """
+        with self._lock:
+            if time.monotonic() < self._next_prune:
+                return
+            self._next_prune = time.monotonic() + PRUNE_INTERVAL
+
+        now = datetime.now(timezone.utc)
+        self.report_job_repository.prune(now, now - self.retention, now - self.timeout, now - self.queue_timeout, self.max_retained)
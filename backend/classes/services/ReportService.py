@@ -1,25 +1,48 @@
 from classes.dataclass.Company import Company
 from classes.dataclass.User import User
 from classes.dataclass.TimeStamp import TimeStamp
-from classes.repositories.CompanyRepository import CompanyRepository
+from classes.repositories.CompanyRepository import CompanyRepository, fetch_work_totals
 from classes.repositories.UserRepository import UserRepository
 from classes.repositories.TimeStampRepository import TimeStampRepository
+from classes.repositories.DailyTotalsRepository import DailyTotalsRepository
+from classes.repositories.CompanyHolidayRepository import CompanyHolidayRepository
 from classes.utilities.Permission import Permission
 from classes.services.BaseServiceClass import BaseService
 from classes.validators.ModelValidator import ModelValidator
 from classes.factories.DomainClassFactory import DomainClassFactory
 from classes.utilities.RC import RC, E_RC
+from classes.utilities.ReportCache import report_cache, USER_REPORT, COMPANY_REPORT, OVERVIEW_REPORT
+from classes.utilities.WorkCalendar import WorkCalendar, get_work_calendar, range_days, work_capacity_hours
 from cmn_utils import *
-from datetime import datetime, timezone, timedelta
+from config import Config
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from flask import Flask, current_app
+from datetime import date, datetime, timezone, timedelta
+from itertools import groupby
+from typing import Iterator
 import calendar
+import multiprocessing
+import threading
 
 
 class ReportService(BaseService):
-    def __init__(self, user_repository: UserRepository, timestamp_repository: TimeStampRepository, company_repository: CompanyRepository, validator: ModelValidator, factory: DomainClassFactory):
+    def __init__(self, user_repository: UserRepository, timestamp_repository: TimeStampRepository, company_repository: CompanyRepository,
+                 daily_totals_repository: DailyTotalsRepository, company_holiday_repository: CompanyHolidayRepository,
+                 validator: ModelValidator, factory: DomainClassFactory):
         super().__init__(validator, factory)
         self.user_repository: UserRepository = user_repository
         self.timestamp_repository: TimeStampRepository = timestamp_repository
         self.company_repository: CompanyRepository = company_repository
+        self.daily_totals_repository: DailyTotalsRepository = daily_totals_repository
+        self.company_holiday_repository: CompanyHolidayRepository = company_holiday_repository
+        self.report_engine = None
+        if Config.REPORT_ENGINE == 'numpy':
+            from classes.services.NumpyReportEngine import NumpyReportEngine
+            self.report_engine = NumpyReportEngine()
+        self.overview_workers: int = int(Config.OVERVIEW_WORKERS)
+        self.overview_executor_type: str = Config.OVERVIEW_EXECUTOR
+        self._overview_executor: Executor = None
+        self._overview_executor_lock = threading.Lock()
 
     def user_report(self, user_email, date_range_type, selected_year, selected_month, start_date_str, \
             end_date_str, user_permission: int, user_company_id: str, current_user_email: str) -> dict | RC:
@@ -44,15 +67,24 @@ class ReportService(BaseService):
         if perm.is_employer() and (str(user.company_id) != str(user_company_id)):
             return RC(E_RC.RC_UNAUTHORIZED, "Unauthorized access")
         
-        time_stamps = self.timestamp_repository.get_range(start_date, end_date, user_email)
-        if isinstance(time_stamps, RC):
-            return time_stamps
+        cached_report = report_cache.get(USER_REPORT, user.email, start_date, end_date)
+        if cached_report is not None:
+            return cached_report
+        
+        day_entries_by_user = self._get_day_entries(start_date, end_date, email=user.email)
+        if isinstance(day_entries_by_user, RC):
+            return day_entries_by_user
+
+        holidays = self.company_holiday_repository.get_holiday_days(user.company_id, *range_days(start_date, end_date))
+        if isinstance(holidays, RC):
+            return holidays
 
         days_worked, paid_days_off, unpaid_days_off, days_not_reported, total_hours_worked,\
-            potential_work_days, daily_breakdown = self._calculate_work_days(user, time_stamps, start_date, end_date)
+            potential_work_days, daily_breakdown = self._calculate_work_days_many([user], day_entries_by_user, holidays, start_date, end_date, True)[user.email]
 
         report_entry: dict = self._generate_report_entry(user, days_worked, paid_days_off, unpaid_days_off, days_not_reported, total_hours_worked, potential_work_days, start_date, end_date, daily_breakdown)
 
+        report_cache.put(USER_REPORT, user.email, start_date, end_date, report_entry)
         return report_entry
 
     def company_summary(self, company_id: str, date_range_type: str, selected_year: str, selected_month: str, start_date_str: str, \
@@ -74,19 +106,83 @@ class ReportService(BaseService):
         
         start_date, end_date = result
         
+        cached_report = report_cache.get(COMPANY_REPORT, str(company_id), start_date, end_date)
+        if cached_report is not None:
+            return cached_report
+        
         users: list[User] = self.company_repository.get_company_users(company_id=company_id)
+        day_entries_by_user = self._get_day_entries(start_date, end_date, company_id=company_id)
+        if isinstance(day_entries_by_user, RC):
+            return day_entries_by_user
+        
+        holidays = self.company_holiday_repository.get_holiday_days(company_id, *range_days(start_date, end_date))
+        if isinstance(holidays, RC):
+            return holidays
+        
+        work_days_by_user: dict[str, tuple] = self._calculate_work_days_many(users, day_entries_by_user, holidays, start_date, end_date)
+        
         report = []
         for user in users:
-            timestamps: list[TimeStamp] = self.timestamp_repository.get_range(start_date, end_date, user.email)
-
             days_worked, paid_days_off, unpaid_days_off, days_not_reported, total_hours_worked, potential_work_days, _\
-                =self._calculate_work_days(user, timestamps, start_date, end_date)
+                = work_days_by_user[user.email]
             
             report_entry: dict = self._generate_report_entry(user, days_worked, paid_days_off, unpaid_days_off, days_not_reported, total_hours_worked, potential_work_days, start_date, end_date)
             report.append(report_entry)
 
+        report_cache.put(COMPANY_REPORT, str(company_id), start_date, end_date, report)
         return report
 
+    def export_company_summary(self, company_id: str, date_range_type: str, selected_year: str, selected_month: str, start_date_str: str, \
+                end_date_str: str, user_permission: int, user_company_id: str) -> Iterator[dict] | RC:
+        """
+        Same checks and entries as company_summary, but returns a generator that computes one
+        employee at a time from a streamed, user-ordered timestamp cursor. Always reads raw timestamps.
+        """
+        perm: Permission = Permission(user_permission)
+        if isinstance(perm, RC):
+            return perm
+        
+        if perm.is_employee():
+            return RC(E_RC.RC_UNAUTHORIZED, "Unauthorized access")
+        
+        if perm.is_employer() and (str(user_company_id) != str(company_id)):
+            return RC(E_RC.RC_UNAUTHORIZED, "Unauthorized access")
+        
+        result = self._set_dates_range(date_range_type, selected_year, selected_month, start_date_str, end_date_str)
+        if isinstance(result, RC):
+            return result
+        
+        start_date, end_date = result
+        users: list[User] = sorted(self.company_repository.get_company_users(company_id=company_id), key=lambda user: user.email)
+        
+        holidays = self.company_holiday_repository.get_holiday_days(company_id, *range_days(start_date, end_date))
+        if isinstance(holidays, RC):
+            return holidays
+        
+        return self._iter_company_summary(users, company_id, holidays, start_date, end_date)
+
+    def _iter_company_summary(self, users: list[User], company_id: str, holidays: tuple, start_date: datetime, end_date: datetime) -> Iterator[dict]:
+        # users and the rows are both in code point order of the email (iter_range sorts with COLLATE "C"),
+        # a database collation such as en_US would order 'a.c@x' and 'ab@x' differently and skip groups
+        rows_by_user = groupby(self.timestamp_repository.iter_range(start_date, end_date, company_id=company_id), key=lambda row: row.user_email)
+        user_email, rows = next(rows_by_user, (None, iter(())))
+        for user in users:
+            # Skip timestamps of users that are not listed (inactive) until this user's group
+            while user_email is not None and user_email < user.email:
+                user_email, rows = next(rows_by_user, (None, iter(())))
+
+            day_entries: list[tuple] = []
+            if user_email == user.email:
+                day_entries = [(row.punch_in_timestamp.date(), row.reporting_type,
+                                TimeStamp.work_time(row.punch_in_timestamp, row.punch_out_timestamp) or 0) for row in rows]
+
+            days_worked, paid_days_off, unpaid_days_off, days_not_reported, total_hours_worked, potential_work_days, _\
+                = self._calculate_work_days_many([user], {user.email: day_entries}, holidays, start_date, end_date)[user.email]
+            
+            report_entry: dict = self._generate_report_entry(user, days_worked, paid_days_off, unpaid_days_off, days_not_reported, total_hours_worked, potential_work_days, start_date, end_date)
+            del report_entry["dailyBreakdown"]
+            yield report_entry
+
     def company_overview(self, date_range_type: str, selected_year: str, selected_month: str, start_date_str: str, end_date_str: str, user_permission: int) -> dict| RC:
         perm: Permission = Permission(user_permission)
         if isinstance(perm, RC):
@@ -101,93 +197,233 @@ class ReportService(BaseService):
         
         start_date, end_date = result
         
-        companies: list[Company] = self.company_repository.get_all_active_companies()
+        cached_report = report_cache.get(OVERVIEW_REPORT, None, start_date, end_date)
+        if cached_report is not None:
+            return cached_report
+        
+        work_totals: list[dict] = self._get_work_totals(start_date, end_date)
+        if isinstance(work_totals, RC):
+            return work_totals
+        
+        admins_by_company: dict[str, list[User]] = self.company_repository.get_active_companies_admins()
         
         report = []
-        for company in companies:
-            employees: list[User] = self.company_repository.get_company_users(company_id=company.company_id)
-            num_employees = len(employees)
-            total_hours_worked = 0
-            total_monthly_salary = 0
-            monthly_payments = []
-
-            for employee in employees:
-                employee_time_stamps = self.timestamp_repository.get_range(start_date, end_date, employee.email)
-                employee_hours_worked = 0
-                for ts in employee_time_stamps:
-                    employee_hours_worked += ts.total_work_time or 0
-                
-                total_hours_worked += employee_hours_worked
+        company_entry: dict = None
+        current_company_id: str = None
+        for row in work_totals:
+            if row['company_id'] != current_company_id:
+                current_company_id = row['company_id']
+                admin_users: list[User] = admins_by_company.get(current_company_id, [])
+                company_entry = {
+                    "companyName": row['company_name'],
+                    "numEmployees": 0,
+                    "totalHoursWorked": 0,
+                    "totalMonthlySalary": 0,
+                    "monthlyPayments": [],
+                    "adminNames": [admin.first_name + " " + admin.last_name for admin in admin_users]
+                }
+                report.append(company_entry)
 
-                # Calculate monthly payment for the employee
-                monthly_payment = (employee_hours_worked / 3600.0) * float(employee.salary or 0)
-                total_monthly_salary += monthly_payment
-                monthly_payments.append(round(monthly_payment, 2))
-            
-            admin_users: list[User] = self.company_repository.get_company_admins(company.company_id)
-            admin_names = [admin.first_name + " " + admin.last_name for admin in admin_users]
-            report.append( {
-                "companyName": company.company_name,
-                "numEmployees": num_employees,
-                "totalHoursWorked": format_hours_to_hhmm(total_hours_worked),
-                "totalMonthlySalary": round(total_monthly_salary, 2),
-                "monthlyPayments": monthly_payments,
-                "adminNames": admin_names
-            })
+            if row['email'] is None:
+                continue
+
+            # Calculate monthly payment for the employee
+            monthly_payment = (row['worked_seconds'] / 3600.0) * row['salary']
+            company_entry["numEmployees"] += 1
+            company_entry["totalHoursWorked"] += row['worked_seconds']
+            company_entry["totalMonthlySalary"] += monthly_payment
+            company_entry["monthlyPayments"].append(round(monthly_payment, 2))
+
+        for company_entry in report:
+            company_entry["totalHoursWorked"] = format_hours_to_hhmm(company_entry["totalHoursWorked"])
+            company_entry["totalMonthlySalary"] = round(company_entry["totalMonthlySalary"], 2)
             
+        report_cache.put(OVERVIEW_REPORT, None, start_date, end_date, report)
         return report
+
+    def _get_work_totals(self, start_date: datetime, end_date: datetime) -> list[dict] | RC:
+        """
+        Aggregates the overview work totals, split across the overview pool when more than one worker is configured.
+
+        The active companies are cut into contiguous chunks of the overview order and every worker
+        aggregates one chunk with its own session, so concatenating the chunk results in
+        submission order gives the same rows as the single statement.
+        """
+        if self.overview_workers <= 1:
+            return self.company_repository.get_active_companies_work_totals(start_date, end_date)
+
+        company_ids: list[str] = self.company_repository.get_active_company_ids()
+        if isinstance(company_ids, RC):
+            return company_ids
+
+        chunk_size = max(-(-len(company_ids) // self.overview_workers), 1)
+        chunks = [company_ids[i:i + chunk_size] for i in range(0, len(company_ids), chunk_size)]
+        if len(chunks) <= 1:
+            return self.company_repository.get_active_companies_work_totals(start_date, end_date, company_ids)
+
+        executor: Executor = self._get_overview_executor()
+        if self.overview_executor_type == 'process':
+            database_uri = current_app.config['SQLALCHEMY_DATABASE_URI']
+            futures = [executor.submit(fetch_work_totals, database_uri, start_date, end_date, chunk) for chunk in chunks]
+        else:
+            app: Flask = current_app._get_current_object()
+            futures = [executor.submit(self._work_totals_in_context, app, start_date, end_date, chunk) for chunk in chunks]
+
+        work_totals: list[dict] = []
+        for future in futures:
+            chunk_totals = future.result()
+            if isinstance(chunk_totals, RC):
+                return chunk_totals
+            work_totals.extend(chunk_totals)
+
+        return work_totals
+
+    def _work_totals_in_context(self, app: Flask, start_date: datetime, end_date: datetime, company_ids: list[str]) -> list[dict] | RC:
+        # Every app context gets its own scoped session, and so its own connection
+        with app.app_context():
+            return self.company_repository.get_active_companies_work_totals(start_date, end_date, company_ids)
+
+    def _get_overview_executor(self) -> Executor:
+        with self._overview_executor_lock:
+            if self._overview_executor is None:
+                if self.overview_executor_type == 'process':
+                    # spawn, since forking a threaded server with open connections is unsafe
+                    self._overview_executor = ProcessPoolExecutor(max_workers=self.overview_workers,
+                                                                  mp_context=multiprocessing.get_context('spawn'))
+                else:
+                    self._overview_executor = ThreadPoolExecutor(max_workers=self.overview_workers, thread_name_prefix='overview')
+            return self._overview_executor
+
+    def cache_stats(self, user_permission: int) -> dict | RC:
+        perm: Permission = Permission(user_permission)
+        if not perm.is_net_admin():
+            return RC(E_RC.RC_UNAUTHORIZED, "Unauthorized access")
         
+        return report_cache.stats()
         
-    def _calculate_work_days(self, user: User, time_stamps: list[TimeStamp], start_date: datetime, end_date: datetime) -> tuple:
         
+    def _get_day_entries(self, start_date: datetime, end_date: datetime, email: str = None, company_id: str = None) -> dict | RC:
+        """
+        Loads the day entries of a user, or of a whole company, from the configured report source.
+
+        A day entry is a (date, reporting_type, seconds) tuple. Entries of the same day are kept in
+        punch-in order, so the first entry of a day is the one the report counts.
+
+        Returns:
+            dict | RC: A mapping of user email to that user's list of day entries, or an RC on failure.
+        """
+        if Config.REPORT_SOURCE == 'rollup':
+            totals_by_user = self.daily_totals_repository.get_range(start_date, end_date, email, company_id)
+            if isinstance(totals_by_user, RC):
+                return totals_by_user
+
+            return {user_email: [(total.day, total.reporting_type, total.first_entry_seconds) for total in totals]
+                    for user_email, totals in totals_by_user.items()}
+
+        if company_id is None:
+            time_stamps = self.timestamp_repository.get_range(start_date, end_date, email)
+            if isinstance(time_stamps, RC):
+                return time_stamps
+            timestamps_by_user: dict[str, list[TimeStamp]] = {email: time_stamps}
+        else:
+            timestamps_by_user = self.timestamp_repository.get_company_range_by_user(start_date, end_date, company_id)
+            if isinstance(timestamps_by_user, RC):
+                return timestamps_by_user
+
+        return {user_email: [(ts.punch_in_timestamp.date(), ts.reporting_type, ts.total_work_time or 0) for ts in time_stamps]
+                for user_email, time_stamps in timestamps_by_user.items()}
+
+    def _calculate_work_days_many(self, users: list[User], day_entries_by_user: dict[str, list[tuple]], holidays: tuple,
+                                  start_date: datetime, end_date: datetime, with_breakdown: bool = False) -> dict[str, tuple]:
+        """
+        Calculates the work days of several users of one company with the configured report engine.
+
+        Returns:
+            dict: A mapping of user email to the tuple returned by _calculate_work_days.
+        """
+        calendars: list[WorkCalendar] = [get_work_calendar(user.weekend_choice, holidays) for user in users]
+        if self.report_engine:
+            return self.report_engine.calculate_work_days(users, day_entries_by_user, calendars, start_date, end_date, with_breakdown)
+
+        return {user.email: self._calculate_work_days(day_entries_by_user.get(user.email, []), work_calendar, start_date, end_date, with_breakdown)
+                for user, work_calendar in zip(users, calendars)}
+
+    def _calculate_work_days(self, day_entries: list[tuple], work_calendar: WorkCalendar, start_date: datetime, end_date: datetime,
+                             with_breakdown: bool = True) -> tuple:
+        """
+        Counts the reported days of the range on the user's work calendar.
+
+        Potential work days come straight from the calendar, so only the reported days are visited
+        unless the daily breakdown is requested, which walks every day of the range.
+        """
+        first_day, last_day = range_days(start_date, end_date)
+        day_index: dict[date, tuple] = self._bucket_by_day(day_entries)
+
         total_hours_worked = 0
-        daily_breakdown = []
         paid_days_off = 0
         unpaid_days_off = 0
-        days_not_reported = 0
+        days_reported = 0
         days_worked = 0
-        potential_work_days = 0
-        current_date = start_date
+        potential_work_days = work_calendar.work_days(first_day, last_day)
+
+        for day, (reporting_type, seconds) in day_index.items():
+            if not first_day <= day <= last_day or not work_calendar.is_work_day(day):
+                continue
+
+            days_reported += 1
+            if reporting_type == "work":
+                days_worked += 1
+                total_hours_worked += seconds
+            elif reporting_type == 'paidoff':
+                paid_days_off += 1
+                total_hours_worked += 8 * 3600
+            elif reporting_type == 'unpaidoff':
+                unpaid_days_off += 1
 
-        while current_date <= end_date:
-            found_entry = False
+        days_not_reported = potential_work_days - days_reported
+        daily_breakdown = self._daily_breakdown(day_index, work_calendar, first_day, last_day) if with_breakdown else None
+
+        return days_worked, paid_days_off, unpaid_days_off, days_not_reported, total_hours_worked, potential_work_days, daily_breakdown
+
+    def _daily_breakdown(self, day_index: dict, work_calendar: WorkCalendar, first_day: date, last_day: date) -> list[dict]:
+        daily_breakdown = []
+        current_day = first_day
+        while current_day <= last_day:
             work_type = None
             daily_hours = 0
-            if not user.weekend_choice or current_date.strftime('%A').lower() not in map(str.lower, user.weekend_choice.split(',')):  # potential_work_days += 1
-                potential_work_days += 1
-                for ts in time_stamps:
-                    if ts.punch_in_timestamp.date() == current_date.date():
-                        found_entry = True
-                        if ts.reporting_type == "work":
-                            work_type = "work"
-                            days_worked += 1
-                            daily_hours += ts.total_work_time or 0
-                            
-                        elif ts.reporting_type == 'paidoff':
-                            paid_days_off += 1
-                            daily_hours = 8 * 3600
-                            work_type = ts.reporting_type
-                            break
-                        elif ts.reporting_type == 'unpaidoff':
-                            unpaid_days_off += 1
-                            daily_hours = 0
-                            work_type = ts.reporting_type
-                            break
-                        
-                        break
-                if not found_entry:
-                    days_not_reported += 1
-                
-                total_hours_worked += daily_hours
+            day_entry: tuple = day_index.get(current_day) if work_calendar.is_work_day(current_day) else None
+            if day_entry is not None:
+                reporting_type, seconds = day_entry
+                if reporting_type == "work":
+                    work_type = "work"
+                    daily_hours = seconds
+                elif reporting_type == 'paidoff':
+                    daily_hours = 8 * 3600
+                    work_type = reporting_type
+                elif reporting_type == 'unpaidoff':
+                    work_type = reporting_type
 
             daily_breakdown.append({
-                "date": current_date.strftime('%Y-%m-%d'),
+                "date": current_day.strftime('%Y-%m-%d'),
                 "hoursWorked": format_hours_to_hhmm(daily_hours),
                 "reportingType": work_type
             })
-            current_date += timedelta(days=1)
+            current_day += timedelta(days=1)
 
-        return days_worked, paid_days_off, unpaid_days_off, days_not_reported, total_hours_worked, potential_work_days, daily_breakdown
+        return daily_breakdown
+
+    def _bucket_by_day(self, day_entries: list[tuple]) -> dict:
+        """
+        Indexes the day entries by date in a single pass.
+
+        Only the first entry of every day is kept: the daily breakdown is decided
+        by the first entry reported for a day, whatever its reporting type.
+        """
+        day_index: dict[date, tuple] = {}
+        for day, reporting_type, seconds in day_entries:
+            day_index.setdefault(day, (reporting_type, seconds))
+
+        return day_index
     
     def _generate_report_entry(self, user: User, days_worked, paid_days_off, unpaid_days_off, days_not_reported, total_hours_worked, potential_work_days, start_date, end_date, daily_breakdown = None):
         employee_name = user.first_name + " " + user.last_name
@@ -202,7 +438,7 @@ class ReportService(BaseService):
             "daysNotReported": days_not_reported,  
             "potentialWorkDays": potential_work_days, 
             "totalHoursWorked": format_hours_to_hhmm(total_hours_worked),
-            "workCapacityforRange":format_hours_to_hhmm(calculate_work_capacity(user, start_date, end_date) * 3600),
+            "workCapacityforRange":format_hours_to_hhmm(work_capacity_hours(user.work_capacity, potential_work_days) * 3600),
             "totalPaymentRequired": round(total_payment_required, 2),
             "dailyBreakdown": daily_breakdown,
             "userDetails": {  
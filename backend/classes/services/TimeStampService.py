@@ -1,23 +1,32 @@
 from models import TimeStampModel
-from classes.dataclass.User import User
 from classes.dataclass.TimeStamp import TimeStamp
 from classes.utilities.RC import RC, E_RC
+from classes.utilities.ReportCache import report_cache
+from classes.utilities.PresenceRegistry import presence_registry
+from classes.utilities.Pagination import parse_page, page_result
+from typing import Iterator
 from cmn_utils import *
 from datetime import datetime, timezone
+from uuid import UUID, uuid4
 from flask_sqlalchemy import SQLAlchemy
 from classes.validators.ModelValidator import ModelValidator
 from classes.repositories.TimeStampRepository import TimeStampRepository
 from classes.repositories.UserRepository import UserRepository
+from classes.repositories.DailyTotalsRepository import DailyTotalsRepository
 from classes.utilities.Permission import Permission
+from classes.utilities.Authorization import Authorization
 from classes.services.BaseServiceClass import BaseService
 from classes.factories.DomainClassFactory import DomainClassFactory
 
 
 class TimeStampService(BaseService):
-    def __init__(self, timestamp_repository: TimeStampRepository, user_repository: UserRepository, validator: ModelValidator, factory: DomainClassFactory):
+    def __init__(self, timestamp_repository: TimeStampRepository, user_repository: UserRepository, daily_totals_repository: DailyTotalsRepository,
+                 validator: ModelValidator, factory: DomainClassFactory):
         super().__init__(validator, factory)
         self.timestamp_repository = timestamp_repository
         self.user_repository = user_repository
+        self.daily_totals_repository = daily_totals_repository
+        self.authorization = Authorization(user_repository.get_user_company_id)
 
     def create_timestamp(self, user_email: str, entered_by_user: str,
                          punch_type: int, punch_in: str, punch_out: str,
@@ -30,18 +39,11 @@ class TimeStampService(BaseService):
         if isinstance(perm, RC):
             return perm
         
-        # Permission checks
-        if perm.is_employee() and entered_by_user != user_email:
-            return RC(E_RC.RC_UNAUTHORIZED, 'Unauthorized access')
-
-        user: User | RC = self.user_repository.get_user_by_email(user_email)
-        if isinstance(user, RC):
-            return user
-
-        if perm.is_employer() and user_company_id != user.company_id:
-            return RC(E_RC.RC_UNAUTHORIZED, 'Unauthorized access')
+        # Permission checks, from the claims when users punch for themselves
+        company_id: str | RC = self.authorization.authorize_user(perm, entered_by_user, user_company_id, user_email)
+        if isinstance(company_id, RC):
+            return company_id
 
-        
         if punch_in:
             punch_in_datetime = self._iso_str_to_utc_datetime(punch_in)
             if isinstance(punch_in_datetime, RC):
@@ -90,11 +92,16 @@ class TimeStampService(BaseService):
         else:
             return RC(E_RC.RC_INVALID_INPUT, 'Start time should be earlier than end time')
 
+        # The uuid is generated here rather than by the server default so the presence registry can track the punch
+        new_timestamp_data['uuid'] = str(uuid4())
         new_timestamp: TimeStamp = self.factory.create("timestamp", **new_timestamp_data)
         if isinstance(new_timestamp, RC):
             return new_timestamp
         
-        return self._save(self.timestamp_repository, new_timestamp)
+        rc: RC = self._save(self.timestamp_repository, new_timestamp)
+        if rc.is_ok():
+            presence_registry.punch_changed(user_email, company_id, new_timestamp.uuid, new_timestamp.punch_in_timestamp, new_timestamp.punch_out_timestamp)
+        return self._after_timestamp_write(rc, user_email, company_id, new_timestamp.punch_in_timestamp)
 
     def punch_out(self, user_email: str, entered_by: str,
                   reporting_type: str, detail: str, user_permission: int,
@@ -104,37 +111,33 @@ class TimeStampService(BaseService):
         if isinstance(perm, RC):
             return perm
         
-        if perm.is_employee() and entered_by != user_email:
-            return RC(E_RC.RC_UNAUTHORIZED, 'Unauthorized access')
-
-        user: User | RC = self.user_repository.get_user_by_email(email=user_email)
-        if isinstance(user, RC):
-            return user
-
-        if perm.is_employer() and user_company_id != user.company_id:
-            return RC(E_RC.RC_UNAUTHORIZED, 'Unauthorized access')
+        # Employers punching out one of their users are checked by the UPDATE itself, the user is
+        # looked up only when no punch was closed to tell an unknown or foreign user from no open punch
+        if user_email == entered_by or perm.is_employer():
+            company_id = user_company_id
+        else:
+            company_id: str | RC = self.authorization.authorize_user(perm, entered_by, user_company_id, user_email)
+            if isinstance(company_id, RC):
+                return company_id
 
         today = datetime.now(timezone.utc).date()
         start_of_day = datetime.combine(today, datetime.min.time()).replace(tzinfo=timezone.utc)
         end_of_day = datetime.combine(today, datetime.max.time()).replace(tzinfo=timezone.utc)
 
-        timestamps: list[TimeStamp] = self.timestamp_repository.get_range(start_of_day, end_of_day, user_email)
-        timestamp: TimeStamp = None
-        if len(timestamps):
-            for ts in timestamps:
-                if ts.punch_out_timestamp is None:
-                    timestamp = ts
-                    break
-                
-        if timestamp:
-            timestamp.punch_out_timestamp = datetime.now(timezone.utc)
-            timestamp.reporting_type = reporting_type
-            timestamp.detail = detail
-            
-            return self._update(self.timestamp_repository, timestamp)
-        else:
+        timestamp: TimeStamp | RC | None = self.timestamp_repository.punch_out_latest(user_email, start_of_day, end_of_day, datetime.now(timezone.utc),
+                                                                                      reporting_type, detail, self.validator.validate,
+                                                                                      self.authorization.scope(perm, entered_by, user_company_id))
+        if isinstance(timestamp, RC):
+            return timestamp
+        if timestamp is None:
+            denied: str | RC = self.authorization.authorize_user(perm, entered_by, user_company_id, user_email)
+            if isinstance(denied, RC):
+                return denied
             return RC(E_RC.RC_INVALID_INPUT, 'No punch-in found for today. Please manually add a punch-in entry.\naction_required manual_punch_in')
 
+        presence_registry.punch_changed(user_email, company_id, timestamp.uuid, timestamp.punch_in_timestamp, timestamp.punch_out_timestamp)
+        return self._after_timestamp_write(RC(E_RC.RC_OK, "Succefully updated in time_stamps DB"), user_email, company_id, timestamp.punch_in_timestamp)
+
     def edit_timestamp(self, timestamp_uuid: str, punch_in_timestamp_str: str,
                        punch_out_timestamp_str: str, punch_type: int,
                        detail: str, reporting_type: str,
@@ -157,6 +160,7 @@ class TimeStampService(BaseService):
             if current_user_email != timestamp.user_email:
                 return RC(E_RC.RC_UNAUTHORIZED, 'Unauthorized access')
 
+        previous_punch_in: datetime = timestamp.punch_in_timestamp
         if punch_in_timestamp_str:
             punch_in_timestamp = self._iso_str_to_utc_datetime(punch_in_timestamp_str)
             if isinstance(punch_in_timestamp, RC):
@@ -178,7 +182,11 @@ class TimeStampService(BaseService):
 
         timestamp.entered_by = current_user_email
         
-        return self._update(self.timestamp_repository, timestamp)
+        rc: RC = self._update(self.timestamp_repository, timestamp)
+        if rc.is_ok():
+            presence_registry.punch_changed(timestamp.user_email, timestamp.user.company_id, timestamp.uuid,
+                                            timestamp.punch_in_timestamp, timestamp.punch_out_timestamp)
+        return self._after_timestamp_write(rc, timestamp.user_email, timestamp.user.company_id, previous_punch_in, timestamp.punch_in_timestamp)
 
     def delete_timestamp(self, uuid: str, current_user_email: str,
                          user_permission: int, user_company_id: str) -> RC:
@@ -199,7 +207,10 @@ class TimeStampService(BaseService):
         if perm.is_employer() and user_company_id != timestamp.user.company_id:
             return RC(E_RC.RC_UNAUTHORIZED, 'Unauthorized access')
 
-        return self._delete(self.timestamp_repository, timestamp)
+        rc: RC = self._delete(self.timestamp_repository, timestamp)
+        if rc.is_ok():
+            presence_registry.punch_deleted(timestamp.user_email, timestamp.uuid)
+        return self._after_timestamp_write(rc, timestamp.user_email, timestamp.user.company_id, timestamp.punch_in_timestamp)
 
     def get_timestamps_range(self, user_email: str, start_date_str: str,
                              end_date_str: str, current_user_email: str,
@@ -213,29 +224,48 @@ class TimeStampService(BaseService):
         if isinstance(perm, RC):
             return perm
 
-        requested_user: User | RC = self.user_repository.get_user_by_email(email=user_email)
-        if isinstance(requested_user, RC):
-            return requested_user
+        company_id: str | RC = self.authorization.authorize_user(perm, current_user_email, user_company_id, user_email)
+        if isinstance(company_id, RC):
+            return company_id
 
-        if perm.is_employer() and (str(requested_user.company_id) != user_company_id):
-            return RC(E_RC.RC_UNAUTHORIZED, 'Unauthorized access')
-            
-        elif perm.is_employee() and (current_user_email != user_email):
-            return RC(E_RC.RC_UNAUTHORIZED, 'Unauthorized access')
+        start_date = self._iso_str_to_utc_datetime(start_date_str)
+        end_date = self._iso_str_to_utc_datetime(end_date_str)
+        if isinstance(start_date, RC) or isinstance(end_date, RC):
+            return start_date if isinstance(start_date, RC) else end_date
+        
+        if end_date < start_date:
+                return RC(E_RC.RC_INVALID_INPUT, 'Start date must earlier than end date')
+        
+        return self.timestamp_repository.get_range_dicts(start_date, end_date, user_email)
+
+    def export_timestamps_range(self, user_email: str, start_date_str: str,
+                                end_date_str: str, current_user_email: str,
+                                user_permission: int,
+                                user_company_id: str) -> Iterator[dict] | RC:
+        """
+        Same checks as get_timestamps_range, but returns a generator that streams the
+        timestamps as dicts instead of building the whole list.
+        """
+        if not user_email or not start_date_str or not end_date_str:
+                return RC(E_RC.RC_INVALID_INPUT, 'Missing start_date or end_date')
+        
+        perm: Permission = Permission(user_permission)
+        if isinstance(perm, RC):
+            return perm
+
+        company_id: str | RC = self.authorization.authorize_user(perm, current_user_email, user_company_id, user_email)
+        if isinstance(company_id, RC):
+            return company_id
 
         start_date = self._iso_str_to_utc_datetime(start_date_str)
         end_date = self._iso_str_to_utc_datetime(end_date_str)
         if isinstance(start_date, RC) or isinstance(end_date, RC):
-            return start_date
+            return start_date if isinstance(start_date, RC) else end_date
         
         if end_date < start_date:
                 return RC(E_RC.RC_INVALID_INPUT, 'Start date must earlier than end date')
         
-        timestamps = self.timestamp_repository.get_range(start_date, end_date, requested_user.email)
-        if isinstance(timestamps, RC):
-            return timestamps
-            
-        return [timestamp.to_dict() for timestamp in timestamps]
+        return (TimeStamp.row_to_dict(row) for row in self.timestamp_repository.iter_range(start_date, end_date, user_email))
 
     def check_punch_in_status(self, user_email: str, current_user_email ,user_permission: int,
                               user_company_id: str) -> bool | RC:
@@ -247,17 +277,22 @@ class TimeStampService(BaseService):
         if perm.is_employee() and user_email != current_user_email:
             return RC(E_RC.RC_UNAUTHORIZED, 'Unauthorized access')
 
-        user: User | RC = self.user_repository.get_user_by_email(email=user_email)
-        if isinstance(user, RC):
-            return user
-
-        if perm.is_employer() and user_company_id != user.company_id:
-            return RC(E_RC.RC_UNAUTHORIZED, 'Unauthorized access')
-
         today = datetime.now(timezone.utc).date()
         start_of_day = datetime.combine(today, datetime.min.time()).replace(tzinfo=timezone.utc)
         end_of_day = datetime.combine(today, datetime.max.time()).replace(tzinfo=timezone.utc)
-            
+
+        # Answered from memory when the user is the caller, or has an open punch the caller may see.
+        # Other users are checked against their cached company
+        if presence_registry.is_warm():
+            presence = presence_registry.get(user_email)
+            if user_email == current_user_email or \
+                    (presence and (perm.is_net_admin() or (perm.is_employer() and presence.company_id == user_company_id))):
+                return presence_registry.has_open_punch(user_email, start_of_day, end_of_day)
+
+        company_id: str | RC = self.authorization.authorize_user(perm, current_user_email, user_company_id, user_email)
+        if isinstance(company_id, RC):
+            return company_id
+
         timestamp: TimeStamp | RC = self.timestamp_repository.check_punch_in_status(user_email, start_of_day, end_of_day)
         if isinstance(timestamp, RC):
             return timestamp
@@ -267,8 +302,13 @@ class TimeStampService(BaseService):
         else:
             return False
         
-    def get_all_timestamps(self, user_permission: int) -> list | RC:
-        
+    def get_all_timestamps(self, user_permission: int, limit: str = None, cursor: str = None, user_email: str = None,
+                           company_id: str = None, start_date_str: str = None, end_date_str: str = None) -> list | dict | RC:
+        """
+        Returns every timestamp, or with a limit or cursor a keyset page ordered by
+        (punch_in_timestamp, uuid) as {'items': [...], 'next_cursor': str | None}.
+        The user, company and date filters apply to pages.
+        """
         perm: Permission = Permission(user_permission)
         if isinstance(perm, RC):
             return perm
@@ -276,10 +316,100 @@ class TimeStampService(BaseService):
         if not perm.is_net_admin():
             return RC(E_RC.RC_UNAUTHORIZED, 'Unauthorized access')
 
-        timestamps = self.timestamp_repository.get_all_timestamps()
-        return [timestamp.to_dict() for timestamp in timestamps]
+        if limit is None and cursor is None:
+            timestamps = self.timestamp_repository.get_all_timestamps()
+            return [timestamp.to_dict() for timestamp in timestamps]
+
+        page = parse_page(limit, cursor, datetime.fromisoformat, UUID)
+        if isinstance(page, RC):
+            return page
+        limit, after = page
+
+        start_date = self._iso_str_to_utc_datetime(start_date_str)
+        end_date = self._iso_str_to_utc_datetime(end_date_str)
+        if isinstance(start_date, RC) or isinstance(end_date, RC):
+            return start_date if isinstance(start_date, RC) else end_date
+
+        rows: list[dict] | RC = self.timestamp_repository.get_page_dicts(limit + 1, after, user_email, company_id, start_date, end_date)
+        if isinstance(rows, RC):
+            return rows
+
+        return page_result(rows, limit, lambda row: (row['punch_in_timestamp'], row['uuid']))
     
 
+    def _save_timestamps(self, timestamps: list[TimeStamp], atomic: bool = False) -> dict | RC:
+        """
+        Bulk inserts timestamps with BaseService._save_many, then runs the hooks of create_timestamp
+        for the inserted ones. Timestamps without a uuid get one, so the presence registry can track them.
+        """
+        for timestamp in timestamps:
+            if timestamp.uuid is None:
+                timestamp.uuid = str(uuid4())
+        return self._after_timestamps_write(self._save_many(self.timestamp_repository, timestamps, atomic), timestamps)
+
+    def _update_timestamps(self, timestamps: list[TimeStamp], atomic: bool = False) -> dict | RC:
+        """
+        Bulk updates timestamps with BaseService._update_many, then runs the hooks of edit_timestamp
+        for the updated ones. The day a punch moved from is refreshed too when it was loaded with
+        track_changes(), as get_timestamp_by_uuid does.
+        """
+        return self._after_timestamps_write(self._update_many(self.timestamp_repository, timestamps, atomic), timestamps)
+
+    def _delete_timestamps(self, timestamps: list[TimeStamp], atomic: bool = False) -> dict | RC:
+        return self._after_timestamps_write(self._delete_many(self.timestamp_repository, timestamps, atomic), timestamps, deleted=True)
+
+    def _after_timestamps_write(self, result: dict | RC, timestamps: list[TimeStamp], deleted: bool = False) -> dict | RC:
+        """
+        Updates the presence registry for every written timestamp, then refreshes the daily totals
+        and report cache once per user for all the punch-in days written.
+        """
+        if isinstance(result, RC) or not result['written']:
+            return result
+
+        failed: set[int] = {failure['index'] for failure in result['failed']}
+        punch_ins: dict[tuple[str, str], set[datetime]] = {}
+        for index, timestamp in enumerate(timestamps):
+            if index in failed:
+                continue
+
+            company_id: str = self._company_of(timestamp)
+            if deleted:
+                presence_registry.punch_deleted(timestamp.user_email, timestamp.uuid)
+            else:
+                presence_registry.punch_changed(timestamp.user_email, company_id, timestamp.uuid,
+                                                timestamp.punch_in_timestamp, timestamp.punch_out_timestamp)
+            punch_ins.setdefault((timestamp.user_email, company_id), set()).update(
+                (timestamp.original_value('punch_in_timestamp'), timestamp.punch_in_timestamp))
+
+        for (user_email, company_id), days in punch_ins.items():
+            self._after_timestamp_write(RC(E_RC.RC_OK, "Succefully written to time_stamps DB"), user_email, company_id, *days)
+
+        return result
+
+    def _company_of(self, timestamp: TimeStamp) -> str | None:
+        if timestamp.user is not None:
+            return timestamp.user.company_id
+
+        company_id: str | RC = self.user_repository.get_user_company_id(timestamp.user_email)
+        return None if isinstance(company_id, RC) else company_id
+
+    def _after_timestamp_write(self, rc: RC, user_email: str, company_id: str, *punch_ins: datetime) -> RC:
+        """
+        Once a timestamp write succeeded, recomputes the user_daily_totals rows of the given
+        punch-in days, then drops the cached reports covering them so no report is cached from
+        the rows being replaced.
+        A failed refresh is only logged: the timestamp is saved, and failing the request would make
+        clients retry and punch twice. The days stay stale until written again or backfilled.
+        """
+        if rc.is_ok():
+            refresh_rc: RC = self.daily_totals_repository.refresh_days(user_email, list(punch_ins))
+            if not refresh_rc.is_ok():
+                print(f"error: user_daily_totals refresh failed for {user_email}: {refresh_rc}")
+
+            report_cache.invalidate_punches(user_email, company_id, list(punch_ins))
+
+        return rc
+
     def _iso_str_to_utc_datetime(self, date_str: str):
         try:
             if date_str and not isinstance(date_str, datetime):
@@ -1,6 +1,5 @@
 from classes.dataclass.User import User
 from cmn_utils import *
-import bcrypt
 from classes.validators.ModelValidator import ModelValidator
 from classes.repositories.UserRepository import UserRepository
 from classes.repositories.CompanyRepository import CompanyRepository
@@ -8,6 +7,12 @@ from classes.factories.DomainClassFactory import DomainClassFactory
 from classes.dataclass.Company import Company
 from classes.utilities.Permission import Permission
 from classes.utilities.RC import RC, E_RC
+from classes.utilities.ReportCache import report_cache
+from classes.utilities.PresenceRegistry import presence_registry
+from classes.utilities.CompanyDirectory import company_directory
+from classes.utilities.UserCache import user_cache
+from classes.utilities.PasswordHasher import password_hasher
+from classes.utilities.Pagination import parse_page, page_result
 from classes.services.BaseServiceClass import BaseService
 
 
@@ -43,6 +48,10 @@ class UserService(BaseService):
         if not isinstance(existing_user, RC):
             return RC(E_RC.RC_INVALID_INPUT, 'User email already exists')
 
+        pass_hash: str | RC = password_hasher.hash(password)
+        if isinstance(pass_hash, RC):
+            return pass_hash
+
         # Create new user object
         user_data = {
             'email': email,
@@ -51,7 +60,7 @@ class UserService(BaseService):
             'company_id': company.company_id, 
             'role': role,
             'permission': permission,
-            'pass_hash': bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8'),
+            'pass_hash': pass_hash,
             'is_active': True,
             'salary': float(salary),
             'work_capacity': float(work_capacity),
@@ -64,7 +73,7 @@ class UserService(BaseService):
         if isinstance(new_user, RC):
             return new_user
 
-        return self._save(self.user_repository, new_user)
+        return self._after_user_write(self._save(self.user_repository, new_user), new_user)
 
     def update_user(self, user_email: str, user_permission: int, first_name: str = None, last_name: str = None,
                     company_id: str = None, role: str = None, permission: int = None,
@@ -83,6 +92,7 @@ class UserService(BaseService):
         if isinstance(user, RC):
             return user
 
+        previous_company_id: str = user.company_id
         if first_name:
             user.first_name = first_name
         if last_name:
@@ -96,7 +106,10 @@ class UserService(BaseService):
         if mobile_phone:
             user.mobile_phone = mobile_phone
         if password:
-            user.pass_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+            pass_hash: str | RC = password_hasher.hash(password)
+            if isinstance(pass_hash, RC):
+                return pass_hash
+            user.pass_hash = pass_hash
         if salary is not None:
             user.salary = float(salary)
         if work_capacity is not None:
@@ -108,7 +121,7 @@ class UserService(BaseService):
         if weekend_choice:
             user.weekend_choice = weekend_choice
 
-        return self._update(self.user_repository, user)
+        return self._after_user_write(self._update(self.user_repository, user), user, previous_company_id)
 
 
     def delete_user(self, user_permission, user_email: str, employment_end_str: str = None) -> RC:
@@ -128,7 +141,7 @@ class UserService(BaseService):
         user.is_active = False
         user.employment_end = iso2datetime(employment_end_str)
         
-        return self._update(self.user_repository, user)
+        return self._after_user_write(self._update(self.user_repository, user), user)
 
     def change_password(self, user_permission: int, current_user_email: str, current_user_company: int, user_email: str, new_password: str) -> RC:
         
@@ -144,8 +157,15 @@ class UserService(BaseService):
             (perm.is_employer() and current_user_company == user.company_id) or \
                 (perm.is_employee() and current_user_email == user.email):
                     
-            user.pass_hash=bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-            return self._update(self.user_repository, user)
+            pass_hash: str | RC = password_hasher.hash(new_password)
+            if isinstance(pass_hash, RC):
+                return pass_hash
+
+            user.pass_hash = pass_hash
+            rc: RC = self._update(self.user_repository, user)
+            if rc.is_ok():
+                user_cache.invalidate(user.email)
+            return rc
         
         return RC(E_RC.RC_UNAUTHORIZED, "Unauthorized access")
     
@@ -165,7 +185,7 @@ class UserService(BaseService):
         user.is_active = True
         user.employment_end = None
         
-        return self._update(self.user_repository, user)
+        return self._after_user_write(self._update(self.user_repository, user), user)
 
     def get_user_by_email(self, user_permission: int, current_user_email: str, user_company_id, requested_user_email: str) -> RC|dict:
         
@@ -186,74 +206,97 @@ class UserService(BaseService):
 
         return requested_user.to_dict()
     
-    def get_active_users(self, user_permission: int, user_company_id: str = None) -> list:
+    def get_active_users(self, user_permission: int, user_company_id: str = None, limit: str = None, cursor: str = None) -> list | dict:
         
         perm: Permission = Permission(user_permission)
         if isinstance(perm, RC):
             return perm
         
         if perm.is_net_admin():
-            active_users: list[User] = self.user_repository.get_active_users()
+            user_data: list[dict] = self._get_user_dicts(None, True, limit, cursor)
         elif perm.is_employer:
             if not user_company_id:
                 return RC(E_RC.RC_INVALID_INPUT, "No user company id found")
             
-            active_users: list[User] = self.user_repository.get_active_users(user_company_id)
+            user_data: list[dict] = self._get_user_dicts(user_company_id, True, limit, cursor)
         else:
             return RC(E_RC.RC_UNAUTHORIZED, "Unauthorized access")
 
-        user_data = []
-        for user in active_users:
-            user_dict = user.to_dict()
-            user_dict['company_name'] = self.company_repository.get_company_by_id(user.company_id).company_name
-            user_data.append(user_dict)
-
         return user_data
     
-    def get_inactive_users(self, user_permission: int, user_company_id: str = None) -> list:
+    def get_inactive_users(self, user_permission: int, user_company_id: str = None, limit: str = None, cursor: str = None) -> list | dict:
         
         perm: Permission = Permission(user_permission)
         if isinstance(perm, RC):
             return perm
         
         if perm.is_net_admin():
-            active_users: list[User] = self.user_repository.get_inactive_users()
+            user_data: list[dict] = self._get_user_dicts(None, False, limit, cursor)
         elif perm.is_employer:
             if not user_company_id:
                 return RC(E_RC.RC_INVALID_INPUT, "No user company id found")
             
-            active_users: list[User] = self.user_repository.get_inactive_users(user_company_id)
+            user_data: list[dict] = self._get_user_dicts(user_company_id, False, limit, cursor)
         else:
             return RC(E_RC.RC_UNAUTHORIZED, "Unauthorized access")
 
-        user_data = []
-        for user in active_users:
-            user_dict = user.to_dict()
-            user_dict['company_name'] = self.company_repository.get_company_by_id(user.company_id).company_name
-            user_data.append(user_dict)
-
         return user_data
 
-    def get_all_users(self, user_permission: int, user_company_id: str = None) -> list:
+    def get_all_users(self, user_permission: int, user_company_id: str = None, limit: str = None, cursor: str = None) -> list | dict:
         
         perm: Permission = Permission(user_permission)
         if isinstance(perm, RC):
             return perm
         
         if perm.is_net_admin:
-            users: list[User] = self.user_repository.get_users()  
+            user_data: list[dict] = self._get_user_dicts(None, None, limit, cursor)
             
         elif perm.is_employer():
             if not user_company_id:
                 return RC(E_RC.RC_INVALID_INPUT, "No user company id found")
-            users: list[User] = self.user_repository.get_active_users(user_company_id)
+            user_data: list[dict] = self._get_user_dicts(user_company_id, True, limit, cursor)
         else:
             return RC(E_RC.RC_UNAUTHORIZED, "Unauthorized access")
 
-        user_data = []
-        for user in users:
-            user_dict = user.to_dict()
-            user_dict['company_name'] = self.company_repository.get_company_by_id(user.company_id).company_name
-            user_data.append(user_dict)
+        return user_data
+
+    def _get_user_dicts(self, company_id: str, is_active: bool, limit: str, cursor: str) -> list | dict | RC:
+        """
+        The user listing, or with a limit or cursor a keyset page ordered by email
+        as {'items': [...], 'next_cursor': str | None}.
+        """
+        if limit is None and cursor is None:
+            return self.user_repository.get_user_dicts(company_id, is_active)
+
+        page = parse_page(limit, cursor, str)
+        if isinstance(page, RC):
+            return page
+        limit, after = page
+
+        rows: list[dict] | RC = self.user_repository.get_user_dicts(company_id, is_active, limit + 1, after)
+        if isinstance(rows, RC):
+            return rows
+
+        return page_result(rows, limit, lambda row: (row['email'],))
+
+    def cache_stats(self, user_permission: int) -> dict | RC:
+        perm: Permission = Permission(user_permission)
+        if not perm.is_net_admin():
+            return RC(E_RC.RC_UNAUTHORIZED, "Unauthorized access")
+
+        return {'user_cache': user_cache.stats(), 'company_directory': company_directory.stats(), 'password_hasher': password_hasher.stats()}
+
+    def _after_user_write(self, rc: RC, user: User, *previous_company_ids: str) -> RC:
+        """
+        Drops the cached user and the cached reports of the user and of the user's companies once a user
+        write succeeded, and moves the user's open punches to the new company when it changed.
+        The company directory is dropped too, since the write may add, change or remove an admin.
+        """
+        if rc.is_ok():
+            user_cache.invalidate(user.email)
+            report_cache.invalidate_user(user.email, user.company_id, *previous_company_ids)
+            company_directory.invalidate()
+            if any(str(company_id) != str(user.company_id) for company_id in previous_company_ids):
+                presence_registry.user_changed(user.email, user.company_id)
 
-        return user_data
\ No newline at end of file
+        return rc
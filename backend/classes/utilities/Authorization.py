@@ -0,0 +1,58 @@
+from classes.utilities.Permission import Permission
+from classes.utilities.RC import RC, E_RC
+from dataclasses import dataclass
+from typing import Callable
+
+
+@dataclass(slots=True, frozen=True)
+class AccessScope:
+    """
+    The users a caller may act on, compiled from the JWT claims for the repositories to
+    apply as a WHERE clause (BaseRepository._scope_filter). No restriction for net admins.
+    """
+    user_email: str = None
+    company_id: str = None
+
+
+class Authorization:
+    """
+    Decides whether a caller may act on a user from the JWT claims, so the common case of
+    a user acting on themselves needs no query and the others need the user's company only.
+
+    company_of looks up the company id of an email or returns an RC
+    (UserRepository.get_user_company_id, served from user_cache).
+    """
+
+    def __init__(self, company_of: Callable[[str], str | RC]):
+        self.company_of = company_of
+
+    def authorize_user(self, perm: Permission, current_user_email: str, user_company_id: str, user_email: str) -> str | RC:
+        """
+        Checks that the caller may act on user_email: net admins on anyone, employers on the
+        users of their company and employees on themselves.
+
+        Returns:
+            str | RC: The company id of the user, or RC_UNAUTHORIZED / RC_NOT_FOUND.
+        """
+        if user_email == current_user_email:
+            return user_company_id
+
+        if not (perm.is_net_admin() or perm.is_employer()):
+            return RC(E_RC.RC_UNAUTHORIZED, 'Unauthorized access')
+
+        company_id = self.company_of(user_email)
+        if isinstance(company_id, RC):
+            return company_id
+
+        if perm.is_employer() and str(company_id) != str(user_company_id):
+            return RC(E_RC.RC_UNAUTHORIZED, 'Unauthorized access')
+
+        return company_id
+
+    @staticmethod
+    def scope(perm: Permission, current_user_email: str, user_company_id: str) -> AccessScope:
+        if perm.is_net_admin():
+            return AccessScope()
+        if perm.is_employer():
+            return AccessScope(company_id=user_company_id)
+        return AccessScope(user_email=current_user_email)
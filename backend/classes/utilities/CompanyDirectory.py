@@ -0,0 +1,107 @@
+from classes.dataclass.Company import Company
+from classes.dataclass.User import User
+from classes.utilities.PgNotifier import PgNotifier
+from classes.utilities.RC import RC
+from dataclasses import dataclass
+from sqlalchemy.engine import Engine
+from config import Config
+from typing import Callable
+import threading
+import time
+
+COMPANY_DIRECTORY_CHANNEL = 'company_directory'
+
+
+@dataclass(slots=True)
+class DirectorySnapshot:
+    expires_at: float
+    companies_by_id: dict[str, Company]
+    company_ids_by_name: dict[str, str]
+    # Active admins (employers and net admins) of each company, ordered by email
+    admins_by_company: dict[str, list[User]]
+
+
+class CompanyDirectory:
+    """
+    Process-local snapshot of every company and of each company's admins with a time to live,
+    so CompanyRepository answers the per-request company lookups with dict hits.
+
+    The whole snapshot is dropped by company writes and by user writes that can change the
+    admins, and the other workers are told to drop theirs over Postgres LISTEN/NOTIFY.
+    The snapshot is reloaded by the next lookup with two queries.
+    """
+
+    def __init__(self, ttl_seconds: int, notifier: PgNotifier):
+        self.ttl_seconds = ttl_seconds
+        self.notifier = notifier
+        self._snapshot: DirectorySnapshot = None
+        self._generation: int = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+        self.invalidations = 0
+        notifier.subscribe(on_message=lambda message: self._drop(), on_connect=self._drop)
+
+    def start(self, engine: Engine) -> None:
+        self.notifier.start(engine)
+
+    def get(self, load: Callable[[], tuple[list[Company], dict[str, list[User]]] | RC]) -> DirectorySnapshot | None:
+        """
+        Returns the current snapshot, loading it with load when it is missing or expired.
+        Returns None when the directory is disabled or the load failed, for the caller to query the database.
+        """
+        snapshot: DirectorySnapshot = self._snapshot
+        if snapshot is not None and snapshot.expires_at > time.monotonic():
+            self.hits += 1
+            return snapshot
+
+        if self.ttl_seconds <= 0:
+            return None
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.expires_at > time.monotonic():
+                return snapshot
+
+            generation = self._generation
+            loaded = load()
+            if isinstance(loaded, RC):
+                return None
+
+            companies, admins_by_company = loaded
+            company_ids_by_name: dict[str, str] = {}
+            for company in companies:
+                company_ids_by_name.setdefault(company.company_name, company.company_id)
+
+            snapshot = DirectorySnapshot(time.monotonic() + self.ttl_seconds, {company.company_id: company for company in companies},
+                                         company_ids_by_name, admins_by_company)
+            self.loads += 1
+            # An invalidation that arrived while loading may not be reflected, so the snapshot serves this call only
+            if generation == self._generation:
+                self._snapshot = snapshot
+            return snapshot
+
+    def invalidate(self) -> None:
+        """
+        Drops the snapshot of this worker and of the other workers.
+        """
+        self._drop()
+        self.notifier.notify({'type': 'invalidate'})
+
+    def stats(self) -> dict:
+        snapshot: DirectorySnapshot = self._snapshot
+        return {
+            'companies': len(snapshot.companies_by_id) if snapshot else 0,
+            'ttl_seconds': self.ttl_seconds,
+            'hits': self.hits,
+            'loads': self.loads,
+            'invalidations': self.invalidations,
+        }
+
+    def _drop(self) -> None:
+        self._generation += 1
+        self._snapshot = None
+        self.invalidations += 1
+
+
+company_directory = CompanyDirectory(int(Config.COMPANY_DIRECTORY_TTL), PgNotifier(COMPANY_DIRECTORY_CHANNEL))
@@ -0,0 +1,60 @@
+from typing import Iterable, Iterator
+import csv
+import io
+import json
+
+CSV = 'csv'
+NDJSON = 'ndjson'
+
+MIMETYPES = {
+    CSV: 'text/csv',
+    NDJSON: 'application/x-ndjson',
+}
+
+
+def flatten(row: dict) -> dict:
+    """
+    Merges nested dicts into the top level and drops list values, so a report entry fits in one CSV line.
+    """
+    flat = {}
+    for key, value in row.items():
+        if isinstance(value, dict):
+            flat.update(value)
+        elif not isinstance(value, list):
+            flat[key] = value
+    return flat
+
+
+def csv_lines(rows: Iterable[dict], fieldnames: list[str] = None) -> Iterator[str]:
+    """
+    Yields a CSV document one line at a time. Without fieldnames the header is taken from the first row.
+    """
+    buffer = io.StringIO()
+    writer: csv.DictWriter = None
+    for row in rows:
+        row = flatten(row)
+        if writer is None:
+            writer = csv.DictWriter(buffer, fieldnames=fieldnames or list(row.keys()), extrasaction='ignore')
+            writer.writeheader()
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+
+    if writer is None and fieldnames:
+        csv.DictWriter(buffer, fieldnames=fieldnames).writeheader()
+        yield buffer.getvalue()
+
+
+def ndjson_lines(rows: Iterable[dict]) -> Iterator[str]:
+    """
+    Yields one JSON document per line.
+    """
+    for row in rows:
+        yield json.dumps(row, default=str) + '\n'
+
+
+def export_lines(rows: Iterable[dict], export_format: str, fieldnames: list[str] = None) -> Iterator[str]:
+    if export_format == CSV:
+        return csv_lines(rows, fieldnames)
+    return ndjson_lines(rows)
@@ -0,0 +1,10 @@
+from enum import Enum
+
+
+class E_LOAD(str, Enum):
+    """
+    How a repository loads the relationships nested in the domain classes it returns.
+    """
+    joined = 'joined'      # in the same SELECT through a LEFT OUTER JOIN
+    selectin = 'selectin'  # with one extra SELECT ... WHERE pk IN (...) per relationship
+    none = 'none'          # not at all, the nested domain objects are left None
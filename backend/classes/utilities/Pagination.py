@@ -0,0 +1,57 @@
+from classes.utilities.RC import RC, E_RC
+from config import Config
+from typing import Callable
+import base64
+import binascii
+import json
+
+
+def encode_cursor(*values) -> str:
+    """
+    Encodes the sort key of the last row of a page as an opaque url safe token.
+    """
+    return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, *types: Callable) -> tuple | RC:
+    """
+    Decodes a token of encode_cursor() and converts its values with the given types.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError(cursor)
+        return tuple(convert(value) for convert, value in zip(types, values))
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        return RC(E_RC.RC_INVALID_INPUT, "Invalid cursor")
+
+
+def parse_page(limit: str, cursor: str, *types: Callable) -> tuple[int, tuple] | RC:
+    """
+    Validates the limit and cursor request arguments of a keyset page.
+
+    Returns:
+        tuple[int, tuple] | RC: The page size and the decoded sort key to continue after (None for the first page).
+    """
+    try:
+        limit = int(limit) if limit else int(Config.PAGE_DEFAULT_LIMIT)
+    except ValueError:
+        return RC(E_RC.RC_INVALID_INPUT, "Invalid limit")
+
+    if limit < 1 or limit > int(Config.PAGE_MAX_LIMIT):
+        return RC(E_RC.RC_INVALID_INPUT, f"limit must be between 1 and {Config.PAGE_MAX_LIMIT}")
+
+    after = decode_cursor(cursor, *types) if cursor else None
+    if isinstance(after, RC):
+        return after
+
+    return limit, after
+
+
+def page_result(rows: list[dict], limit: int, key: Callable[[dict], tuple]) -> dict:
+    """
+    Builds the response of a page from up to limit + 1 rows: the extra row only tells there is a next page.
+    """
+    items = rows[:limit]
+    next_cursor = encode_cursor(*key(items[-1])) if len(rows) > limit else None
+    return {'items': items, 'next_cursor': next_cursor}
@@ -0,0 +1,126 @@
+from classes.utilities.RC import RC, E_RC
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from cmn_utils import print_exception
+from config import Config
+import bcrypt
+import multiprocessing
+import threading
+
+
+def hash_password(password: bytes, rounds: int) -> bytes:
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+
+
+def check_password(password: bytes, pass_hash: bytes) -> bool:
+    return bcrypt.checkpw(password, pass_hash)
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a dedicated pool of worker processes, so a login storm saturates a
+    fixed number of cores instead of every request worker.
+
+    At most max_pending hashes are queued or running per worker; past that, and when a hash
+    does not finish within timeout_seconds, callers get an RC_SERVICE_UNAVAILABLE right away
+    rather than waiting. workers 0 hashes inline in the calling thread with the same limit.
+    """
+
+    def __init__(self, workers: int, max_pending: int, rounds: int, timeout_seconds: float):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.rounds = rounds
+        self.timeout_seconds = timeout_seconds
+        self._executor: ProcessPoolExecutor = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.completed = 0
+        self.shed = 0
+        self.timeouts = 0
+
+    def hash(self, password: str) -> str | RC:
+        """
+        Hashes a password with the configured cost factor.
+        """
+        result = self._run(hash_password, password.encode('utf-8'), self.rounds)
+        return result if isinstance(result, RC) else result.decode('utf-8')
+
+    def verify(self, password: str, pass_hash: str) -> bool | RC:
+        return self._run(check_password, password.encode('utf-8'), pass_hash.encode('utf-8'))
+
+    def needs_rehash(self, pass_hash: str) -> bool:
+        """
+        Tells whether a hash was made with another cost factor than the configured one,
+        read from its '$2b$<rounds>$...' prefix.
+        """
+        try:
+            return int(pass_hash.split('$')[2]) != self.rounds
+        except (IndexError, ValueError):
+            return False
+
+    def stats(self) -> dict:
+        return {
+            'workers': self.workers,
+            'rounds': self.rounds,
+            'pending': self._pending,
+            'max_pending': self.max_pending,
+            'completed': self.completed,
+            'shed': self.shed,
+            'timeouts': self.timeouts,
+        }
+
+    def _run(self, function, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.shed += 1
+                return RC(E_RC.RC_SERVICE_UNAVAILABLE, 'Server busy, please try again')
+            self._pending += 1
+
+        if self.workers <= 0:
+            try:
+                return function(*args)
+            except Exception as e:
+                return self._failed(e)
+            finally:
+                self._done(None)
+
+        try:
+            future: Future = self._get_executor().submit(function, *args)
+        except Exception as e:
+            self._done(None)
+            return self._failed(e)
+
+        # The slot is released when the hash finishes, not when the caller gives up waiting
+        future.add_done_callback(self._done)
+        try:
+            return future.result(timeout=self.timeout_seconds)
+        except TimeoutError:
+            self.timeouts += 1
+            return RC(E_RC.RC_SERVICE_UNAVAILABLE, 'Server busy, please try again')
+        except Exception as e:
+            return self._failed(e)
+
+    def _done(self, future: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+            self.completed += 1
+
+    def _failed(self, e: Exception) -> RC:
+        print_exception(e)
+        if isinstance(e, BrokenProcessPool):
+            # A killed worker breaks the whole pool, the next call starts a new one
+            with self._lock:
+                self._executor = None
+            return RC(E_RC.RC_SERVICE_UNAVAILABLE, 'Server busy, please try again')
+        return RC(E_RC.RC_ERROR_DATABASE, 'Server error')
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn, since forking a threaded server with open connections is unsafe
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'))
+            return self._executor
+
+
+password_hasher = PasswordHasher(int(Config.PASSWORD_HASH_WORKERS), int(Config.PASSWORD_HASH_MAX_PENDING),
+                                 int(Config.BCRYPT_ROUNDS), float(Config.PASSWORD_HASH_TIMEOUT))
@@ -0,0 +1,99 @@
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from cmn_utils import print_exception
+from typing import Callable
+import json
+import select
+import threading
+import time
+import uuid
+
+
+class PgNotifier:
+    """
+    Broadcasts small JSON messages to the other workers over a Postgres LISTEN/NOTIFY channel.
+
+    Every worker listens on a dedicated connection in a daemon thread and hands the messages of
+    the other workers to the subscribed callbacks; its own messages are skipped since it applied
+    them before notifying. Messages sent while the connection is down are lost, so the on_connect
+    callbacks run each time LISTEN is (re)established to let subscribers reload their state.
+    """
+
+    def __init__(self, channel: str, poll_seconds: float = 5.0, retry_seconds: float = 5.0):
+        self.channel = channel
+        self.poll_seconds = poll_seconds
+        self.retry_seconds = retry_seconds
+        self.sender: str = uuid.uuid4().hex
+        self._on_message: list[Callable[[dict], None]] = []
+        self._on_connect: list[Callable[[], None]] = []
+        self._engine: Engine = None
+        self._thread: threading.Thread = None
+        self._lock = threading.Lock()
+
+    def subscribe(self, on_message: Callable[[dict], None] = None, on_connect: Callable[[], None] = None) -> None:
+        if on_message:
+            self._on_message.append(on_message)
+        if on_connect:
+            self._on_connect.append(on_connect)
+
+    def start(self, engine: Engine) -> bool:
+        """
+        Starts the listener thread once. Returns False when the database is not Postgres
+        and nothing is listened to, in which case notify() does nothing.
+        """
+        with self._lock:
+            if self._thread is None and engine.dialect.name == 'postgresql':
+                self._engine = engine
+                self._thread = threading.Thread(target=self._listen, name=f'pg-notify-{self.channel}', daemon=True)
+                self._thread.start()
+            return self._thread is not None
+
+    def notify(self, message: dict) -> None:
+        if self._engine is None:
+            return
+
+        payload = json.dumps({'sender': self.sender, **message}, default=str)
+        try:
+            with self._engine.connect() as conn:
+                conn.execute(text('SELECT pg_notify(:channel, :payload)'), {'channel': self.channel, 'payload': payload})
+                conn.commit()
+        except Exception as e:
+            print_exception(e)
+
+    def _listen(self) -> None:
+        while True:
+            try:
+                connection = self._engine.raw_connection()
+                # The listener keeps its connection for good, so it is taken out of the pool
+                connection.detach()
+                try:
+                    dbapi_connection = connection.dbapi_connection
+                    dbapi_connection.autocommit = True
+                    with dbapi_connection.cursor() as cursor:
+                        cursor.execute(f'LISTEN "{self.channel}"')
+
+                    for on_connect in self._on_connect:
+                        on_connect()
+
+                    while True:
+                        if select.select([dbapi_connection], [], [], self.poll_seconds) == ([], [], []):
+                            continue
+                        dbapi_connection.poll()
+                        while dbapi_connection.notifies:
+                            self._dispatch(dbapi_connection.notifies.pop(0).payload)
+                finally:
+                    connection.close()
+
+            except Exception as e:
+                print_exception(e)
+                time.sleep(self.retry_seconds)
+
+    def _dispatch(self, payload: str) -> None:
+        try:
+            message: dict = json.loads(payload)
+            if message.get('sender') == self.sender:
+                return
+            for on_message in self._on_message:
+                on_message(message)
+        except Exception as e:
+            print_exception(e)
@@ -0,0 +1,153 @@
+from classes.repositories.TimeStampRepository import TimeStampRepository
+from classes.utilities.PgNotifier import PgNotifier
+from classes.utilities.RC import RC
+from cmn_utils import datetime2iso, iso2datetime
+from dataclasses import dataclass, field
+from datetime import datetime, timezone, time
+from config import Config
+from flask import Flask
+import threading
+
+PRESENCE_CHANNEL = 'presence'
+
+
+@dataclass(slots=True)
+class Presence:
+    company_id: str
+    # uuid -> punch in time of the user's open punches
+    open_punches: dict[str, datetime] = field(default_factory=dict)
+
+
+class PresenceRegistry:
+    """
+    Process-local map of user email to the user's open punches, so the punch in status
+    is answered from memory instead of a user lookup and a time_stamps query.
+
+    It is loaded from the open punches of the day when the worker starts, updated by the
+    TimeStampService writes of the worker and kept coherent with the other workers through
+    Postgres LISTEN/NOTIFY. It is reloaded whenever the listener (re)connects, and callers
+    fall back to the database until the first load completed.
+    """
+
+    def __init__(self, notifier: PgNotifier, enabled: bool = True):
+        self.notifier = notifier
+        self.enabled = enabled
+        self._users: dict[str, Presence] = {}
+        self._warm: bool = False
+        self._started: bool = False
+        self._lock = threading.Lock()
+        notifier.subscribe(on_message=self._apply)
+
+    def start(self, app: Flask, timestamp_repository: TimeStampRepository) -> None:
+        """
+        Loads the registry and starts listening to the other workers, once per process.
+        With a listener the load runs on its thread each time it connects, otherwise right away.
+        """
+        if self._started or not self.enabled:
+            return
+
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+
+        def warm():
+            with app.app_context():
+                self.warm(timestamp_repository)
+
+        self.notifier.subscribe(on_connect=warm)
+        with app.app_context():
+            listening = self.notifier.start(app.extensions['sqlalchemy'].engine)
+        if not listening:
+            warm()
+
+    def warm(self, timestamp_repository: TimeStampRepository) -> None:
+        """
+        Replaces the registry with the open punches of the day. The lock is held while loading
+        so a write applied meanwhile lands on top of the loaded state instead of being lost.
+        """
+        with self._lock:
+            open_punches: list[dict] | RC = timestamp_repository.get_open_punches(self._start_of_today())
+            if isinstance(open_punches, RC):
+                return
+
+            users: dict[str, Presence] = {}
+            for punch in open_punches:
+                presence: Presence = users.setdefault(punch['user_email'], Presence(punch['company_id']))
+                presence.open_punches[punch['uuid']] = self._utc(punch['punch_in_timestamp'])
+
+            self._users = users
+            self._warm = True
+
+    def is_warm(self) -> bool:
+        return self._warm
+
+    def get(self, user_email: str) -> Presence | None:
+        return self._users.get(user_email)
+
+    def has_open_punch(self, user_email: str, start_date: datetime, end_date: datetime) -> bool:
+        # Under the lock, since the listener thread mutates open_punches in _apply
+        with self._lock:
+            presence: Presence = self._users.get(user_email)
+            return presence is not None and any(start_date <= punch_in <= end_date for punch_in in presence.open_punches.values())
+
+    def punch_changed(self, user_email: str, company_id: str, uuid: str, punch_in: datetime, punch_out: datetime) -> None:
+        """
+        Records a written punch: an open one is added or moved, a closed one removed.
+        """
+        message = {'type': 'punch', 'user_email': user_email, 'company_id': str(company_id), 'uuid': str(uuid),
+                   'punch_in': datetime2iso(self._utc(punch_in)), 'open': punch_out is None}
+        self._apply(message)
+        self.notifier.notify(message)
+
+    def punch_deleted(self, user_email: str, uuid: str) -> None:
+        message = {'type': 'punch', 'user_email': user_email, 'uuid': str(uuid), 'open': False}
+        self._apply(message)
+        self.notifier.notify(message)
+
+    def user_changed(self, user_email: str, company_id: str) -> None:
+        """
+        Keeps the company of a user with open punches current, for the employer checks.
+        """
+        message = {'type': 'user', 'user_email': user_email, 'company_id': str(company_id)}
+        self._apply(message)
+        self.notifier.notify(message)
+
+    def _apply(self, message: dict) -> None:
+        if not self.enabled:
+            return
+
+        with self._lock:
+            presence: Presence = self._users.get(message['user_email'])
+            if message['type'] == 'user':
+                if presence:
+                    presence.company_id = message['company_id']
+                return
+
+            if message['open']:
+                if presence is None:
+                    presence = self._users[message['user_email']] = Presence(message['company_id'])
+                presence.company_id = message['company_id']
+                presence.open_punches[message['uuid']] = iso2datetime(message['punch_in'])
+            elif presence:
+                presence.open_punches.pop(message['uuid'], None)
+
+            if presence:
+                # Punches opened before today no longer count for the status
+                start_of_today = self._start_of_today()
+                presence.open_punches = {uuid: punch_in for uuid, punch_in in presence.open_punches.items() if punch_in >= start_of_today}
+                if not presence.open_punches:
+                    del self._users[message['user_email']]
+
+    @staticmethod
+    def _start_of_today() -> datetime:
+        return datetime.combine(datetime.now(timezone.utc).date(), time.min).replace(tzinfo=timezone.utc)
+
+    @staticmethod
+    def _utc(date_time: datetime) -> datetime:
+        if date_time.tzinfo is None:
+            return date_time.replace(tzinfo=timezone.utc)
+        return date_time.astimezone(timezone.utc)
+
+
+presence_registry = PresenceRegistry(PgNotifier(PRESENCE_CHANNEL), Config.PRESENCE_REGISTRY == '1')
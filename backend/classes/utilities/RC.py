@@ -3,10 +3,13 @@ from flask import jsonify
 class E_RC(IntEnum):
     RC_OK = 200
     RC_SUCCESS = 201
+    RC_ACCEPTED = 202
     RC_ERROR_DATABASE = 500
     RC_NOT_FOUND = 404
     RC_UNAUTHORIZED = 403
+    RC_CONFLICT = 409
     RC_INVALID_INPUT = 422
+    RC_SERVICE_UNAVAILABLE = 503
     
 class RC:
     """
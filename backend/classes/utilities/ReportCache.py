@@ -0,0 +1,150 @@
+from classes.utilities.PgNotifier import PgNotifier
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from sqlalchemy.engine import Engine
+from config import Config
+import threading
+import time
+
+USER_REPORT = 'user'
+COMPANY_REPORT = 'company'
+OVERVIEW_REPORT = 'overview'
+
+REPORT_CACHE_CHANNEL = 'report_cache'
+
+
+class ReportCache:
+    """
+    Process-local LRU cache of computed reports with a time to live.
+
+    Entries are keyed by (report type, subject, start date, end date), where the subject
+    is the user email of a user report, the company id of a company summary and None
+    for the net-admin overview. Writes invalidate only the entries whose scope they touch,
+    here and in the other workers over Postgres LISTEN/NOTIFY. A worker whose listener
+    reconnects drops everything, since the invalidations sent meanwhile are lost.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int, notifier: PgNotifier):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.notifier = notifier
+        self._entries: OrderedDict[tuple, tuple[float, object]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        notifier.subscribe(on_message=self._apply, on_connect=lambda: self._apply({'type': 'clear'}))
+
+    def start(self, engine: Engine) -> None:
+        self.notifier.start(engine)
+
+    def get(self, report_type: str, subject: str, start_date: datetime, end_date: datetime):
+        """
+        Returns the cached report, or None on a miss or an expired entry.
+        """
+        key = (report_type, subject, start_date, end_date)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                    self.evictions += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, report_type: str, subject: str, start_date: datetime, end_date: datetime, report) -> None:
+        if self.max_entries <= 0:
+            return
+
+        key = (report_type, subject, start_date, end_date)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, report)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_punches(self, user_email: str, company_id: str, punch_ins: list[datetime]) -> None:
+        """
+        Drops the user, company and overview reports whose range covers one of the punch-in times.
+        The range is widened by a day on each side since reports are built from whole days.
+        """
+        self._publish({'type': 'punches', 'user_email': user_email, 'company_id': str(company_id),
+                       'punch_ins': [punch_in.isoformat() for punch_in in punch_ins if punch_in]})
+
+    def invalidate_user(self, user_email: str, *company_ids: str) -> None:
+        """
+        Drops every report of the user, of the user's companies and the overview.
+        """
+        self._publish({'type': 'user', 'user_email': user_email, 'company_ids': [str(company_id) for company_id in company_ids if company_id]})
+
+    def invalidate_company(self, company_id: str) -> None:
+        """
+        Drops every summary of the company and the overview.
+        """
+        self._publish({'type': 'company', 'company_id': str(company_id)})
+
+    def clear(self) -> None:
+        """
+        Drops every report, for writes such as holidays that change the reports of many users.
+        """
+        self._publish({'type': 'clear'})
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+    def _publish(self, message: dict) -> None:
+        self._apply(message)
+        self.notifier.notify(message)
+
+    def _apply(self, message: dict) -> None:
+        if message['type'] == 'punches':
+            user_email, company_id = message['user_email'], message['company_id']
+            punch_ins = [datetime.fromisoformat(punch_in) for punch_in in message['punch_ins']]
+            margin = timedelta(days=1)
+            self._invalidate(lambda report_type, subject, start_date, end_date:
+                             self._in_scope(report_type, subject, user_email, company_id)
+                             and any(start_date - margin <= punch_in <= end_date + margin for punch_in in punch_ins))
+        elif message['type'] == 'user':
+            user_email, company_ids = message['user_email'], set(message['company_ids'])
+            self._invalidate(lambda report_type, subject, start_date, end_date:
+                             (report_type == USER_REPORT and subject == user_email)
+                             or (report_type == COMPANY_REPORT and subject in company_ids)
+                             or report_type == OVERVIEW_REPORT)
+        elif message['type'] == 'company':
+            company_id = message['company_id']
+            self._invalidate(lambda report_type, subject, start_date, end_date:
+                             (report_type == COMPANY_REPORT and subject == company_id) or report_type == OVERVIEW_REPORT)
+        else:
+            self._invalidate(lambda report_type, subject, start_date, end_date: True)
+
+    def _in_scope(self, report_type: str, subject: str, user_email: str, company_id: str) -> bool:
+        return (report_type == USER_REPORT and subject == user_email) \
+            or (report_type == COMPANY_REPORT and subject == str(company_id)) \
+            or report_type == OVERVIEW_REPORT
+
+    def _invalidate(self, predicate) -> None:
+        with self._lock:
+            stale_keys = [key for key in self._entries if predicate(*key)]
+            for key in stale_keys:
+                del self._entries[key]
+            self.invalidations += len(stale_keys)
+
+
+report_cache = ReportCache(int(Config.REPORT_CACHE_SIZE), int(Config.REPORT_CACHE_TTL), PgNotifier(REPORT_CACHE_CHANNEL))
@@ -0,0 +1,161 @@
+from classes.dataclass.User import User
+from classes.utilities.PgNotifier import PgNotifier
+from collections import OrderedDict
+from sqlalchemy.engine import Engine
+from flask import g, has_app_context
+from config import Config
+import threading
+import time
+
+USER_CACHE_CHANNEL = 'user_cache'
+# Kind of the entries mapping an email to its company id, next to the users keyed by whether the company was loaded
+COMPANY_ID = 'company_id'
+# Returned by get() on a miss
+MISSING = object()
+
+
+class UserCache:
+    """
+    Two tier cache of UserRepository.get_user_by_email.
+
+    The first tier lives on flask g, so a user is fetched at most once per request.
+    The second is an optional process-local LRU with a short time to live shared by the
+    requests of the worker (max_entries 0 disables it). User writes drop the user from both
+    tiers here and from the LRU of the other workers over Postgres LISTEN/NOTIFY.
+
+    Entries are keyed by (email, kind), the kind being whether the company of the user was
+    loaded, or COMPANY_ID for the email to company map of the authorization checks.
+    Callers get copies of the users, since services modify the users they update.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int, notifier: PgNotifier):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.notifier = notifier
+        self._entries: OrderedDict[tuple, tuple[float, User | str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation: int = 0
+        self.request_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        notifier.subscribe(on_message=self._apply, on_connect=self._clear_shared)
+
+    def start(self, engine: Engine) -> None:
+        self.notifier.start(engine)
+
+    def get(self, email: str, kind: bool | str) -> User | str | object:
+        """
+        Returns the cached user or company id, or MISSING.
+        """
+        key = (email, kind)
+        request_users: dict = self._request_users()
+        if request_users is not None and key in request_users:
+            self.request_hits += 1
+            return request_users[key]
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] >= time.monotonic():
+                self._entries.move_to_end(key)
+                self.shared_hits += 1
+                if request_users is not None:
+                    request_users[key] = entry[1]
+                return entry[1]
+
+            if entry is not None:
+                del self._entries[key]
+                self.evictions += 1
+            self.misses += 1
+            return MISSING
+
+    def generation(self) -> int:
+        """
+        Returns the invalidation counter to pass to put() once the user read from the database.
+        """
+        return self._generation
+
+    def put(self, email: str, kind: bool | str, value: User | str, generation: int) -> None:
+        key = (email, kind)
+        request_users: dict = self._request_users()
+        if request_users is not None:
+            request_users[key] = value
+
+        if self.max_entries <= 0:
+            return
+
+        with self._lock:
+            # An invalidation that arrived while loading may not be reflected, so the entry serves this request only
+            if generation != self._generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, email: str) -> None:
+        """
+        Drops a user from both tiers of this worker and from the other workers.
+        """
+        message = {'type': 'invalidate', 'email': email}
+        self._apply(message)
+        self.notifier.notify(message)
+
+    def clear(self) -> None:
+        """
+        Drops every user, for writes such as company renames that change many cached users.
+        """
+        message = {'type': 'clear'}
+        self._apply(message)
+        self.notifier.notify(message)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.request_hits + self.shared_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'request_hits': self.request_hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'hit_rate': round((self.request_hits + self.shared_hits) / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+    def _apply(self, message: dict) -> None:
+        self._generation += 1
+        request_users: dict = self._request_users()
+        if message['type'] == 'clear':
+            if request_users:
+                request_users.clear()
+            self._clear_shared()
+            return
+
+        with self._lock:
+            for kind in (True, False, COMPANY_ID):
+                key = (message['email'], kind)
+                if request_users:
+                    request_users.pop(key, None)
+                if self._entries.pop(key, None) is not None:
+                    self.invalidations += 1
+
+    def _clear_shared(self) -> None:
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    @staticmethod
+    def _request_users() -> dict | None:
+        # The listener thread applying other workers' messages runs outside any app context
+        if not has_app_context():
+            return None
+        if 'user_cache' not in g:
+            g.user_cache = {}
+        return g.user_cache
+
+
+user_cache = UserCache(int(Config.USER_CACHE_SIZE), int(Config.USER_CACHE_TTL), PgNotifier(USER_CACHE_CHANNEL))
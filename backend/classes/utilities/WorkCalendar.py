@@ -0,0 +1,87 @@
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+WEEKDAY_NAMES = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+DAYS_IN_WEEK = 7
+ALL_DAYS = (1 << DAYS_IN_WEEK) - 1
+
+
+@lru_cache(maxsize=256)
+def weekend_bitmask(weekend_choice: str) -> int:
+    """
+    Parses a comma separated weekend_choice ('Friday,Saturday') into a bitmask
+    where bit n is set when datetime.weekday() n is a weekend day.
+    """
+    if not weekend_choice:
+        return 0
+
+    weekend_days = set(map(str.lower, weekend_choice.split(',')))
+    bitmask = 0
+    for weekday, name in enumerate(WEEKDAY_NAMES):
+        if name in weekend_days:
+            bitmask |= 1 << weekday
+
+    return bitmask
+
+
+def range_days(start_date: datetime, end_date: datetime) -> tuple[date, date]:
+    """
+    Returns the first and last calendar day of a report range: every start_date + n days
+    that is not after end_date. The last day is before the first one for an empty range.
+    """
+    first_day = start_date.date()
+    return first_day, first_day + timedelta(days=(end_date - start_date).days)
+
+
+def work_capacity_hours(daily_capacity: float, work_days: int) -> float:
+    return round(float(daily_capacity or 0) * work_days, 2)
+
+
+class WorkCalendar:
+    """
+    The working days of one weekend choice, optionally minus a company's holidays.
+
+    Holidays count like weekend days: they are neither potential work days nor reported.
+    """
+
+    def __init__(self, weekend: int, holidays: tuple[date, ...] = ()):
+        self.weekend: int = weekend
+        self.weekend_mask: tuple[bool, ...] = tuple(bool(weekend >> weekday & 1) for weekday in range(DAYS_IN_WEEK))
+        self.work_days_per_week: int = DAYS_IN_WEEK - weekend.bit_count()
+        # Holidays on a weekend day are already days off
+        self.holidays: tuple[date, ...] = tuple(sorted(day for day in set(holidays) if not self.weekend_mask[day.weekday()]))
+        self._holiday_set: frozenset[date] = frozenset(self.holidays)
+
+    def is_work_day(self, day: date) -> bool:
+        return not self.weekend_mask[day.weekday()] and day not in self._holiday_set
+
+    def work_days(self, first_day: date, last_day: date) -> int:
+        """
+        Counts the working days from first_day to last_day inclusive from the number of
+        full weeks plus the weekday mask of the remaining days, minus the holidays in between.
+        """
+        if last_day < first_day:
+            return 0
+
+        full_weeks, remainder = divmod((last_day - first_day).days + 1, DAYS_IN_WEEK)
+        remainder_mask = ((1 << remainder) - 1) << first_day.weekday()
+        remainder_mask = (remainder_mask | remainder_mask >> DAYS_IN_WEEK) & ALL_DAYS
+        work_days = full_weeks * self.work_days_per_week + remainder - (remainder_mask & self.weekend).bit_count()
+
+        return work_days - (bisect_right(self.holidays, last_day) - bisect_left(self.holidays, first_day))
+
+    def work_capacity(self, daily_capacity: float, first_day: date, last_day: date) -> float:
+        """
+        Hours a user with the given daily capacity can work from first_day to last_day inclusive.
+        """
+        return work_capacity_hours(daily_capacity, self.work_days(first_day, last_day))
+
+
+@lru_cache(maxsize=1024)
+def get_work_calendar(weekend_choice: str, holidays: tuple[date, ...] = ()) -> WorkCalendar:
+    """
+    Returns the shared calendar of a weekend choice and holiday tuple, so users
+    with the same weekend parse it once.
+    """
+    return WorkCalendar(weekend_bitmask(weekend_choice), holidays)
@@ -3,9 +3,10 @@ from classes.validators.BaseValidator import ValidatorInterface
 from classes.dataclass.User import User
 from classes.dataclass.Company import Company
 from classes.dataclass.TimeStamp import TimeStamp
+from classes.dataclass.CompanyHoliday import CompanyHoliday
 from classes.utilities.Permission import E_PERMISSIONS
 from classes.utilities.RC import RC, E_RC
-from datetime import datetime
+from datetime import date, datetime
 import re
 
 class ModelValidator(ValidatorInterface):
@@ -29,6 +30,8 @@ class ModelValidator(ValidatorInterface):
             return self._validate_company(obj)
         elif isinstance(obj, TimeStamp):
             return self._validate_timestamp(obj)
+        elif isinstance(obj, CompanyHoliday):
+            return self._validate_company_holiday(obj)
         else:
             return RC(E_RC.RC_INVALID_INPUT, "Unsupported object type for validation")
 
@@ -121,6 +124,21 @@ class ModelValidator(ValidatorInterface):
 
         return RC(E_RC.RC_OK, "Company Validation Succesfull")
     
+    def _validate_company_holiday(self, holiday: CompanyHoliday) -> RC:
+        """
+        Validates a CompanyHoliday object.
+        """
+        if not holiday.company_id:
+            return RC(E_RC.RC_INVALID_INPUT, "Company id is required.")
+
+        if not isinstance(holiday.day, date) or isinstance(holiday.day, datetime):
+            return RC(E_RC.RC_INVALID_INPUT, "Invalid holiday date format.")
+
+        if holiday.name and (not isinstance(holiday.name, str) or len(holiday.name) > 255):
+            return RC(E_RC.RC_INVALID_INPUT, "Holiday name must be a string of at most 255 characters.")
+
+        return RC(E_RC.RC_OK, "Company Holiday Validation Succesfull")
+
     def _validate_timestamp(self, timestamp: TimeStamp) -> RC:
         """
         Validates a TimeStamp object.
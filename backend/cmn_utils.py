@@ -9,6 +9,7 @@ from sqlalchemy import create_engine, text
 from sqlalchemy_utils import database_exists, create_database
 from config import *
 from classes.utilities.RC import RC, E_RC
+from classes.utilities.WorkCalendar import get_work_calendar, range_days
 from flask import jsonify
 
 def print_exception(exception):
@@ -58,20 +59,10 @@ def extract_jwt():
 
 
         
-def calculate_work_capacity(user, start_date, end_date):
-    # Calculate the number of potential work days in the date range (excluding weekends)
-    num_work_days = 0
-    current_date = start_date
-    while current_date <= end_date:
-        if not user.weekend_choice or current_date.strftime('%A').lower() not in map(str.lower, user.weekend_choice.split(',')):
-            num_work_days += 1
-        current_date += timedelta(days=1)
-
-    # Calculate total work capacity for the date range
-    daily_work_capacity = float(user.work_capacity or 0)
-    total_work_capacity = daily_work_capacity * num_work_days
-
-    return round(total_work_capacity, 2)
+def calculate_work_capacity(user, start_date, end_date, holidays=()):
+    # Potential work days of the range on the user's weekend choice and the given holidays
+    first_day, last_day = range_days(start_date, end_date)
+    return get_work_calendar(user.weekend_choice, tuple(holidays)).work_capacity(user.work_capacity, first_day, last_day)
 
 def format_hours_to_hhmm(seconds):
   """
@@ -11,4 +11,41 @@ class Config:
     DB_PASSWORD = os.getenv('DB_PASS', 'pass')
 
     WEB_URL = os.getenv('WEB_URL', 'localhost')
-    WEB_PORT = os.getenv('WEB_PORT', '5173')
\ No newline at end of file
+    WEB_PORT = os.getenv('WEB_PORT', '5173')
+
+    # 'python' or 'numpy' (requires numpy to be installed)
+    REPORT_ENGINE = os.getenv('REPORT_ENGINE', 'python')
+    # 'timestamps' reads raw punches, 'rollup' reads the user_daily_totals table
+    REPORT_SOURCE = os.getenv('REPORT_SOURCE', 'timestamps')
+    # Computed reports kept per worker, 0 disables the cache
+    REPORT_CACHE_SIZE = os.getenv('REPORT_CACHE_SIZE', '256')
+    REPORT_CACHE_TTL = os.getenv('REPORT_CACHE_TTL', '300')
+    # Background report jobs
+    REPORT_JOB_WORKERS = os.getenv('REPORT_JOB_WORKERS', '2')
+    REPORT_JOB_MAX_RETAINED = os.getenv('REPORT_JOB_MAX_RETAINED', '100')
+    REPORT_JOB_RETENTION = os.getenv('REPORT_JOB_RETENTION', '3600')
+    # Seconds after which a running job, or a job still pending since its submission, is considered lost with its worker
+    REPORT_JOB_TIMEOUT = os.getenv('REPORT_JOB_TIMEOUT', '900')
+    REPORT_JOB_QUEUE_TIMEOUT = os.getenv('REPORT_JOB_QUEUE_TIMEOUT', '3600')
+    # Parallel company overview: 1 runs the single aggregate, more splits it by company
+    # across a 'thread' or 'process' pool
+    OVERVIEW_WORKERS = os.getenv('OVERVIEW_WORKERS', '1')
+    OVERVIEW_EXECUTOR = os.getenv('OVERVIEW_EXECUTOR', 'thread')
+    # In-memory punch in status shared between workers over Postgres LISTEN/NOTIFY, 0 always queries the database
+    PRESENCE_REGISTRY = os.getenv('PRESENCE_REGISTRY', '1')
+    # Keyset pages of the timestamp, user and company listings (?limit=&cursor=)
+    PAGE_DEFAULT_LIMIT = os.getenv('PAGE_DEFAULT_LIMIT', '100')
+    PAGE_MAX_LIMIT = os.getenv('PAGE_MAX_LIMIT', '1000')
+    # Monthly time_stamps partitions created ahead of the current month (see db_partitions.py)
+    TIME_STAMP_PARTITIONS_AHEAD = os.getenv('TIME_STAMP_PARTITIONS_AHEAD', '3')
+    # Seconds the in-memory company directory is kept per worker, 0 always queries the database
+    COMPANY_DIRECTORY_TTL = os.getenv('COMPANY_DIRECTORY_TTL', '300')
+    # Users kept per worker for the per-request lookups, with the seconds they are kept; 0 keeps them for the request only
+    USER_CACHE_SIZE = os.getenv('USER_CACHE_SIZE', '1024')
+    USER_CACHE_TTL = os.getenv('USER_CACHE_TTL', '30')
+    # Password hashing pool: worker processes per server worker (0 hashes inline), hashes queued
+    # before requests get a 503, seconds a hash may wait, and the bcrypt cost factor
+    PASSWORD_HASH_WORKERS = os.getenv('PASSWORD_HASH_WORKERS', '2')
+    PASSWORD_HASH_MAX_PENDING = os.getenv('PASSWORD_HASH_MAX_PENDING', '32')
+    PASSWORD_HASH_TIMEOUT = os.getenv('PASSWORD_HASH_TIMEOUT', '10')
+    BCRYPT_ROUNDS = os.getenv('BCRYPT_ROUNDS', '12')
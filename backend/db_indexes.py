@@ -0,0 +1,116 @@
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from cmn_utils import print_exception
+from classes.utilities.Permission import E_PERMISSIONS
+
+# Secondary indexes of the hot queries, created after db.create_all() since the models declare none.
+# (name, table, definition)
+INDEXES = (
+    # check_punch_in_status / punch_out_latest: the latest open punch of a user
+    ('ix_time_stamps_open_punch', 'time_stamps', '(user_email, punch_in_timestamp DESC) WHERE punch_out_timestamp IS NULL'),
+    # get_range and the report reads: a user's punches within a date range
+    ('ix_time_stamps_user_punch_in', 'time_stamps', '(user_email, punch_in_timestamp)'),
+    # keyset pages of the timestamp and company listings
+    ('ix_time_stamps_punch_in_uuid', 'time_stamps', '(punch_in_timestamp, uuid)'),
+    ('ix_companies_name_id', 'companies', '(company_name, company_id)'),
+    # active / inactive user listings of a company
+    ('ix_users_company_active', 'users', '(company_id, is_active)'),
+    # company admins (employers) and permission filtered listings
+    ('ix_users_company_permission', 'users', '(company_id, permission)'),
+)
+
+# EXPLAIN checks of the queries the indexes are for: (expected index, query)
+EXPLAIN_QUERIES = (
+    ('ix_time_stamps_open_punch',
+     "SELECT uuid FROM time_stamps WHERE user_email = :email AND punch_in_timestamp >= now() - interval '1 day' "
+     "AND punch_in_timestamp <= now() AND punch_out_timestamp IS NULL ORDER BY punch_in_timestamp DESC LIMIT 1"),
+    ('ix_time_stamps_user_punch_in',
+     "SELECT * FROM time_stamps WHERE user_email = :email AND punch_in_timestamp >= now() - interval '31 days' "
+     "AND punch_in_timestamp <= now() ORDER BY punch_in_timestamp"),
+    ('ix_users_company_active',
+     "SELECT email FROM users WHERE company_id = (SELECT company_id FROM users WHERE email = :email) AND is_active = true"),
+    ('ix_users_company_permission',
+     "SELECT email FROM users WHERE company_id = (SELECT company_id FROM users WHERE email = :email) "
+     f"AND permission = {E_PERMISSIONS.employer.value}"),
+)
+
+
+def create_indexes(engine: Engine) -> list[str]:
+    """
+    Creates the secondary indexes idempotently with CREATE INDEX CONCURRENTLY IF NOT EXISTS,
+    so running it against a live database does not block writes.
+
+    CONCURRENTLY cannot run inside a transaction, so the statements run in AUTOCOMMIT.
+    An index left invalid by an interrupted concurrent build is dropped and rebuilt.
+    Postgres cannot build an index concurrently on a partitioned table (see db_partitions),
+    so those are built with a plain CREATE INDEX, which creates it on every partition.
+
+    Returns:
+        list[str]: The names of the indexes that could not be created.
+    """
+    failed = []
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        partitioned = set(conn.execute(text("SELECT relname FROM pg_class WHERE relkind = 'p'")).scalars())
+        invalid = set(conn.execute(text(
+            "SELECT index_class.relname FROM pg_index JOIN pg_class index_class ON index_class.oid = pg_index.indexrelid "
+            "WHERE NOT pg_index.indisvalid AND index_class.relname = ANY(:names)"
+        ), {'names': [name for name, table, definition in INDEXES]}).scalars())
+
+        for name, table, definition in INDEXES:
+            try:
+                if name in invalid:
+                    print(f"Index {name} is invalid. Rebuilding...")
+                    conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS {name}'))
+                concurrently = '' if table in partitioned else 'CONCURRENTLY '
+                conn.execute(text(f'CREATE INDEX {concurrently}IF NOT EXISTS {name} ON {table} {definition}'))
+            except Exception as e:
+                print_exception(e)
+                print(f"Failed to create index {name}")
+                failed.append(name)
+
+    if failed:
+        print(f"Failed to create {len(failed)} of {len(INDEXES)} indexes: {', '.join(failed)}")
+    else:
+        print("Indexes created successfully.")
+    return failed
+
+
+def explain_indexes(engine: Engine, email: str) -> dict[str, bool]:
+    """
+    Runs EXPLAIN on the queries the indexes are for and reports whether each plan uses its index.
+
+    Sequential scans are disabled for the check, since on a small database the planner
+    prefers them and the check is whether the index is usable, not whether it is chosen today.
+    On a partitioned table the plan names the partitions' indexes (time_stamps_pYYYY_MM_..._idx),
+    so an index counts as used when the plan names it or any index attached to it.
+    """
+    results = {}
+    with engine.connect() as conn:
+        conn.execute(text('SET LOCAL enable_seqscan = off'))
+        names = _index_names(conn, [name for name, query in EXPLAIN_QUERIES])
+        for name, query in EXPLAIN_QUERIES:
+            plan = '\n'.join(conn.execute(text(f'EXPLAIN {query}'), {'email': email}).scalars())
+            results[name] = any(index_name in plan for index_name in names.get(name, {name}))
+            print(f"{name}: {'used' if results[name] else 'NOT used'}\n{plan}\n")
+        conn.rollback()
+
+    return results
+
+
+def _index_names(conn: Connection, names: list[str]) -> dict[str, set[str]]:
+    """
+    Maps each index to its own name and the names of the partition indexes attached to it,
+    following pg_inherits down nested partitions.
+    """
+    rows = conn.execute(text(
+        "WITH RECURSIVE attached(root, oid) AS ("
+        "SELECT relname, oid FROM pg_class WHERE relkind IN ('i', 'I') AND relname = ANY(:names) "
+        "UNION ALL "
+        "SELECT attached.root, pg_inherits.inhrelid FROM pg_inherits JOIN attached ON pg_inherits.inhparent = attached.oid) "
+        "SELECT attached.root, pg_class.relname FROM attached JOIN pg_class ON pg_class.oid = attached.oid"
+    ), {'names': names}).all()
+
+    index_names = {}
+    for root, relname in rows:
+        index_names.setdefault(root, set()).add(relname)
+    return index_names
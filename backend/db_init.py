@@ -10,6 +10,8 @@ from sqlalchemy_utils import database_exists, create_database
 from config import *
 import bcrypt
 from classes.utilities.Permission import E_PERMISSIONS
+from db_indexes import create_indexes
+from db_partitions import create_partitions
 
 
 
@@ -34,6 +36,12 @@ def create_db(app, db):
         db.create_all()  # No need to pass 'bind' anymore
         print("Tables created successfully.")
 
+        # Create the secondary indexes, also on tables create_all found existing
+        create_indexes(engine)
+
+        # Create the coming months' time_stamps partitions once the table was migrated to partitions
+        create_partitions(engine, int(Config.TIME_STAMP_PARTITIONS_AHEAD))
+
         # Check if NetAdmin company already exists
         if not CompanyModel.query.filter_by(company_name="NetAdmin Company").first():
             print("Creating NetAdmin company...")
@@ -0,0 +1,148 @@
+from datetime import date, datetime, timezone
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+# time_stamps is range partitioned by month on punch_in_timestamp once migrate_time_stamps() ran.
+# Every month gets a time_stamps_pYYYY_MM partition, punches outside them land in time_stamps_default.
+PARTITIONED_TABLE = 'time_stamps'
+DEFAULT_PARTITION = 'time_stamps_default'
+LEGACY_TABLE = 'time_stamps_legacy'
+
+
+def month_start(day: date, months: int = 0) -> date:
+    month_index = day.year * 12 + day.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f'{PARTITIONED_TABLE}_p{month.year:04d}_{month.month:02d}'
+
+
+def is_partitioned(conn: Connection) -> bool:
+    return conn.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table JOIN pg_class ON pg_class.oid = pg_partitioned_table.partrelid "
+        "WHERE pg_class.relname = :table)"
+    ), {'table': PARTITIONED_TABLE}).scalar()
+
+
+def migrate_time_stamps(engine: Engine, months_ahead: int) -> None:
+    """
+    Rebuilds the plain time_stamps table created by db.create_all() as a table partitioned by month,
+    in a single transaction: the table is renamed, the partitioned table created like it with a
+    partition per month from the first punch to months_ahead months from now, the rows copied
+    and the old table dropped.
+
+    The primary key of a partitioned table must contain the partition key, so it becomes
+    (uuid, punch_in_timestamp) and punch_in_timestamp NOT NULL. The ORM keeps addressing rows by uuid.
+    The table is locked for the duration of the copy.
+    """
+    if engine.dialect.name != 'postgresql':
+        print("time_stamps partitioning requires PostgreSQL.")
+        return
+
+    with engine.begin() as conn:
+        if is_partitioned(conn):
+            print("time_stamps is already partitioned.")
+            return
+
+        missing_punch_in = conn.execute(text(f'SELECT count(*) FROM {PARTITIONED_TABLE} WHERE punch_in_timestamp IS NULL')).scalar()
+        if missing_punch_in:
+            raise ValueError(f"{missing_punch_in} time stamps have no punch_in_timestamp and cannot be partitioned")
+
+        first_punch_in: datetime = conn.execute(text(f'SELECT min(punch_in_timestamp) FROM {PARTITIONED_TABLE}')).scalar()
+
+        conn.execute(text(f'ALTER TABLE {PARTITIONED_TABLE} RENAME TO {LEGACY_TABLE}'))
+        conn.execute(text(f'CREATE TABLE {PARTITIONED_TABLE} (LIKE {LEGACY_TABLE} INCLUDING DEFAULTS) '
+                          'PARTITION BY RANGE (punch_in_timestamp)'))
+        conn.execute(text(f'ALTER TABLE {PARTITIONED_TABLE} ALTER COLUMN punch_in_timestamp SET NOT NULL'))
+        conn.execute(text(f'ALTER TABLE {PARTITIONED_TABLE} ADD CONSTRAINT {PARTITIONED_TABLE}_part_pkey PRIMARY KEY (uuid, punch_in_timestamp)'))
+        conn.execute(text(f'ALTER TABLE {PARTITIONED_TABLE} ADD FOREIGN KEY (user_email) REFERENCES users (email)'))
+        conn.execute(text(f'ALTER TABLE {PARTITIONED_TABLE} ADD FOREIGN KEY (entered_by) REFERENCES users (email)'))
+        conn.execute(text(f'CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {PARTITIONED_TABLE} DEFAULT'))
+
+        first_month = month_start(first_punch_in.astimezone(timezone.utc).date() if first_punch_in else datetime.now(timezone.utc).date())
+        _create_partitions(conn, first_month, month_start(datetime.now(timezone.utc).date(), months_ahead))
+
+        copied = conn.execute(text(f'INSERT INTO {PARTITIONED_TABLE} SELECT * FROM {LEGACY_TABLE}')).rowcount
+        conn.execute(text(f'DROP TABLE {LEGACY_TABLE}'))
+
+    print(f"time_stamps partitioned by month, {copied} rows copied.")
+
+
+def create_partitions(engine: Engine, months_ahead: int) -> None:
+    """
+    Creates the partitions of the current month and the months_ahead following ones that do not exist yet.
+    Does nothing while time_stamps is not partitioned.
+    """
+    if engine.dialect.name != 'postgresql':
+        return
+
+    with engine.begin() as conn:
+        if not is_partitioned(conn):
+            return
+        this_month = month_start(datetime.now(timezone.utc).date())
+        _create_partitions(conn, this_month, month_start(this_month, months_ahead))
+
+
+def detach_partitions(engine: Engine, before: date, drop: bool = False) -> list[str]:
+    """
+    Detaches the monthly partitions that end on or before the given day, so retention costs
+    a catalog update instead of a DELETE. The detached tables are left for archiving unless drop.
+    """
+    detached = []
+    with engine.begin() as conn:
+        if not is_partitioned(conn):
+            return detached
+
+        for name in _partition_names(conn):
+            month = _partition_month(name)
+            if month is None or month_start(month, 1) > before:
+                continue
+
+            conn.execute(text(f'ALTER TABLE {PARTITIONED_TABLE} DETACH PARTITION {name}'))
+            if drop:
+                conn.execute(text(f'DROP TABLE {name}'))
+            detached.append(name)
+
+    return detached
+
+
+def _create_partitions(conn: Connection, first_month: date, last_month: date) -> None:
+    """
+    Creates the monthly partitions from first_month to last_month inclusive. Punches of the month
+    already in the default partition are moved into the new partition before it is attached,
+    since Postgres refuses to attach a partition whose rows the default partition holds.
+    """
+    existing = set(_partition_names(conn))
+    month = first_month
+    while month <= last_month:
+        name = partition_name(month)
+        if name not in existing:
+            bounds = {'start': datetime(month.year, month.month, 1, tzinfo=timezone.utc),
+                      'end': datetime.combine(month_start(month, 1), datetime.min.time(), timezone.utc)}
+            conn.execute(text(f'CREATE TABLE {name} (LIKE {PARTITIONED_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'))
+            conn.execute(text(
+                f'WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE punch_in_timestamp >= :start AND punch_in_timestamp < :end RETURNING *) '
+                f'INSERT INTO {name} SELECT * FROM moved'
+            ), bounds)
+            conn.execute(text(
+                f"ALTER TABLE {PARTITIONED_TABLE} ATTACH PARTITION {name} "
+                f"FOR VALUES FROM ('{bounds['start'].isoformat()}') TO ('{bounds['end'].isoformat()}')"
+            ))
+            print(f"Partition {name} created.")
+        month = month_start(month, 1)
+
+
+def _partition_names(conn: Connection) -> list[str]:
+    return list(conn.execute(text(
+        "SELECT child.relname FROM pg_inherits JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid WHERE parent.relname = :table ORDER BY child.relname"
+    ), {'table': PARTITIONED_TABLE}).scalars())
+
+
+def _partition_month(name: str) -> date | None:
+    try:
+        year, month = name.removeprefix(f'{PARTITIONED_TABLE}_p').split('_')
+        return date(int(year), int(month), 1)
+    except ValueError:
+        return None
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from models import Company, User, db  # Import your models
 from classes.repositories import CompanyRepository
+from classes.repositories.CompanyHolidayRepository import CompanyHolidayRepository
 from classes.services.CompanyService import CompanyService
 from classes.validators.ModelValidator import ModelValidator
 from classes.factories.DomainClassFactory import DomainClassFactory
@@ -9,7 +10,7 @@ from cmn_utils import *
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 
 companies_blueprint = Blueprint('companies', __name__)
-company_service: CompanyService = CompanyService(CompanyRepository.CompanyRepository(db), ModelValidator(), DomainClassFactory())
+company_service: CompanyService = CompanyService(CompanyRepository.CompanyRepository(db), CompanyHolidayRepository(db), ModelValidator(), DomainClassFactory())
 
 # Create company route
 @companies_blueprint.route('/create-company', methods=['POST'])
@@ -66,7 +67,7 @@ def get_active_companies():
     try:
         current_user_email, user_permission, user_company_id = extract_jwt()
 
-        company_data = company_service.get_active_companies(user_permission)
+        company_data = company_service.get_active_companies(user_permission, request.args.get('limit'), request.args.get('cursor'))
         if isinstance(company_data, RC):
             return company_data.to_json()
         
@@ -83,7 +84,7 @@ def get_all_companies():
     try:
         current_user_email, user_permission, user_company_id = extract_jwt()
         
-        company_data: dict|RC = company_service.get_all_companies(user_permission)
+        company_data: dict|RC = company_service.get_all_companies(user_permission, request.args.get('limit'), request.args.get('cursor'))
         if isinstance(company_data, RC):
             return company_data.to_json()
         
@@ -156,4 +157,51 @@ def get_company_name_by_id(company_id):
 
     except Exception as e:
         print_exception(e)
-        return jsonify({'error': str(e)}), E_RC.RC_ERROR_DATABASE
\ No newline at end of file
+        return jsonify({'error': str(e)}), E_RC.RC_ERROR_DATABASE
+
+@companies_blueprint.route('/<string:company_id>/holidays', methods=['GET'])
+@jwt_required()
+def get_company_holidays(company_id):
+    try:
+        current_user_email, user_permission, user_company_id = extract_jwt()
+
+        year = request.args.get('year')
+        holidays: list|RC = company_service.get_company_holidays(company_id, year, user_company_id, user_permission)
+        if isinstance(holidays, RC):
+            return holidays.to_json()
+        
+        return jsonify(holidays), E_RC.RC_OK
+
+    except Exception as e:
+        print_exception(e)
+        return jsonify({'error': str(e)}), E_RC.RC_ERROR_DATABASE
+
+@companies_blueprint.route('/<string:company_id>/holidays', methods=['POST'])
+@jwt_required()
+def add_company_holiday(company_id):
+    try:
+        current_user_email, user_permission, user_company_id = extract_jwt()
+
+        data = request.get_json()
+        day = data.get('day')
+        name = data.get('name')
+
+        rc: RC = company_service.add_company_holiday(company_id, day, name, user_company_id, user_permission)
+        return rc.to_json()
+
+    except Exception as e:
+        print_exception(e)
+        return jsonify({'error': 'Server error'}), E_RC.RC_ERROR_DATABASE
+
+@companies_blueprint.route('/<string:company_id>/holidays/<string:day>', methods=['DELETE'])
+@jwt_required()
+def delete_company_holiday(company_id, day):
+    try:
+        current_user_email, user_permission, user_company_id = extract_jwt()
+
+        rc: RC = company_service.delete_company_holiday(company_id, day, user_company_id, user_permission)
+        return rc.to_json()
+
+    except Exception as e:
+        print_exception(e)
+        return jsonify({'error': 'Server error'}), E_RC.RC_ERROR_DATABASE
@@ -1,4 +1,4 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
 from models import db, User, TimeStamp, Company
 from datetime import datetime, timezone, timedelta
 from cmn_utils import *
@@ -8,12 +8,20 @@ from classes.utilities.RC import RC, E_RC
 from classes.validators.ModelValidator import ModelValidator
 from classes.repositories.UserRepository import UserRepository
 from classes.repositories.TimeStampRepository import TimeStampRepository
+from classes.repositories.DailyTotalsRepository import DailyTotalsRepository
+from classes.repositories.CompanyHolidayRepository import CompanyHolidayRepository
+from classes.repositories.ReportJobRepository import ReportJobRepository
 from classes.factories.DomainClassFactory import DomainClassFactory
 from classes.services.ReportService import ReportService
+from classes.services.ReportJobService import ReportJobService
+from classes.utilities.Export import MIMETYPES, export_lines
 
 reports_bp = Blueprint('reports', __name__)
 
-report_service = ReportService(UserRepository(db), TimeStampRepository(db), CompanyRepository(db), ModelValidator(), DomainClassFactory())
+report_service = ReportService(UserRepository(db), TimeStampRepository(db), CompanyRepository(db), DailyTotalsRepository(db), CompanyHolidayRepository(db), ModelValidator(), DomainClassFactory())
+report_job_service = ReportJobService(report_service, ReportJobRepository(db), ModelValidator(), DomainClassFactory(), int(Config.REPORT_JOB_WORKERS),
+                                      int(Config.REPORT_JOB_MAX_RETAINED), int(Config.REPORT_JOB_RETENTION), int(Config.REPORT_JOB_TIMEOUT),
+                                      int(Config.REPORT_JOB_QUEUE_TIMEOUT))
 
 @reports_bp.route('/generate-user', methods=['GET'])
 @jwt_required()
@@ -63,6 +71,49 @@ def generate_company_summary_report():
         print_exception(e)
         return jsonify({'error': 'Failed to generate report'}), E_RC.RC_ERROR_DATABASE
 
+@reports_bp.route('/export-company', methods=['GET'])
+@jwt_required()
+def export_company_summary_report():
+    try:
+        current_user_email, user_permission, user_company_id = extract_jwt()
+
+        company_id = request.args.get('company_id')
+        date_range_type = request.args.get('dateRangeType')
+        selected_year = request.args.get('year')
+        selected_month = request.args.get('month')
+        start_date_str = request.args.get('start_date')
+        end_date_str = request.args.get('end_date')
+        export_format = request.args.get('format', 'csv')
+        if export_format not in MIMETYPES:
+            return RC(E_RC.RC_INVALID_INPUT, 'Invalid export format').to_json()
+
+        report = report_service.export_company_summary(company_id, date_range_type, selected_year, selected_month, start_date_str, end_date_str, user_permission, user_company_id)
+        if isinstance(report, RC):
+            return report.to_json()
+        
+        return Response(stream_with_context(export_lines(report, export_format)), mimetype=MIMETYPES[export_format],
+                        headers={'Content-Disposition': f'attachment; filename=company_report.{export_format}'})
+
+    except Exception as e:
+        print_exception(e)
+        return jsonify({'error': 'Failed to generate report'}), E_RC.RC_ERROR_DATABASE
+
+@reports_bp.route('/cache-stats', methods=['GET'])
+@jwt_required()
+def get_report_cache_stats():
+    try:
+        current_user_email, user_permission, user_company_id = extract_jwt()
+
+        stats = report_service.cache_stats(user_permission)
+        if isinstance(stats, RC):
+            return stats.to_json()
+
+        return jsonify(stats), E_RC.RC_OK
+
+    except Exception as e:
+        print_exception(e)
+        return jsonify({'error': 'Internal server error'}), E_RC.RC_ERROR_DATABASE
+
 @reports_bp.route('/generate-company-overview', methods=['GET'])
 @jwt_required()
 def generate_company_overview_report():
@@ -85,3 +136,66 @@ def generate_company_overview_report():
         print_exception(e)
         return jsonify({'error': 'Failed to generate report'}), E_RC.RC_ERROR_DATABASE
 
+@reports_bp.route('/jobs', methods=['POST'])
+@jwt_required()
+def submit_report_job():
+    try:
+        current_user_email, user_permission, user_company_id = extract_jwt()
+
+        data: dict = request.get_json()
+        report_type = data.get('report_type')
+
+        job = report_job_service.submit(current_app._get_current_object(), report_type, data, current_user_email, user_permission, user_company_id)
+        if isinstance(job, RC):
+            return job.to_json()
+
+        return jsonify(job), E_RC.RC_ACCEPTED
+
+    except Exception as e:
+        print_exception(e)
+        return jsonify({'error': 'Failed to submit report job'}), E_RC.RC_ERROR_DATABASE
+
+@reports_bp.route('/jobs/<string:job_id>', methods=['GET'])
+@jwt_required()
+def get_report_job_status(job_id):
+    try:
+        current_user_email, user_permission, user_company_id = extract_jwt()
+
+        job = report_job_service.get_status(job_id, current_user_email, user_permission)
+        if isinstance(job, RC):
+            return job.to_json()
+
+        return jsonify(job), E_RC.RC_OK
+
+    except Exception as e:
+        print_exception(e)
+        return jsonify({'error': 'Internal server error'}), E_RC.RC_ERROR_DATABASE
+
+@reports_bp.route('/jobs/<string:job_id>/result', methods=['GET'])
+@jwt_required()
+def get_report_job_result(job_id):
+    try:
+        current_user_email, user_permission, user_company_id = extract_jwt()
+
+        report = report_job_service.get_result(job_id, current_user_email, user_permission)
+        if isinstance(report, RC):
+            return report.to_json()
+
+        return jsonify(report), E_RC.RC_OK
+
+    except Exception as e:
+        print_exception(e)
+        return jsonify({'error': 'Internal server error'}), E_RC.RC_ERROR_DATABASE
+
+@reports_bp.route('/jobs/<string:job_id>', methods=['DELETE'])
+@jwt_required()
+def cancel_report_job(job_id):
+    try:
+        current_user_email, user_permission, user_company_id = extract_jwt()
+
+        rc: RC = report_job_service.cancel(job_id, current_user_email, user_permission)
+        return rc.to_json()
+
+    except Exception as e:
+        print_exception(e)
+        return jsonify({'error': 'Internal server error'}), E_RC.RC_ERROR_DATABASE
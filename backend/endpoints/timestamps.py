@@ -1,17 +1,19 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from models import db
 from classes.repositories.UserRepository import UserRepository
 from classes.repositories.TimeStampRepository import TimeStampRepository
+from classes.repositories.DailyTotalsRepository import DailyTotalsRepository
 from classes.services.TimeStampService import TimeStampService
 from classes.validators.ModelValidator import ModelValidator
 from classes.factories.DomainClassFactory import DomainClassFactory
 from classes.utilities.RC import RC, E_RC 
+from classes.utilities.Export import MIMETYPES, export_lines
 from cmn_utils import print_exception, extract_jwt, iso2datetime, datetime2iso
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 
 timestamps_bp = Blueprint('timestamps', __name__)
 
-timestamp_service: TimeStampService = TimeStampService(TimeStampRepository(db), UserRepository(db), ModelValidator(), DomainClassFactory())
+timestamp_service: TimeStampService = TimeStampService(TimeStampRepository(db), UserRepository(db), DailyTotalsRepository(db), ModelValidator(), DomainClassFactory())
 
 @timestamps_bp.route('/', methods=['POST'])
 @jwt_required() 
@@ -41,7 +43,9 @@ def get_timestamps():
     try:
         current_user_email, user_permission, user_company_id = extract_jwt()
          
-        timestamps = timestamp_service.get_all_timestamps(user_permission)
+        timestamps = timestamp_service.get_all_timestamps(user_permission, request.args.get('limit'), request.args.get('cursor'),
+                                                          request.args.get('user_email'), request.args.get('company_id'),
+                                                          request.args.get('start_date'), request.args.get('end_date'))
         if isinstance(timestamps, RC):
             return timestamps.to_json()
             
@@ -59,7 +63,8 @@ def punch_out():
 
         data = request.get_json()
         user_email = data.get('user_email')
-        entered_by = data.get('entered_by')
+        # The caller is the token's identity, an entered_by sent in the body is ignored
+        entered_by = current_user_email
         reporting_type = data.get('reporting_type')
         detail = data.get('detail')
 
@@ -147,4 +152,30 @@ def get_timestamps_range(user_email):
 
     except Exception as error:
         print_exception(error)
-        return jsonify({'error': 'Internal server error'}), E_RC.RC_ERROR_DATABASE
\ No newline at end of file
+        return jsonify({'error': 'Internal server error'}), E_RC.RC_ERROR_DATABASE
+
+EXPORT_FIELDS = ['uuid', 'user_email', 'entered_by', 'punch_type', 'punch_in_timestamp', 'punch_out_timestamp',
+                 'reporting_type', 'detail', 'total_work_time', 'last_update']
+
+@timestamps_bp.route('/exportRange/<string:user_email>', methods=['GET'])
+@jwt_required()
+def export_timestamps_range(user_email):
+    try:
+        current_user_email, user_permission, user_company_id = extract_jwt()
+
+        start_date_str = request.args.get('start_date')
+        end_date_str = request.args.get('end_date')
+        export_format = request.args.get('format', 'csv')
+        if export_format not in MIMETYPES:
+            return RC(E_RC.RC_INVALID_INPUT, 'Invalid export format').to_json()
+        
+        timestamps = timestamp_service.export_timestamps_range(user_email, start_date_str, end_date_str, current_user_email, user_permission, user_company_id)
+        if isinstance(timestamps, RC):
+            return timestamps.to_json()
+        
+        return Response(stream_with_context(export_lines(timestamps, export_format, EXPORT_FIELDS)), mimetype=MIMETYPES[export_format],
+                        headers={'Content-Disposition': f'attachment; filename=timestamps.{export_format}'})
+
+    except Exception as error:
+        print_exception(error)
+        return jsonify({'error': 'Internal server error'}), E_RC.RC_ERROR_DATABASE
@@ -119,7 +119,7 @@ def get_active_users():
     try:
         current_user_email, user_permission, user_company_id = extract_jwt()
 
-        user_data: dict = user_service.get_active_users(user_permission, user_company_id)
+        user_data: dict = user_service.get_active_users(user_permission, user_company_id, request.args.get('limit'), request.args.get('cursor'))
         if isinstance(user_data, RC):
             return user_data.to_json()
             
@@ -135,7 +135,7 @@ def get_inactive_users():
     try:
         current_user_email, user_permission, user_company_id = extract_jwt()
 
-        user_data: dict = user_service.get_inactive_users(user_permission, user_company_id)
+        user_data: dict = user_service.get_inactive_users(user_permission, user_company_id, request.args.get('limit'), request.args.get('cursor'))
         if isinstance(user_data, RC):
             return user_data.to_json()
             
@@ -152,7 +152,7 @@ def get_all_users():
     try:
         current_user_email, user_permission, user_company_id = extract_jwt()
 
-        user_data: dict = user_service.get_all_users(user_permission, user_company_id)
+        user_data: dict = user_service.get_all_users(user_permission, user_company_id, request.args.get('limit'), request.args.get('cursor'))
         if isinstance(user_data, RC):
             return user_data.to_json()
             
@@ -210,3 +210,19 @@ def reactivate_user():
         print_exception(e)
         return jsonify({'error': 'Failed to change password'}), E_RC.RC_ERROR_DATABASE
     
+
+@users_blueprint.route('/cache-stats', methods=['GET'])
+@jwt_required()
+def get_user_cache_stats():
+    try:
+        current_user_email, user_permission, user_company_id = extract_jwt()
+
+        stats = user_service.cache_stats(user_permission)
+        if isinstance(stats, RC):
+            return stats.to_json()
+
+        return jsonify(stats), E_RC.RC_OK
+
+    except Exception as e:
+        print_exception(e)
+        return jsonify({'error': 'Internal server error'}), E_RC.RC_ERROR_DATABASE
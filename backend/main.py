@@ -8,12 +8,21 @@ from endpoints.timestamps import timestamps_bp
 from endpoints.reports import reports_bp
 from config import Config
 from db_init import create_db
+from db_indexes import create_indexes, explain_indexes
+from db_partitions import migrate_time_stamps, create_partitions, detach_partitions
+from classes.repositories.DailyTotalsRepository import DailyTotalsRepository
+from classes.repositories.TimeStampRepository import TimeStampRepository
+from classes.utilities.PresenceRegistry import presence_registry
+from classes.utilities.CompanyDirectory import company_directory
+from classes.utilities.UserCache import user_cache
+from classes.utilities.ReportCache import report_cache
 from dotenv import load_dotenv
 from models import db
 from flask_jwt_extended import JWTManager
 import sys
+import click
 import os
-from datetime import timedelta
+from datetime import date, timedelta
 from cmn_utils import *
 
 backend_parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
@@ -45,6 +54,14 @@ app.register_blueprint(users_blueprint, url_prefix=BASE_API + '/users')
 app.register_blueprint(timestamps_bp, url_prefix=BASE_API + '/timestamps')
 app.register_blueprint(reports_bp, url_prefix=BASE_API + '/reports')
 
+# Load the punch in presence registry and listen to the other workers' presence, company directory, user and report changes, once per worker
+@app.before_request
+def start_listeners():
+    presence_registry.start(app, TimeStampRepository(db))
+    company_directory.start(db.engine)
+    user_cache.start(db.engine)
+    report_cache.start(db.engine)
+
 # Error handler for 404 with CORS headers
 @app.errorhandler(404)
 @cross_origin(origin='http://localhost:5173', supports_credentials=True)
@@ -53,6 +70,46 @@ def not_found(error):
     response.status_code = E_RC.RC_NOT_FOUND
     return response
 
+# Rebuild the daily rollup: flask --app main backfill-daily-totals
+@app.cli.command('backfill-daily-totals')
+def backfill_daily_totals():
+    rc = DailyTotalsRepository(db).backfill()
+    print(rc)
+
+# Create the secondary indexes on an existing database: flask --app main create-indexes
+@app.cli.command('create-indexes')
+def create_db_indexes():
+    if create_indexes(db.engine):
+        sys.exit(1)
+
+# Check that the hot queries use their indexes: flask --app main explain-indexes a@gmail.com
+@app.cli.command('explain-indexes')
+@click.argument('email')
+def explain_db_indexes(email):
+    results = explain_indexes(db.engine, email)
+    if not all(results.values()):
+        sys.exit(1)
+
+# Migrate time_stamps to monthly partitions: flask --app main partition-time-stamps
+@app.cli.command('partition-time-stamps')
+def partition_time_stamps():
+    migrate_time_stamps(db.engine, int(Config.TIME_STAMP_PARTITIONS_AHEAD))
+    if create_indexes(db.engine):
+        sys.exit(1)
+
+# Create the coming months' partitions, e.g. from a monthly cron job: flask --app main create-partitions
+@app.cli.command('create-partitions')
+def create_time_stamp_partitions():
+    create_partitions(db.engine, int(Config.TIME_STAMP_PARTITIONS_AHEAD))
+
+# Detach (or drop) the partitions of the months before a day: flask --app main detach-partitions 2023-01-01 [--drop]
+@app.cli.command('detach-partitions')
+@click.argument('before')
+@click.option('--drop', is_flag=True, help='Drop the detached partitions instead of keeping them for archiving')
+def detach_time_stamp_partitions(before, drop):
+    detached = detach_partitions(db.engine, date.fromisoformat(before), drop)
+    print(f"{'Dropped' if drop else 'Detached'} {len(detached)} partitions: {', '.join(detached)}")
+
 # Print all registered routes
 if __name__ == '__main__':
     print("Registered Routes:")
@@ -10,6 +10,9 @@ from sqlalchemy.ext.hybrid import hybrid_property
 from classes.dataclass.User import User
 from classes.dataclass.Company import Company
 from classes.dataclass.TimeStamp import TimeStamp
+from classes.dataclass.DailyTotal import DailyTotal
+from classes.dataclass.CompanyHoliday import CompanyHoliday
+from classes.dataclass.ReportJob import ReportJob
 from abc import ABC, abstractmethod
 
 db = SQLAlchemy()
@@ -17,6 +20,22 @@ class ModelInterface():
     @abstractmethod
     def to_class(self):
         raise NotImplementedError
+
+def interned(cache: dict, key: tuple, build):
+    """
+    Returns the domain object cached under key, building it on first use.
+
+    Repositories pass one cache per query so that all its rows share a single
+    User and Company object per email and company id instead of a copy per row.
+    Shared objects are meant to be read, a caller mutating one mutates it for every row.
+    """
+    if cache is None:
+        return build()
+
+    domain_object = cache.get(key)
+    if domain_object is None:
+        domain_object = cache[key] = build()
+    return domain_object
     
 class CompanyModel(db.Model, ModelInterface):
     __tablename__ = 'companies'
@@ -26,12 +45,12 @@ class CompanyModel(db.Model, ModelInterface):
     # Define the relationship to users
     users = db.relationship('UserModel', backref='company')
 
-    def to_class(self):
-        return Company(
+    def to_class(self, cache: dict = None):
+        return interned(cache, ('company', self.company_id), lambda: Company(
             company_id=str(self.company_id),
             company_name=self.company_name,
             is_active=self.is_active
-        )
+        ))
 
 class UserModel(db.Model, ModelInterface):
     __tablename__ = 'users'
@@ -50,8 +69,8 @@ class UserModel(db.Model, ModelInterface):
     employment_end = db.Column(db.DateTime(timezone=True))
     weekend_choice = db.Column(db.String(64))
 
-    def to_class(self):
-        return User(
+    def to_class(self, include_company: bool = True, cache: dict = None):
+        return interned(cache, ('user', self.email, include_company), lambda: User(
             email=self.email,
             first_name=self.first_name,
             last_name=self.last_name,
@@ -66,8 +85,8 @@ class UserModel(db.Model, ModelInterface):
             employment_start=self.employment_start,
             employment_end=self.employment_end,
             weekend_choice=self.weekend_choice,
-            company=self.company.to_class(),
-        )
+            company=self.company.to_class(cache) if include_company and self.company else None,
+        ))
         
 class TimeStampModel(db.Model, ModelInterface):
     __tablename__ = 'time_stamps'
@@ -105,7 +124,7 @@ class TimeStampModel(db.Model, ModelInterface):
             return int(time_diff.total_seconds()) 
         return None 
 
-    def to_class(self):
+    def to_class(self, include_user: bool = True, cache: dict = None):
         return TimeStamp(
             uuid=str(self.uuid),
             user_email=self.user_email,
@@ -117,5 +136,84 @@ class TimeStampModel(db.Model, ModelInterface):
             detail=self.detail,
             total_work_time=self.total_work_time,
             last_update=self.last_update,
-            user = self.user.to_class()
+            user = self.user.to_class(cache=cache) if include_user else None
+        )
+
+class UserDailyTotalModel(db.Model, ModelInterface):
+    __tablename__ = 'user_daily_totals'
+    user_email = db.Column(db.ForeignKey('users.email'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    worked_seconds = db.Column(db.Integer, nullable=False, default=0)
+    first_entry_seconds = db.Column(db.Integer, nullable=False, default=0)
+    reporting_type = db.Column(db.String)
+    entry_count = db.Column(db.Integer, nullable=False, default=0)
+    first_punch_in = db.Column(db.DateTime(timezone=True))
+
+    def to_class(self):
+        return DailyTotal(
+            user_email=self.user_email,
+            day=self.day,
+            worked_seconds=self.worked_seconds,
+            first_entry_seconds=self.first_entry_seconds,
+            reporting_type=self.reporting_type,
+            entry_count=self.entry_count,
+            first_punch_in=self.first_punch_in
+        )
+
+class CompanyHolidayModel(db.Model, ModelInterface):
+    __tablename__ = 'company_holidays'
+    company_id = db.Column(UUID(as_uuid=True), db.ForeignKey('companies.company_id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    name = db.Column(db.String(255))
+
+    def to_class(self):
+        return CompanyHoliday(
+            company_id=str(self.company_id),
+            day=self.day,
+            name=self.name
+        )
+
+class ReportJobModel(db.Model, ModelInterface):
+    __tablename__ = 'report_jobs'
+    job_id = db.Column(db.String(32), primary_key=True)
+    report_type = db.Column(db.String(32), nullable=False)
+    params = db.Column(db.JSON, nullable=False)
+    owner_email = db.Column(db.String(255), nullable=False)
+    user_permission = db.Column(db.Integer, nullable=False)
+    user_company_id = db.Column(db.String(64))
+    dedup_key = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(16), nullable=False)
+    cancel_requested = db.Column(db.Boolean, nullable=False, default=False)
+    created_at = db.Column(db.DateTime(timezone=True), nullable=False)
+    started_at = db.Column(db.DateTime(timezone=True))
+    finished_at = db.Column(db.DateTime(timezone=True))
+    result = db.Column(db.Text)
+    error = db.Column(db.Text)
+    error_code = db.Column(db.Integer)
+
+    # At most one pending or running job per caller and parameters, whichever worker submits it
+    __table_args__ = (
+        db.Index('ux_report_jobs_active_dedup_key', 'dedup_key', unique=True,
+                 postgresql_where=expression.text("status IN ('pending', 'running')"),
+                 sqlite_where=expression.text("status IN ('pending', 'running')")),
+        db.Index('ix_report_jobs_finished_at', 'finished_at'),
+    )
+
+    def to_class(self):
+        return ReportJob(
+            job_id=self.job_id,
+            report_type=self.report_type,
+            params=self.params,
+            owner_email=self.owner_email,
+            user_permission=self.user_permission,
+            user_company_id=self.user_company_id,
+            dedup_key=self.dedup_key,
+            status=self.status,
+            cancel_requested=self.cancel_requested,
+            created_at=self.created_at,
+            started_at=self.started_at,
+            finished_at=self.finished_at,
+            result=self.result,
+            error=self.error,
+            error_code=self.error_code
         )